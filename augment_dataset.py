@@ -4,16 +4,35 @@ Inmulteste cele 48 imagini la 480 (x10) prin aplicarea de transformari automate
 """
 
 import os
+import re
+import json
+import queue
+import contextlib
+import shutil
+import argparse
+import threading
 import cv2
 import numpy as np
 from PIL import Image
 import albumentations as A
 
+from image_loading import IMAGE_EXTENSIONS
+from mask_store import STORE_EXT, MaskStoreWriter, is_store, mask_location, read_mask, split_ref, open_store
+
+# Codec-uri pentru imaginile augmentate: extensie -> parametri cv2.imencode
+IMAGE_CODECS = {
+    'jpg': lambda quality, png_level: [cv2.IMWRITE_JPEG_QUALITY, quality],
+    'png': lambda quality, png_level: [cv2.IMWRITE_PNG_COMPRESSION, png_level],
+    'webp': lambda quality, png_level: [cv2.IMWRITE_WEBP_QUALITY, quality],
+}
+WRITE_QUEUE_SIZE = 32  # Maxim de imagini codate in asteptare (memorie limitata)
+WRITER_THREADS = 4
+
 def create_augmentation_pipeline():
     """
     Creeaza pipeline-ul de augmentation cu transformari variate
     """
-    return A.Compose([
+    return A.ReplayCompose([
         # Rotatie usoara
         A.Rotate(limit=15, p=0.7),
         
@@ -53,28 +72,131 @@ def create_augmentation_pipeline():
         A.GaussNoise(var_limit=(5.0, 15.0), p=0.3),
     ])
 
-def augment_dataset(input_images_dir, input_masks_dir, output_images_dir, output_masks_dir, num_augmentations=10):
+def summarize_replay(replay):
+    """
+    Pastreaza doar transformarile aplicate si parametrii lor (pentru manifest)
+    """
+    applied = []
+    for t in replay['transforms']:
+        if t.get('applied'):
+            applied.append({
+                'transform': t['__class_fullname__'].split('.')[-1],
+                'params': t.get('params') or {}
+            })
+    return applied
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+class AsyncImageWriter:
+    """
+    Scriere pe disc in fundal: bucla de augmentare pune (cale, imagine, parametri) intr-o
+    coada limitata, iar thread-urile de scriere fac codarea (cv2.imencode elibereaza GIL-ul)
+    si scrierea. Coada plina blocheaza producatorul, deci memoria ramane limitata.
+    """
+
+    def __init__(self, num_threads=WRITER_THREADS, queue_size=WRITE_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.errors = []
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+        self.threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(num_threads)]
+        for thread in self.threads:
+            thread.start()
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            path, image, params = item
+            try:
+                ok, encoded = cv2.imencode(os.path.splitext(path)[1], image, params)
+                if not ok:
+                    raise IOError(f"Codare esuata pentru {path}")
+                with open(path, 'wb') as f:
+                    f.write(encoded.tobytes())
+                with self._lock:
+                    self.bytes_written += encoded.nbytes
+            except Exception as e:
+                with self._lock:
+                    self.errors.append(f"{os.path.basename(path)}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def write(self, path, image, params=()):
+        self.queue.put((path, image, list(params)))
+
+    def close(self):
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+
+def copy_original(src, dst):
+    """
+    Originalul ajunge in dataset byte cu byte: hard link daca se poate, altfel copie
+    """
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def existing_outputs(output_dir):
+    """
+    Iesirile unei rulari anterioare grupate pe numele de baza: {base_name: [fisiere]}
+    (<base>_orig.<ext> si <base>_augN.<ext>, indiferent de format sau numar de variante)
+    """
+    outputs = {}
+    if os.path.isdir(output_dir):
+        for f in os.listdir(output_dir):
+            match = re.match(r'^(.+)_(?:orig|aug\d+)\.[^.]+$', f)
+            if match:
+                outputs.setdefault(match.group(1), []).append(os.path.join(output_dir, f))
+    return outputs
+
+
+def augment_dataset(input_images_dir, input_masks_dir, output_images_dir, output_masks_dir, num_augmentations=10,
+                    image_format='jpg', quality=95, png_level=3, writer_threads=WRITER_THREADS):
     """
     Aplica augmentation pe dataset
     
     Args:
         input_images_dir: Director cu imaginile originale (48)
-        input_masks_dir: Director cu mastile originale (48)
+        input_masks_dir: Director cu mastile originale (48) sau container .maskpack
         output_images_dir: Director unde se salveaza imaginile augmentate
         output_masks_dir: Director unde se salveaza mastile augmentate
+            (sau un container .maskpack: mastile se impacheteaza pe biti in loc de PNG)
         num_augmentations: Cate variante sa genereze pentru fiecare imagine (default: 10)
+        image_format: Codec pentru imaginile augmentate: 'jpg', 'png' sau 'webp'
+        quality: Calitate JPEG / WebP (0-100)
+        png_level: Nivel compresie PNG (0-9) pentru masti si imaginile PNG
+        writer_threads: Thread-uri de codare + scriere in fundal
+
+    Returns:
+        True daca toate fisierele au fost scrise
     """
     
-    # Creaza directoarele de output daca nu exista
-    os.makedirs(output_images_dir, exist_ok=True)
-    os.makedirs(output_masks_dir, exist_ok=True)
-    
     # Obtine lista de imagini
-    image_files = sorted([f for f in os.listdir(input_images_dir) if f.lower().endswith(('.jpg', '.jpeg', '.png'))])
+    image_files = sorted([f for f in os.listdir(input_images_dir) if f.lower().endswith(IMAGE_EXTENSIONS)])
     
     if not image_files:
         print(f"ERROR: Nu s-au gasit imagini in {input_images_dir}")
-        return
+        return False
+    
+    # Creaza directoarele de output daca nu exista
+    os.makedirs(output_images_dir, exist_ok=True)
+    if not is_store(output_masks_dir):
+        os.makedirs(output_masks_dir, exist_ok=True)
     
     print(f"========================================")
     print(f"DATA AUGMENTATION")
@@ -86,77 +208,150 @@ def augment_dataset(input_images_dir, input_masks_dir, output_images_dir, output
     
     # Creeaza pipeline-ul de augmentation
     transform = create_augmentation_pipeline()
+    image_params = IMAGE_CODECS[image_format](quality, png_level)
+    mask_params = [cv2.IMWRITE_PNG_COMPRESSION, png_level]
     
     total_generated = 0
+    augmentation_log = {}
     
-    for idx, image_file in enumerate(image_files):
-        # Extrage numele de baza (fara extensie)
-        base_name = os.path.splitext(image_file)[0]
+    # Iesirile vechi ale fiecarei imagini se sterg inainte de rescriere:
+    # alt --format sau alt numar de variante nu lasa duplicate (_aug1.jpg + _aug1.webp)
+    stale_outputs = existing_outputs(output_images_dir)
+    if not is_store(output_masks_dir):
+        for base_name, files in existing_outputs(output_masks_dir).items():
+            stale_outputs.setdefault(base_name, []).extend(files)
+    
+    # Containerul se scrie in <cale>.tmp si inlocuieste fisierul doar la close() reusit;
+    # thread-urile de scriere se opresc si la o eroare in bucla
+    store_writer = MaskStoreWriter(output_masks_dir) if is_store(output_masks_dir) else contextlib.nullcontext()
+    with store_writer as mask_store:
+        writer = AsyncImageWriter(writer_threads)
+        try:
+            for idx, image_file in enumerate(image_files):
+                # Extrage numele de baza (fara extensie)
+                base_name = os.path.splitext(image_file)[0]
         
-        # Calea completa catre imagine si masca
-        image_path = os.path.join(input_images_dir, image_file)
-        mask_path = os.path.join(input_masks_dir, f"{base_name}.png")
+                # Calea completa catre imagine si masca
+                image_path = os.path.join(input_images_dir, image_file)
+                mask_path = mask_location(input_masks_dir, base_name)
         
-        # Verifica daca exista masca corespunzatoare
-        if not os.path.exists(mask_path):
-            print(f"ATENTIE: Masca lipseste pentru {image_file}, skip...")
-            continue
+                # Verifica daca exista masca corespunzatoare
+                if mask_path is None:
+                    print(f"ATENTIE: Masca lipseste pentru {image_file}, skip...")
+                    continue
         
-        # Citeste imaginea si masca
-        image = cv2.imread(image_path)
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        mask = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE)
+                # Citeste imaginea si masca
+                image = cv2.imread(image_path)
+                mask = read_mask(mask_path)
         
-        if image is None or mask is None:
-            print(f"EROARE: Nu s-a putut citi {image_file} sau masca sa, skip...")
-            continue
+                if image is None or mask is None:
+                    print(f"EROARE: Nu s-a putut citi {image_file} sau masca sa, skip...")
+                    continue
+                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         
-        print(f"[{idx+1}/{len(image_files)}] Procesare: {image_file}")
+                print(f"[{idx+1}/{len(image_files)}] Procesare: {image_file}")
+                for stale_path in stale_outputs.pop(base_name, []):
+                    os.remove(stale_path)
         
-        # Salveaza imaginea si masca originala
-        original_image_out = os.path.join(output_images_dir, f"{base_name}_orig.jpg")
-        original_mask_out = os.path.join(output_masks_dir, f"{base_name}_orig.png")
-        cv2.imwrite(original_image_out, cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
-        cv2.imwrite(original_mask_out, mask)
-        total_generated += 1
+                # Originalul si masca lui se copiaza byte cu byte (fara re-compresie JPEG)
+                original_ext = os.path.splitext(image_file)[1].lower()
+                copy_original(image_path, os.path.join(output_images_dir, f"{base_name}_orig{original_ext}"))
+                if mask_store is not None:
+                    mask_store.add(f"{base_name}_orig", mask)
+                elif split_ref(mask_path) is None:
+                    copy_original(mask_path, os.path.join(output_masks_dir, f"{base_name}_orig.png"))
+                else:
+                    writer.write(os.path.join(output_masks_dir, f"{base_name}_orig.png"), mask, mask_params)
+                augmentation_log[f"{base_name}_orig"] = []
+                total_generated += 1
         
-        # Genereaza variante augmentate
-        for aug_idx in range(num_augmentations):
-            # Aplica transformarile (aceeasi transformare pe imagine SI masca)
-            augmented = transform(image=image, mask=mask)
-            aug_image = augmented['image']
-            aug_mask = augmented['mask']
+                # Genereaza variante augmentate
+                for aug_idx in range(num_augmentations):
+                    # Aplica transformarile (aceeasi transformare pe imagine SI masca)
+                    augmented = transform(image=image, mask=mask)
+                    aug_image = augmented['image']
+                    aug_mask = augmented['mask']
+                    augmentation_log[f"{base_name}_aug{aug_idx+1}"] = summarize_replay(augmented['replay'])
             
-            # Salveaza variantele augmentate
-            aug_image_out = os.path.join(output_images_dir, f"{base_name}_aug{aug_idx+1}.jpg")
-            aug_mask_out = os.path.join(output_masks_dir, f"{base_name}_aug{aug_idx+1}.png")
-            
-            cv2.imwrite(aug_image_out, cv2.cvtColor(aug_image, cv2.COLOR_RGB2BGR))
-            cv2.imwrite(aug_mask_out, aug_mask)
-            total_generated += 1
+                    # Salveaza variantele augmentate
+                    aug_image_out = os.path.join(output_images_dir, f"{base_name}_aug{aug_idx+1}.{image_format}")
+                    writer.write(aug_image_out, cv2.cvtColor(aug_image, cv2.COLOR_RGB2BGR), image_params)
+                    if mask_store is not None:
+                        mask_store.add(f"{base_name}_aug{aug_idx+1}", aug_mask)
+                    else:
+                        aug_mask_out = os.path.join(output_masks_dir, f"{base_name}_aug{aug_idx+1}.png")
+                        writer.write(aug_mask_out, aug_mask, mask_params)
+                    total_generated += 1
         
-        print(f"  -> Generat {num_augmentations + 1} variante (1 orig + {num_augmentations} aug)")
+                print(f"  -> Generat {num_augmentations + 1} variante (1 orig + {num_augmentations} aug)")
+        finally:
+            # Asteapta terminarea scrierilor din fundal
+            writer.close()
+    
+    if writer.errors:
+        print(f"\nEROARE: {len(writer.errors)} fisiere nu s-au putut scrie:")
+        for error in writer.errors[:5]:
+            print(f"  - {error}")
+        return False
+    
+    # Ce a ramas apartine imaginilor sterse din input (sau fara masca acum): altfel ar ramane
+    # perechi imagine-masca valide in setul de antrenare
+    orphaned = [path for files in stale_outputs.values() for path in files]
+    for stale_path in orphaned:
+        os.remove(stale_path)
+    if orphaned:
+        print(f"Sterse {len(orphaned)} fisiere ale imaginilor care nu mai sunt in {input_images_dir}")
+    
+    # Cealalta reprezentare a mastilor (PNG-uri vs container) de la o rulare anterioara se sterge
+    # abia acum, cand noile masti sunt complete; altfel antrenarea ar putea citi masti vechi
+    if is_store(output_masks_dir):
+        other_masks = output_masks_dir[:-len(STORE_EXT)]
+        if os.path.isdir(other_masks):
+            print(f"Sterg mastile PNG vechi: {other_masks}")
+            shutil.rmtree(other_masks)
+    else:
+        other_masks = output_masks_dir + STORE_EXT
+        if os.path.exists(other_masks):
+            print(f"Sterg containerul de masti vechi: {other_masks}")
+            os.remove(other_masks)
+    
+    # Manifestul (split-ul) descrie setul vechi: caile lui nu mai corespund
+    # (py dataset_manifest.py il reconstruieste; pana atunci antrenarea face split pe sursa)
+    manifest_path = os.path.join(os.path.dirname(os.path.abspath(output_images_dir)), "manifest.sqlite")
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+        print(f"Manifest vechi sters: {manifest_path}")
+    
+    # Parametrii augmentarilor (cititi de dataset_manifest.py)
+    log_path = os.path.join(os.path.dirname(os.path.abspath(output_images_dir)), "augmentations.json")
+    with open(log_path, 'w', encoding='utf-8') as f:
+        json.dump(augmentation_log, f, default=_json_default)
     
     print(f"\n========================================")
     print(f"AUGMENTATION COMPLETAT!")
     print(f"========================================")
     print(f"Total imagini generate: {total_generated}")
+    print(f"Scris: {writer.bytes_written / (1024 * 1024):.1f} MB ({image_format}, fara originale)")
     print(f"  - Imagini: {output_images_dir}")
     print(f"  - Masti: {output_masks_dir}")
     print(f"========================================")
+    return True
 
 def verify_dataset(images_dir, masks_dir):
     """
     Verifica ca fiecare imagine are o masca corespunzatoare
     """
-    image_files = sorted([f for f in os.listdir(images_dir) if f.lower().endswith(('.jpg', '.jpeg', '.png'))])
-    mask_files = sorted([f for f in os.listdir(masks_dir) if f.lower().endswith('.png')])
+    image_files = sorted([f for f in os.listdir(images_dir) if f.lower().endswith(IMAGE_EXTENSIONS)])
+    if is_store(masks_dir):
+        num_masks = len(open_store(masks_dir))
+    else:
+        num_masks = len([f for f in os.listdir(masks_dir) if f.lower().endswith('.png')])
     
     print(f"\nVerificare dataset:")
     print(f"  - Imagini gasite: {len(image_files)}")
-    print(f"  - Masti gasite: {len(mask_files)}")
+    print(f"  - Masti gasite: {num_masks}")
     
-    if len(image_files) != len(mask_files):
+    if len(image_files) != num_masks:
         print(f"  ATENTIE: Numar diferit de imagini si masti!")
         return False
     
@@ -164,8 +359,7 @@ def verify_dataset(images_dir, masks_dir):
     missing_masks = []
     for image_file in image_files:
         base_name = os.path.splitext(image_file)[0]
-        mask_file = f"{base_name}.png"
-        if mask_file not in mask_files:
+        if mask_location(masks_dir, base_name) is None:
             missing_masks.append(image_file)
     
     if missing_masks:
@@ -181,6 +375,15 @@ if __name__ == "__main__":
     # Configurare cai
     script_dir = os.path.dirname(os.path.abspath(__file__))
     
+    parser = argparse.ArgumentParser(description="Augmentare dataset training_48 -> training_480")
+    parser.add_argument('--format', choices=sorted(IMAGE_CODECS), default='jpg', help="Codec imagini augmentate")
+    parser.add_argument('--quality', type=int, default=95, help="Calitate JPEG / WebP")
+    parser.add_argument('--png-level', type=int, default=3, help="Compresie PNG 0-9 (masti)")
+    parser.add_argument('--writers', type=int, default=WRITER_THREADS, help="Thread-uri de scriere")
+    parser.add_argument('--mask-store', action='store_true',
+                        help=f"Mastile intr-un singur container masks{STORE_EXT} in loc de PNG-uri")
+    args = parser.parse_args()
+    
     # Director input (cele 48 imagini originale)
     input_images_dir = os.path.join(script_dir, "training_48", "images")
     input_masks_dir = os.path.join(script_dir, "training_48", "masks")
@@ -188,7 +391,7 @@ if __name__ == "__main__":
     # Director output (480 imagini augmentate)
     output_base_dir = os.path.join(script_dir, "training_480")
     output_images_dir = os.path.join(output_base_dir, "images")
-    output_masks_dir = os.path.join(output_base_dir, "masks")
+    output_masks_dir = os.path.join(output_base_dir, "masks" + (STORE_EXT if args.mask_store else ""))
     
     # Verifica ca directoarele de input exista
     if not os.path.exists(input_images_dir):
@@ -204,13 +407,20 @@ if __name__ == "__main__":
         exit(1)
     
     # Ruleaza augmentation
-    augment_dataset(
+    ok = augment_dataset(
         input_images_dir=input_images_dir,
         input_masks_dir=input_masks_dir,
         output_images_dir=output_images_dir,
         output_masks_dir=output_masks_dir,
-        num_augmentations=9  # 9 variante + 1 originala = 10 total per imagine
+        num_augmentations=9,  # 9 variante + 1 originala = 10 total per imagine
+        image_format=args.format,
+        quality=args.quality,
+        png_level=args.png_level,
+        writer_threads=args.writers
     )
+    if not ok:
+        print(f"EROARE: Augmentarea nu s-a terminat complet!")
+        exit(1)
     
     # Verifica dataset-ul generat
     verify_dataset(output_images_dir, output_masks_dir)
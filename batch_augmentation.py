@@ -0,0 +1,250 @@
+"""
+Augmentare vectorizata pe batch-uri intregi (B, H, W, C) in TensorFlow
+- geometrie (rotatie, scala, translatie, flip): o singura matrice afina per imagine
+  si un singur resample pentru tot batch-ul (ImageProjectiveTransformV3);
+  mastile primesc exact aceleasi matrici (interpolare NEAREST)
+- culoare (luminozitate/contrast, HSV, blur, zgomot): operatii pe tot batch-ul,
+  cu parametri aleatori per imagine, aplicate prin masti de probabilitate
+
+Parametrii impliciti imita create_augmentation_pipeline() din augment_dataset.py.
+"""
+
+import os
+import time
+import argparse
+import numpy as np
+import tensorflow as tf
+
+# Aceleasi limite si probabilitati ca pipeline-ul albumentations
+ALBUMENTATIONS_CONFIG = {
+    'rotate_deg': 15.0, 'p_rotate': 0.7,
+    'p_flip': 0.5,
+    'scale': 0.2, 'p_scale': 0.5,
+    'shift': 0.1, 'p_shift': 0.5,
+    'brightness': 0.3, 'contrast': 0.3, 'p_brightness_contrast': 0.8,
+    'hue': 10 / 180, 'saturation': 20 / 255, 'value': 10 / 255, 'p_hsv': 0.5,
+    'p_blur': 0.3,
+    'noise_std': (np.sqrt(5.0) / 255, np.sqrt(15.0) / 255), 'p_noise': 0.3,
+    'fill_mode': 'REFLECT'
+}
+
+# Echivalentul ImageDataGenerator din train_tflite_4_masks.py (doar geometrie, fara flip)
+GEOMETRY_ONLY_CONFIG = {
+    'rotate_deg': 15.0, 'p_rotate': 1.0,
+    'p_flip': 0.0,
+    'scale': 0.1, 'p_scale': 1.0,
+    'shift': 0.1, 'p_shift': 1.0,
+    'brightness': 0.0, 'contrast': 0.0, 'p_brightness_contrast': 0.0,
+    'hue': 0.0, 'saturation': 0.0, 'value': 0.0, 'p_hsv': 0.0,
+    'p_blur': 0.0,
+    'noise_std': (0.0, 0.0), 'p_noise': 0.0,
+    'fill_mode': 'CONSTANT'
+}
+
+
+def _gate(batch, p):
+    """
+    (B,) float: 1.0 pentru imaginile carora li se aplica transformarea
+    """
+    return tf.cast(tf.random.uniform([batch]) < p, tf.float32)
+
+
+def affine_transforms(batch, height, width, config):
+    """
+    Matricile inverse (output -> input) (B, 8) pentru ImageProjectiveTransformV3
+
+    Transformarea directa (in jurul centrului): flip, scala s, rotatie theta, translatie t.
+    Pentru pixelul de output (x, y):
+        x_in = f/s * ( cos * (x - cx - tx) + sin * (y - cy - ty)) + cx
+        y_in = 1/s * (-sin * (x - cx - tx) + cos * (y - cy - ty)) + cy
+    """
+    height = tf.cast(height, tf.float32)
+    width = tf.cast(width, tf.float32)
+    cx = (width - 1) / 2
+    cy = (height - 1) / 2
+
+    limit = config['rotate_deg'] * np.pi / 180
+    theta = tf.random.uniform([batch], -limit, limit) * _gate(batch, config['p_rotate'])
+    scale = 1 + tf.random.uniform([batch], -config['scale'], config['scale']) * _gate(batch, config['p_scale'])
+    shift_gate = _gate(batch, config['p_shift'])
+    tx = tf.random.uniform([batch], -config['shift'], config['shift']) * width * shift_gate
+    ty = tf.random.uniform([batch], -config['shift'], config['shift']) * height * shift_gate
+    flip = 1 - 2 * _gate(batch, config['p_flip'])
+
+    cos = tf.cos(theta)
+    sin = tf.sin(theta)
+    a0 = flip * cos / scale
+    a1 = flip * sin / scale
+    b0 = -sin / scale
+    b1 = cos / scale
+    a2 = cx - a0 * (cx + tx) - a1 * (cy + ty)
+    b2 = cy - b0 * (cx + tx) - b1 * (cy + ty)
+    zeros = tf.zeros([batch])
+    return tf.stack([a0, a1, a2, b0, b1, b2, zeros, zeros], axis=1)
+
+
+def _color_jitter(images, config):
+    batch = tf.shape(images)[0]
+
+    def per_image(values):
+        return tf.reshape(values, [batch, 1, 1, 1])
+
+    # Luminozitate / contrast (ca RandomBrightnessContrast: img * alpha + beta)
+    gate = per_image(_gate(batch, config['p_brightness_contrast']))
+    alpha = 1 + per_image(tf.random.uniform([batch], -config['contrast'], config['contrast'])) * gate
+    beta = per_image(tf.random.uniform([batch], -config['brightness'], config['brightness'])) * gate
+    images = images * alpha + beta
+
+    # Hue / saturatie / valoare
+    if config['p_hsv'] > 0:
+        gate = per_image(_gate(batch, config['p_hsv']))
+        hsv = tf.image.rgb_to_hsv(tf.clip_by_value(images, 0.0, 1.0))
+        delta = tf.concat([
+            per_image(tf.random.uniform([batch], -config['hue'], config['hue'])),
+            per_image(tf.random.uniform([batch], -config['saturation'], config['saturation'])),
+            per_image(tf.random.uniform([batch], -config['value'], config['value']))
+        ], axis=-1) * gate
+        hsv = hsv + delta
+        hsv = tf.concat([tf.math.floormod(hsv[..., :1], 1.0), tf.clip_by_value(hsv[..., 1:], 0.0, 1.0)], axis=-1)
+        images = tf.image.hsv_to_rgb(hsv)
+
+    # Blur 3x3 (convolutie depthwise pe tot batch-ul)
+    if config['p_blur'] > 0:
+        gate = per_image(_gate(batch, config['p_blur']))
+        kernel = tf.ones([3, 3, 3, 1]) / 9.0
+        blurred = tf.nn.depthwise_conv2d(images, kernel, [1, 1, 1, 1], 'SAME')
+        images = images + (blurred - images) * gate
+
+    # Zgomot gaussian
+    if config['p_noise'] > 0:
+        gate = per_image(_gate(batch, config['p_noise']))
+        std = per_image(tf.random.uniform([batch], config['noise_std'][0], config['noise_std'][1]))
+        images = images + tf.random.normal(tf.shape(images)) * std * gate
+
+    return tf.clip_by_value(images, 0.0, 1.0)
+
+
+def augment_batch(images, masks, config=ALBUMENTATIONS_CONFIG):
+    """
+    Augmenteaza un batch intreg
+
+    Args:
+        images: (B, H, W, 3) float32 in [0, 1]
+        masks: (B, H, W, 1) float32 (0/1)
+
+    Returns:
+        (images, masks) cu aceeasi forma
+    """
+    images = tf.convert_to_tensor(images, tf.float32)
+    masks = tf.convert_to_tensor(masks, tf.float32)
+    shape = tf.shape(images)
+    transforms = affine_transforms(shape[0], shape[1], shape[2], config)
+
+    def warp(tensor, interpolation):
+        return tf.raw_ops.ImageProjectiveTransformV3(
+            images=tensor,
+            transforms=transforms,
+            output_shape=shape[1:3],
+            fill_value=0.0,
+            interpolation=interpolation,
+            fill_mode=config['fill_mode']
+        )
+
+    images = warp(images, 'BILINEAR')
+    masks = warp(masks, 'NEAREST')
+    return _color_jitter(images, config), masks
+
+
+def _benchmark_albumentations(images_uint8, masks_uint8, repeats):
+    from augment_dataset import create_augmentation_pipeline
+    transform = create_augmentation_pipeline()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for image, mask in zip(images_uint8, masks_uint8):
+            transform(image=image, mask=mask)
+    return repeats * len(images_uint8) / (time.perf_counter() - start)
+
+
+def _benchmark_image_data_generator(images, masks, repeats):
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+    params = dict(rotation_range=15, width_shift_range=0.1, height_shift_range=0.1,
+                  zoom_range=0.1, fill_mode='constant', cval=0.0)
+    img_datagen = ImageDataGenerator(**params)
+    mask_datagen = ImageDataGenerator(**params)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        augmented_images, augmented_masks = [], []
+        for img, mask in zip(images, masks):
+            seed = np.random.randint(10000)
+            augmented_images.append(np.expand_dims(img_datagen.random_transform(img, seed=seed), axis=0))
+            augmented_masks.append(np.expand_dims(mask_datagen.random_transform(mask, seed=seed), axis=0))
+        np.vstack(augmented_images)
+        np.vstack(augmented_masks)
+    return repeats * len(images) / (time.perf_counter() - start)
+
+
+def _benchmark_batched(images, masks, config, batch_size, repeats):
+    augment = tf.function(lambda x, y: augment_batch(x, y, config))
+    batches = [
+        (tf.constant(images[i:i + batch_size]), tf.constant(masks[i:i + batch_size]))
+        for i in range(0, len(images) - batch_size + 1, batch_size)
+    ]
+    augment(*batches[0])  # Trasare / warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for x, y in batches:
+            out = augment(x, y)
+    _ = out[0].numpy()
+    return repeats * len(batches) * batch_size / (time.perf_counter() - start)
+
+
+def benchmark(images_uint8, masks_uint8, batch_size=32, repeats=3):
+    """
+    Imagini/s: albumentations per imagine, ImageDataGenerator per imagine, batch vectorizat
+    """
+    images = images_uint8.astype(np.float32) / 255.0
+    masks = (masks_uint8 > 127).astype(np.float32)[..., None]
+
+    return {
+        'albumentations (per imagine)': _benchmark_albumentations(images_uint8, masks_uint8, repeats),
+        'batch (config albumentations)': _benchmark_batched(images, masks, ALBUMENTATIONS_CONFIG, batch_size, repeats),
+        'ImageDataGenerator (per imagine)': _benchmark_image_data_generator(images, masks, repeats),
+        'batch (doar geometrie)': _benchmark_batched(images, masks, GEOMETRY_ONLY_CONFIG, batch_size, repeats)
+    }
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Benchmark augmentare per imagine vs batch vectorizat")
+    parser.add_argument('--images', default=os.path.join(script_dir, "training_48", "images"))
+    parser.add_argument('--masks', default=os.path.join(script_dir, "training_48", "masks"))
+    parser.add_argument('--size', type=int, default=256)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    from evaluate_tflite import list_dataset_pairs
+    from image_loading import load_image_rgb, load_mask_gray
+
+    if os.path.exists(args.images) and os.path.exists(args.masks):
+        pairs = list_dataset_pairs(args.images, args.masks)
+        images = np.stack([load_image_rgb(p[0], args.size) for p in pairs])
+        masks = np.stack([load_mask_gray(p[1], args.size) for p in pairs])
+    else:
+        print(f"ATENTIE: {args.images} nu exista, se folosesc imagini sintetice")
+        rng = np.random.default_rng(42)
+        images = rng.integers(0, 256, (64, args.size, args.size, 3), dtype=np.uint8)
+        masks = np.zeros((64, args.size, args.size), dtype=np.uint8)
+        masks[:, args.size // 4:3 * args.size // 4, args.size // 3:2 * args.size // 3] = 255
+
+    if len(images) < args.batch_size:
+        reps = int(np.ceil(args.batch_size / len(images)))
+        images = np.tile(images, (reps, 1, 1, 1))
+        masks = np.tile(masks, (reps, 1, 1))
+
+    print(f"=== BENCHMARK AUGMENTARE ({len(images)} imagini {args.size}x{args.size}, batch {args.batch_size}) ===")
+    results = benchmark(images, masks, args.batch_size, args.repeats)
+    print(f"{'Metoda':<34} {'imagini/s':>10}")
+    for name, rate in results.items():
+        print(f"{name:<34} {rate:>10.1f}")
@@ -0,0 +1,312 @@
+"""
+Suita de benchmark-uri de regresie pentru pipeline-ul de segmentare
+(fara fisiere de test: un singur runner, in stilul asv)
+
+- Fixture-uri sintetice generate local (poze cu un cartonas in perspectiva, masti PNG,
+  JSON-uri COCO in formatul MakeSense) in benchmark_fixtures/, refolosite intre rulari
+- Fiecare benchmark: setup o data, incalzire, apoi mediana pe REPEATS rulari
+- Istoric in benchmark_fixtures/benchmark_history.json (commit git + rezultate); o rulare e comparata cu
+  mediana ultimelor HISTORY_BASELINE rulari si orice benchmark mai lent decat
+  toleranta este raportat ca regresie (cod de iesire 1, util ca poarta inainte de commit)
+- O rulare cu regresii nu intra in istoric (ar muta referinta spre valorile lente);
+  cu --accept incetinirea e asumata si rularea devine parte din referinta
+
+Ex: py benchmark_suite.py --only tflite_inference,apply_mask_to_image --tolerance 0.1
+"""
+
+import os
+import io
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+import numpy as np
+import cv2
+
+FIXTURES_VERSION = 1
+FIXTURE_COUNT = 16
+FIXTURE_SIZE = (1600, 1200)  # (latime, inaltime) - mai mic decat pozele de 12 MP, acelasi aspect
+REPEATS = 5
+HISTORY_NAME = "benchmark_history.json"
+HISTORY_BASELINE = 5   # Cate rulari anterioare formeaza referinta
+TOLERANCE = 0.15       # +15% fata de referinta = regresie
+
+
+def create_fixtures(fixtures_dir, count=FIXTURE_COUNT, size=FIXTURE_SIZE, seed=0):
+    """
+    Poze sintetice: fundal zgomotos + cartonas (patrulater in perspectiva) cu text si margine.
+    Scrie images/*.jpg, masks/*.png si json/*.json (COCO, cate unul per poza).
+    """
+    info_path = os.path.join(fixtures_dir, "fixtures.json")
+    info = {'version': FIXTURES_VERSION, 'count': count, 'size': list(size), 'seed': seed}
+    if os.path.exists(info_path):
+        with open(info_path, 'r') as f:
+            if json.load(f) == info:
+                return fixtures_dir
+
+    rng = np.random.default_rng(seed)
+    width, height = size
+    for sub in ("images", "masks", "json"):
+        os.makedirs(os.path.join(fixtures_dir, sub), exist_ok=True)
+
+    for i in range(count):
+        name = f"synthetic_{i:03d}"
+        background = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 5)
+
+        # Cartonas ~40% din latime, colturi perturbate pentru perspectiva
+        cw, ch = width * 0.4, width * 0.4 * 1.4
+        cx, cy = width / 2 + rng.uniform(-100, 100), height / 2 + rng.uniform(-100, 100)
+        corners = np.array([[cx - cw / 2, cy - ch / 2], [cx + cw / 2, cy - ch / 2],
+                            [cx + cw / 2, cy + ch / 2], [cx - cw / 2, cy + ch / 2]])
+        corners += rng.uniform(-0.08, 0.08, corners.shape) * cw
+        corners = np.clip(corners, 0, [width - 1, height - 1]).astype(np.int32)
+
+        image = background.copy()
+        cv2.fillPoly(image, [corners], tuple(int(c) for c in rng.integers(180, 255, 3)))
+        cv2.polylines(image, [corners], True, (30, 30, 30), 6)
+        cv2.putText(image, name, tuple(int(v) for v in corners[0] + [40, 120]),
+                    cv2.FONT_HERSHEY_SIMPLEX, 2.0, (20, 20, 20), 4)
+        mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.fillPoly(mask, [corners], 255)
+
+        cv2.imwrite(os.path.join(fixtures_dir, "images", f"{name}.jpg"), image, [cv2.IMWRITE_JPEG_QUALITY, 92])
+        cv2.imwrite(os.path.join(fixtures_dir, "masks", f"{name}.png"), mask)
+        coco = {
+            'images': [{'id': 1, 'file_name': f"{name}.jpg", 'width': width, 'height': height}],
+            'annotations': [{'id': 1, 'image_id': 1, 'category_id': 1,
+                             'segmentation': [corners.astype(float).flatten().tolist()]}]
+        }
+        with open(os.path.join(fixtures_dir, "json", f"{name}.json"), 'w') as f:
+            json.dump(coco, f)
+
+    with open(info_path, 'w') as f:
+        json.dump(info, f)
+    print(f"Fixture-uri sintetice create: {fixtures_dir} ({count} poze {width}x{height})")
+    return fixtures_dir
+
+
+def _fixture_files(fixtures_dir, sub, ext):
+    folder = os.path.join(fixtures_dir, sub)
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(ext))
+
+
+# Fiecare benchmark: setup(fixtures_dir, work_dir) -> (functie fara argumente, elemente per apel)
+
+def bench_create_mask_from_polygon(fixtures_dir, work_dir):
+    from convert_coco_to_masks import create_mask_from_polygon
+    polygons = []
+    for path in _fixture_files(fixtures_dir, "json", ".json"):
+        with open(path, 'r') as f:
+            polygons.append(json.load(f)['annotations'][0]['segmentation'][0])
+    width, height = FIXTURE_SIZE
+    return lambda: [create_mask_from_polygon(width, height, p) for p in polygons], len(polygons)
+
+
+def bench_process_single_json(fixtures_dir, work_dir):
+    from convert_coco_to_masks import process_single_json
+    json_files = _fixture_files(fixtures_dir, "json", ".json")
+    images_dir = os.path.join(fixtures_dir, "images")
+    masks_dir = os.path.join(work_dir, "masks_from_json")
+    os.makedirs(masks_dir, exist_ok=True)
+
+    def run():
+        with redirect_stdout(io.StringIO()):
+            for path in json_files:
+                process_single_json(path, images_dir, masks_dir)
+    return run, len(json_files)
+
+
+def bench_augmentation(fixtures_dir, work_dir):
+    from augment_dataset import create_augmentation_pipeline
+    transform = create_augmentation_pipeline()
+    samples = [
+        (cv2.cvtColor(cv2.imread(i), cv2.COLOR_BGR2RGB), cv2.imread(m, cv2.IMREAD_GRAYSCALE))
+        for i, m in zip(_fixture_files(fixtures_dir, "images", ".jpg"), _fixture_files(fixtures_dir, "masks", ".png"))
+    ]
+    return lambda: [transform(image=image, mask=mask) for image, mask in samples], len(samples)
+
+
+def bench_load_dataset(fixtures_dir, work_dir):
+    from train_tflite_480_masks import load_dataset
+    images_dir = os.path.join(fixtures_dir, "images")
+    masks_dir = os.path.join(fixtures_dir, "masks")
+
+    def run():
+        with redirect_stdout(io.StringIO()):
+            load_dataset(images_dir, masks_dir)
+    return run, FIXTURE_COUNT
+
+
+def bench_train_step(fixtures_dir, work_dir):
+    from tensorflow import keras
+    from train_tflite_480_masks import create_unet_model, IMG_SIZE, BATCH_SIZE, LEARNING_RATE, LOSSES, LOSS
+    from segmentation_metrics import dice_coefficient
+
+    rng = np.random.default_rng(0)
+    X = rng.random((BATCH_SIZE, IMG_SIZE, IMG_SIZE, 3), dtype=np.float32)
+    y = (rng.random((BATCH_SIZE, IMG_SIZE, IMG_SIZE, 1)) > 0.5).astype(np.float32)
+    model = create_unet_model()
+    model.compile(optimizer=keras.optimizers.Adam(learning_rate=LEARNING_RATE),
+                  loss=LOSSES[LOSS], metrics=[dice_coefficient])
+    return lambda: model.train_on_batch(X, y), BATCH_SIZE
+
+
+def bench_tflite_inference(fixtures_dir, work_dir):
+    from train_tflite_480_masks import create_unet_model, IMG_SIZE
+    from compress_model import convert_to_tflite
+    from tflite_inference import TFLiteSegmenter
+    from image_loading import load_image_rgb
+
+    # Ponderile nu conteaza pentru latenta: model neantrenat, aceeasi arhitectura si conversie
+    tflite_path = os.path.join(work_dir, "unet.tflite")
+    if not os.path.exists(tflite_path):
+        with open(tflite_path, 'wb') as f:
+            f.write(convert_to_tflite(create_unet_model()))
+    segmenter = TFLiteSegmenter(tflite_path, batch_size=1)
+    images = np.stack([
+        load_image_rgb(p, IMG_SIZE).astype(np.float32) / 255.0
+        for p in _fixture_files(fixtures_dir, "images", ".jpg")
+    ])
+    return lambda: segmenter.predict(images), len(images)
+
+
+def bench_apply_mask_to_image(fixtures_dir, work_dir):
+    from test_masks import apply_mask_to_image
+    pairs = list(zip(_fixture_files(fixtures_dir, "images", ".jpg"), _fixture_files(fixtures_dir, "masks", ".png")))
+    output_path = os.path.join(work_dir, "result.png")
+
+    def run():
+        with redirect_stdout(io.StringIO()):
+            for image_path, mask_path in pairs:
+                apply_mask_to_image(image_path, mask_path, output_path)
+    return run, len(pairs)
+
+
+BENCHMARKS = {
+    'create_mask_from_polygon': bench_create_mask_from_polygon,
+    'process_single_json': bench_process_single_json,
+    'augmentation': bench_augmentation,
+    'load_dataset': bench_load_dataset,
+    'train_step': bench_train_step,
+    'tflite_inference': bench_tflite_inference,
+    'apply_mask_to_image': bench_apply_mask_to_image,
+}
+
+
+def run_benchmark(setup, fixtures_dir, work_dir, repeats=REPEATS):
+    """
+    Mediana (si minimul) timpului per element in ms, dupa un apel de incalzire
+    """
+    fn, items = setup(fixtures_dir, work_dir)
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000 / items)
+    return {
+        'median_ms': float(np.median(times)),
+        'min_ms': float(np.min(times)),
+        'items_per_s': 1000.0 / max(float(np.median(times)), 1e-9)
+    }
+
+
+def git_revision(repo_dir):
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=repo_dir, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def find_regressions(results, history, tolerance=TOLERANCE, baseline_runs=HISTORY_BASELINE):
+    """
+    Compara fiecare benchmark cu mediana ultimelor baseline_runs rulari din istoric
+
+    Returns:
+        dict name -> {'baseline_ms', 'current_ms', 'change', 'regression'}
+    """
+    comparison = {}
+    for name, result in results.items():
+        previous = [run['results'][name]['median_ms'] for run in history if name in run['results']]
+        if not previous:
+            continue
+        baseline = float(np.median(previous[-baseline_runs:]))
+        change = result['median_ms'] / max(baseline, 1e-9) - 1.0
+        comparison[name] = {
+            'baseline_ms': baseline,
+            'current_ms': result['median_ms'],
+            'change': change,
+            'regression': change > tolerance
+        }
+    return comparison
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Benchmark-uri de regresie pe fixture-uri sintetice")
+    parser.add_argument('--only', default=None, help=f"Lista separata prin virgula din: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--repeats', type=int, default=REPEATS)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="Incetinire relativa permisa")
+    parser.add_argument('--fixtures', default=os.path.join(script_dir, "benchmark_fixtures"))
+    parser.add_argument('--history', default=None, help=f"Implicit: <fixtures>/{HISTORY_NAME}")
+    parser.add_argument('--no-save', action='store_true', help="Nu adauga rularea in istoric")
+    parser.add_argument('--accept', action='store_true',
+                        help="Regresiile sunt asumate: rularea se salveaza in istoric si iesirea e 0")
+    args = parser.parse_args()
+
+    selected = list(BENCHMARKS) if args.only is None else [name.strip() for name in args.only.split(',')]
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        print(f"EROARE: Benchmark-uri necunoscute: {', '.join(unknown)}")
+        exit(1)
+
+    create_fixtures(args.fixtures)
+    args.history = args.history or os.path.join(args.fixtures, HISTORY_NAME)
+    history = []
+    if os.path.exists(args.history):
+        with open(args.history, 'r') as f:
+            history = json.load(f)
+
+    print(f"\n=== BENCHMARK-URI ({len(selected)}, {args.repeats} repetari) ===")
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name in selected:
+            try:
+                results[name] = run_benchmark(BENCHMARKS[name], args.fixtures, work_dir, args.repeats)
+            except ImportError as e:
+                print(f"  {name:<26} SKIP ({e})")
+                continue
+            print(f"  {name:<26} {results[name]['median_ms']:>10.2f} ms/element  "
+                  f"({results[name]['items_per_s']:.1f}/s)")
+
+    comparison = find_regressions(results, history, args.tolerance)
+    regressions = [name for name, c in comparison.items() if c['regression']]
+    if comparison:
+        print(f"\n=== COMPARATIE CU ISTORICUL (toleranta {args.tolerance:+.0%}) ===")
+        print(f"{'Benchmark':<26} {'Referinta':>10} {'Acum':>10} {'Schimbare':>10}")
+        for name, c in comparison.items():
+            flag = "  REGRESIE" if c['regression'] else ""
+            print(f"{name:<26} {c['baseline_ms']:>10.2f} {c['current_ms']:>10.2f} {c['change']:>+10.1%}{flag}")
+
+    if regressions and not args.accept:
+        print(f"\nRularea nu a fost adaugata in istoric (regresii; --accept daca incetinirea e asumata)")
+    elif not args.no_save and results:
+        history.append({
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'revision': git_revision(script_dir),
+            'results': results
+        })
+        with open(args.history, 'w') as f:
+            json.dump(history, f, indent=2)
+        print(f"\nIstoric actualizat: {args.history} ({len(history)} rulari)")
+
+    if regressions and args.accept:
+        print(f"\nATENTIE: {len(regressions)} regresii acceptate: {', '.join(regressions)}")
+    elif regressions:
+        print(f"\nEROARE: {len(regressions)} regresii de performanta: {', '.join(regressions)}")
+        exit(1)
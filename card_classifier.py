@@ -0,0 +1,199 @@
+"""
+Clasificare tip cartonas dupa segmentare, folosind sabloanele din
+app/src/main/assets/card_templates/ (108.png = SMALL, 165.png = LONG)
+
+Index de caracteristici precalculat o singura data si salvat pe disc:
+embedding = miniatura grayscale normalizata (medie 0, norma L2 = 1) + aspect ratio.
+Clasificarea unui batch este o singura inmultire de matrice (N, D) x (D, T).
+"""
+
+import os
+import time
+import argparse
+import numpy as np
+import cv2
+
+EMBED_SIZE = 32  # Miniatura 32x32 -> vector de 1024
+ASPECT_PENALTY = 2.0  # Cat scade scorul per unitate de diferenta de aspect ratio
+MIN_SCORE = 0.3  # Sub acest scor rezultatul este 'necunoscut'
+INDEX_NAME = "template_index.npz"
+
+
+def _flatten_alpha(image):
+    """
+    Sabloanele sunt RGBA: zonele transparente devin albe (ca la apply_mask_to_image)
+    """
+    if image.ndim == 3 and image.shape[2] == 4:
+        alpha = image[:, :, 3:4].astype(np.float32) / 255.0
+        rgb = image[:, :, :3].astype(np.float32)
+        return (rgb * alpha + 255.0 * (1.0 - alpha)).astype(np.uint8)
+    return image
+
+
+def embed_images(images):
+    """
+    Embedding-uri (N, D) float32 si aspect ratio (N,) pentru o lista de imagini BGR/BGRA/gray
+    """
+    embeddings = np.empty((len(images), EMBED_SIZE * EMBED_SIZE), dtype=np.float32)
+    aspects = np.empty(len(images), dtype=np.float32)
+
+    for i, image in enumerate(images):
+        image = _flatten_alpha(image)
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        h, w = gray.shape
+        aspects[i] = min(w, h) / max(w, h)
+        # Orientare canonica: latura lunga pe verticala
+        if w > h:
+            gray = cv2.rotate(gray, cv2.ROTATE_90_CLOCKWISE)
+        thumb = cv2.resize(gray, (EMBED_SIZE, EMBED_SIZE), interpolation=cv2.INTER_AREA)
+        embeddings[i] = thumb.reshape(-1)
+
+    embeddings -= embeddings.mean(axis=1, keepdims=True)
+    embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-6)
+    return embeddings, aspects
+
+
+class TemplateIndex:
+    """
+    Index de sabloane: embedding-uri (T, D), aspect ratio (T,), etichete
+    """
+
+    def __init__(self, labels, embeddings, aspects):
+        self.labels = list(labels)
+        self.embeddings = embeddings
+        self.aspects = aspects
+
+    @classmethod
+    def build(cls, templates_dir):
+        files = sorted(f for f in os.listdir(templates_dir) if f.lower().endswith(('.png', '.jpg', '.jpeg')))
+        images = [cv2.imread(os.path.join(templates_dir, f), cv2.IMREAD_UNCHANGED) for f in files]
+        embeddings, aspects = embed_images(images)
+        return cls([os.path.splitext(f)[0] for f in files], embeddings, aspects)
+
+    @classmethod
+    def load_or_build(cls, templates_dir, cache_path):
+        """
+        Foloseste indexul de pe disc daca sabloanele nu s-au schimbat de la ultima construire
+        """
+        files = sorted(f for f in os.listdir(templates_dir) if f.lower().endswith(('.png', '.jpg', '.jpeg')))
+        fingerprint = np.array(
+            [os.path.getmtime(os.path.join(templates_dir, f)) for f in files], dtype=np.float64
+        )
+
+        if os.path.exists(cache_path):
+            cached = np.load(cache_path, allow_pickle=False)
+            if list(cached['files']) == files and np.array_equal(cached['fingerprint'], fingerprint):
+                return cls(cached['labels'], cached['embeddings'], cached['aspects'])
+
+        index = cls.build(templates_dir)
+        np.savez(
+            cache_path,
+            files=np.array(files),
+            fingerprint=fingerprint,
+            labels=np.array(index.labels),
+            embeddings=index.embeddings,
+            aspects=index.aspects
+        )
+        print(f"Index sabloane salvat: {cache_path} ({len(files)} sabloane)")
+        return index
+
+    def classify(self, embeddings, aspects):
+        """
+        Cel mai bun sablon pentru fiecare embedding
+
+        Returns:
+            (labels, scores) - eticheta 'necunoscut' sub MIN_SCORE
+        """
+        similarity = embeddings @ self.embeddings.T
+        similarity -= ASPECT_PENALTY * np.abs(aspects[:, None] - self.aspects[None, :])
+        best = np.argmax(similarity, axis=1)
+        scores = similarity[np.arange(len(best)), best]
+        labels = [self.labels[b] if s >= MIN_SCORE else 'necunoscut' for b, s in zip(best, scores)]
+        return labels, scores
+
+
+def crop_to_mask(image, mask):
+    """
+    Decupeaza cartonasul dupa bounding box-ul mastii (fundal alb in afara mastii)
+    """
+    ys, xs = np.nonzero(mask > 127)
+    if len(xs) == 0:
+        return image
+    y0, y1, x0, x1 = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+    crop = image[y0:y1, x0:x1].copy()
+    crop[mask[y0:y1, x0:x1] <= 127] = 255
+    return crop
+
+
+def benchmark_library_growth(index, sizes=(10, 100, 500, 1000), batch_size=64, repeats=20):
+    """
+    Throughput de clasificare pe masura ce biblioteca de sabloane creste
+    (sabloanele sunt replicate cu zgomot pentru a simula o biblioteca mare)
+    """
+    rng = np.random.default_rng(42)
+    queries = index.embeddings[rng.integers(0, len(index.labels), batch_size)]
+    query_aspects = index.aspects[rng.integers(0, len(index.labels), batch_size)]
+
+    print(f"\n=== BENCHMARK BIBLIOTECA SABLOANE (batch {batch_size}) ===")
+    print(f"{'Sabloane':>9} {'ms/batch':>10} {'us/comparatie':>14} {'carduri/s':>11}")
+    for size in sizes:
+        reps = rng.integers(0, len(index.labels), size)
+        embeddings = index.embeddings[reps] + rng.normal(0, 0.01, (size, index.embeddings.shape[1])).astype(np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        big_index = TemplateIndex([f"t{i}" for i in range(size)], embeddings, index.aspects[reps])
+
+        big_index.classify(queries, query_aspects)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            big_index.classify(queries, query_aspects)
+        batch_ms = (time.perf_counter() - start) / repeats * 1000
+        per_comparison_us = batch_ms * 1000 / (batch_size * size)
+        print(f"{size:>9} {batch_ms:>10.3f} {per_comparison_us:>14.4f} {batch_size / batch_ms * 1000:>11.0f}")
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    default_templates = os.path.join(script_dir, "app", "src", "main", "assets", "card_templates")
+
+    parser = argparse.ArgumentParser(description="Clasificare tip cartonas dupa sabloane")
+    parser.add_argument('--templates', default=default_templates)
+    parser.add_argument('--images', default=os.path.join(script_dir, "images"),
+                        help="Poze (sau cartonase deja decupate daca lipseste --masks)")
+    parser.add_argument('--masks', default=os.path.join(script_dir, "masks"))
+    parser.add_argument('--cache', default=os.path.join(script_dir, INDEX_NAME))
+    parser.add_argument('--benchmark', action='store_true', help="Benchmark cu biblioteca in crestere")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.templates):
+        print(f"EROARE: Directorul cu sabloane nu exista: {args.templates}")
+        exit(1)
+
+    index = TemplateIndex.load_or_build(args.templates, args.cache)
+    print(f"=== CLASIFICARE CARTONASE ===")
+    print(f"Sabloane: {', '.join(index.labels)}")
+
+    if os.path.exists(args.images):
+        files = sorted(f for f in os.listdir(args.images) if f.lower().endswith(('.jpg', '.jpeg', '.png')))
+        crops = []
+        for f in files:
+            image = cv2.imread(os.path.join(args.images, f))
+            mask_path = os.path.join(args.masks, os.path.splitext(f)[0] + '.png')
+            if os.path.exists(mask_path):
+                mask = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE)
+                if mask.shape != image.shape[:2]:
+                    mask = cv2.resize(mask, (image.shape[1], image.shape[0]))
+                image = crop_to_mask(image, mask)
+            crops.append(image)
+
+        if crops:
+            start = time.perf_counter()
+            embeddings, aspects = embed_images(crops)
+            labels, scores = index.classify(embeddings, aspects)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            for f, label, score in zip(files, labels, scores):
+                print(f"  {f:<30} -> {label:<12} (scor {score:.3f})")
+            print(f"\n{len(crops)} cartonase in {elapsed_ms:.1f} ms (embedding + clasificare)")
+
+    if args.benchmark:
+        benchmark_library_growth(index)
@@ -0,0 +1,145 @@
+"""
+Verificare paritate Keras <-> TFLite dupa conversie (Optimize.DEFAULT)
+Ruleaza acelasi batch prin ambele modele si raporteaza erorile si viteza
+"""
+
+import os
+import time
+import argparse
+import numpy as np
+from tensorflow import keras
+
+from tflite_inference import TFLiteSegmenter
+from mask_store import resolve_masks_dir
+
+# Praguri implicite peste care exportul este respins
+MAX_ABS_ERROR = 0.25
+MEAN_ABS_ERROR = 0.01
+MASK_DISAGREEMENT = 0.005  # 0.5% din pixeli
+
+
+def _time_call(fn, repeats):
+    """
+    Timp mediu (secunde) pe apel, dupa un apel de incalzire
+    """
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def check_parity(keras_model, images, tflite_path=None, tflite_content=None, batch_size=8,
+                 threshold=0.5, repeats=3, max_abs_error=MAX_ABS_ERROR,
+                 mean_abs_error=MEAN_ABS_ERROR, mask_disagreement=MASK_DISAGREEMENT):
+    """
+    Compara iesirea Keras cu iesirea TFLite pe acelasi batch de imagini
+
+    Args:
+        keras_model: Modelul Keras de referinta
+        images: Array (N, H, W, 3) float32 in [0, 1]
+        tflite_path / tflite_content: Modelul TFLite (fisier sau bytes)
+        batch_size: Batch-ul folosit de interpreter (tensorii se aloca o singura data)
+        threshold: Pragul de binarizare a mastii
+        repeats: De cate ori se repeta inferenta pentru masurarea vitezei
+
+    Returns:
+        dict cu metricile si cheia 'passed'
+    """
+    segmenter = TFLiteSegmenter(tflite_path, batch_size=batch_size, model_content=tflite_content)
+
+    keras_out = keras_model.predict(images, batch_size=batch_size, verbose=0)[..., 0]
+    tflite_out = segmenter.predict(images)
+
+    abs_diff = np.abs(keras_out - tflite_out)
+    disagreement = np.mean((keras_out > threshold) != (tflite_out > threshold))
+
+    keras_time = _time_call(lambda: keras_model.predict(images, batch_size=batch_size, verbose=0), repeats)
+    tflite_time = _time_call(lambda: segmenter.predict(images), repeats)
+
+    report = {
+        'images': len(images),
+        'max_abs_error': float(abs_diff.max()),
+        'mean_abs_error': float(abs_diff.mean()),
+        'mask_disagreement': float(disagreement),
+        'keras_ms_per_image': keras_time / len(images) * 1000,
+        'tflite_ms_per_image': tflite_time / len(images) * 1000,
+        'speed_ratio': keras_time / tflite_time if tflite_time > 0 else 0.0
+    }
+
+    failures = []
+    if report['max_abs_error'] > max_abs_error:
+        failures.append(f"max_abs_error {report['max_abs_error']:.4f} > {max_abs_error}")
+    if report['mean_abs_error'] > mean_abs_error:
+        failures.append(f"mean_abs_error {report['mean_abs_error']:.4f} > {mean_abs_error}")
+    if report['mask_disagreement'] > mask_disagreement:
+        failures.append(f"mask_disagreement {report['mask_disagreement']:.4%} > {mask_disagreement:.4%}")
+
+    report['failures'] = failures
+    report['passed'] = not failures
+    return report
+
+
+def print_parity_report(report):
+    """
+    Afiseaza raportul de paritate
+    """
+    print(f"\n=== PARITATE KERAS vs TFLITE ({report['images']} imagini) ===")
+    print(f"  Eroare absoluta maxima: {report['max_abs_error']:.5f}")
+    print(f"  Eroare absoluta medie: {report['mean_abs_error']:.5f}")
+    print(f"  Pixeli cu masca diferita: {report['mask_disagreement']:.4%}")
+    print(f"  Keras: {report['keras_ms_per_image']:.2f} ms/imagine")
+    print(f"  TFLite: {report['tflite_ms_per_image']:.2f} ms/imagine")
+    print(f"  Raport viteza (Keras/TFLite): {report['speed_ratio']:.2f}x")
+
+    if report['passed']:
+        print(f"  Paritate OK")
+    else:
+        print(f"  EROARE: Paritate esuata:")
+        for failure in report['failures']:
+            print(f"    - {failure}")
+
+
+if __name__ == "__main__":
+    from segmentation_metrics import CUSTOM_OBJECTS
+    from evaluate_tflite import list_dataset_pairs, load_batch
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Verificare paritate Keras <-> TFLite")
+    parser.add_argument('--keras', default=os.path.join(script_dir, "best_model_480.h5"))
+    parser.add_argument('--tflite', default=os.path.join(script_dir, "card_segmentation_480.tflite"))
+    parser.add_argument('--images', default=os.path.join(script_dir, "training_480", "images"))
+    parser.add_argument('--masks', default=os.path.join(script_dir, "training_480", "masks"))
+    parser.add_argument('--num-images', type=int, default=32)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--max-abs-error', type=float, default=MAX_ABS_ERROR)
+    parser.add_argument('--mean-abs-error', type=float, default=MEAN_ABS_ERROR)
+    parser.add_argument('--mask-disagreement', type=float, default=MASK_DISAGREEMENT)
+    args = parser.parse_args()
+
+    try:
+        args.masks = resolve_masks_dir(args.masks)
+    except IOError as e:
+        print(f"EROARE: {e}")
+        exit(1)
+
+    model = keras.models.load_model(
+        args.keras,
+        custom_objects=CUSTOM_OBJECTS
+    )
+    pairs = list_dataset_pairs(args.images, args.masks)[:args.num_images]
+    images, _ = load_batch(pairs, model.input_shape[1])
+
+    report = check_parity(
+        model, images,
+        tflite_path=args.tflite,
+        batch_size=args.batch_size,
+        max_abs_error=args.max_abs_error,
+        mean_abs_error=args.mean_abs_error,
+        mask_disagreement=args.mask_disagreement
+    )
+    print_parity_report(report)
+
+    if not report['passed']:
+        exit(1)
@@ -0,0 +1,261 @@
+"""
+Comprimare model UNet: magnitude pruning + weight clustering (tfmot)
+Fine-tuning pana la sparsitatea tinta, apoi export TFLite comprimat
+si raport marime / latenta / Dice fata de modelul original
+
+REQUIREMENTS:
+py -m pip install tensorflow-model-optimization
+"""
+
+import os
+import gzip
+import json
+import time
+import argparse
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+try:
+    import tensorflow_model_optimization as tfmot
+    from tensorflow_model_optimization.python.core.clustering.keras.experimental import cluster as experimental_cluster
+except ImportError:
+    tfmot = None
+
+from train_tflite_480_masks import load_dataset, load_pairs
+from segmentation_metrics import CUSTOM_OBJECTS, dice_loss, dice_coefficient
+from tflite_inference import TFLiteSegmenter
+from evaluate_tflite import iou_dice_batch, list_dataset_pairs
+from image_hashing import split_pairs_by_source
+from dataset_manifest import MANIFEST_NAME, manifest_is_current, manifest_pairs
+from mask_store import resolve_masks_dir
+
+BATCH_SIZE = 16
+LEARNING_RATE = 1e-4
+
+
+def measure_sparsity(model):
+    """
+    Procentul de ponderi zero din kernel-urile Conv2D
+    """
+    zeros = 0
+    total = 0
+    for layer in model.layers:
+        for weight in layer.weights:
+            if 'kernel' in weight.name:
+                values = weight.numpy()
+                zeros += np.count_nonzero(values == 0)
+                total += values.size
+    return zeros / total if total > 0 else 0.0
+
+
+class StopAtSparsity(keras.callbacks.Callback):
+    """
+    Opreste fine-tuning-ul cand sparsitatea tinta a fost atinsa
+    si programul de pruning s-a incheiat
+    """
+
+    def __init__(self, target_sparsity, end_step):
+        super().__init__()
+        self.target_sparsity = target_sparsity
+        self.end_step = end_step
+        self.step = 0
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.step += 1
+
+    def on_epoch_end(self, epoch, logs=None):
+        sparsity = measure_sparsity(self.model)
+        print(f"  Sparsitate dupa epoca {epoch + 1}: {sparsity:.2%}")
+        if self.step >= self.end_step and sparsity >= self.target_sparsity * 0.99:
+            print(f"  Sparsitatea tinta {self.target_sparsity:.0%} atinsa, stop.")
+            self.model.stop_training = True
+
+
+def prune_model(model, X_train, y_train, X_val, y_val, target_sparsity, pruning_epochs, max_epochs):
+    """
+    Fine-tuning cu prune_low_magnitude (PolynomialDecay 0 -> target_sparsity)
+    si eliminarea wrapper-elor de pruning la final
+    """
+    steps_per_epoch = int(np.ceil(len(X_train) / BATCH_SIZE))
+    end_step = steps_per_epoch * pruning_epochs
+
+    pruning_params = {
+        'pruning_schedule': tfmot.sparsity.keras.PolynomialDecay(
+            initial_sparsity=0.0,
+            final_sparsity=target_sparsity,
+            begin_step=0,
+            end_step=end_step
+        )
+    }
+    pruned = tfmot.sparsity.keras.prune_low_magnitude(model, **pruning_params)
+    pruned.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=LEARNING_RATE),
+        loss=dice_loss,
+        metrics=[dice_coefficient]
+    )
+
+    pruned.fit(
+        X_train, y_train,
+        validation_data=(X_val, y_val),
+        batch_size=BATCH_SIZE,
+        epochs=max_epochs,
+        callbacks=[
+            tfmot.sparsity.keras.UpdatePruningStep(),
+            StopAtSparsity(target_sparsity, end_step)
+        ],
+        verbose=1
+    )
+
+    return tfmot.sparsity.keras.strip_pruning(pruned)
+
+
+def cluster_model(model, X_train, y_train, X_val, y_val, num_clusters, epochs):
+    """
+    Weight clustering care pastreaza sparsitatea obtinuta la pruning
+    """
+    clustering_params = {
+        'number_of_clusters': num_clusters,
+        'cluster_centroids_init': tfmot.clustering.keras.CentroidInitialization.KMEANS_PLUS_PLUS,
+        'preserve_sparsity': True
+    }
+    clustered = experimental_cluster.cluster_weights(model, **clustering_params)
+    clustered.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=LEARNING_RATE),
+        loss=dice_loss,
+        metrics=[dice_coefficient]
+    )
+    clustered.fit(
+        X_train, y_train,
+        validation_data=(X_val, y_val),
+        batch_size=BATCH_SIZE,
+        epochs=epochs,
+        verbose=1
+    )
+    return tfmot.clustering.keras.strip_clustering(clustered)
+
+
+def convert_to_tflite(model, sparse=False):
+    """
+    Conversie TFLite cu optimizarile implicite (+ sparsitate daca e cazul)
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if sparse:
+        converter.optimizations.append(tf.lite.Optimize.EXPERIMENTAL_SPARSITY)
+    return converter.convert()
+
+
+def benchmark_tflite(tflite_model, X_val, y_val, batch_size=1, repeats=20):
+    """
+    Marime (bruta si gzip), latenta per imagine si Dice pe validare
+    """
+    segmenter = TFLiteSegmenter(model_content=tflite_model, batch_size=batch_size)
+
+    pred = segmenter.predict(X_val) > 0.5
+    _, dice = iou_dice_batch(pred, y_val[..., 0] > 0.5)
+
+    sample = X_val[:batch_size]
+    segmenter.predict(sample)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        segmenter.predict(sample)
+    latency_ms = (time.perf_counter() - start) / (repeats * batch_size) * 1000
+
+    return {
+        'size_kb': len(tflite_model) / 1024,
+        'gzip_kb': len(gzip.compress(tflite_model)) / 1024,
+        'latency_ms': latency_ms,
+        'dice': float(dice.mean())
+    }
+
+
+def print_tradeoff_table(results):
+    """
+    Tabel marime / latenta / Dice pentru fiecare varianta exportata
+    """
+    print(f"\n=== COMPROMIS MARIME / LATENTA / DICE ===")
+    print(f"{'Varianta':<20} {'Marime KB':>10} {'Gzip KB':>10} {'ms/img':>8} {'Dice':>8}")
+    for name, r in results.items():
+        print(f"{name:<20} {r['size_kb']:>10.1f} {r['gzip_kb']:>10.1f} {r['latency_ms']:>8.2f} {r['dice']:>8.4f}")
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Pruning + clustering pentru modelul UNet")
+    parser.add_argument('--model', default=os.path.join(script_dir, "best_model_480.h5"),
+                        help="Model Keras antrenat (create_unet_model sau build_unet)")
+    parser.add_argument('--images', default=os.path.join(script_dir, "training_480", "images"))
+    parser.add_argument('--masks', default=os.path.join(script_dir, "training_480", "masks"))
+    parser.add_argument('--target-sparsity', type=float, default=0.5)
+    parser.add_argument('--pruning-epochs', type=int, default=10,
+                        help="Epoci in care sparsitatea creste de la 0 la tinta")
+    parser.add_argument('--max-epochs', type=int, default=20)
+    parser.add_argument('--clusters', type=int, default=16, help="0 = fara clustering")
+    parser.add_argument('--cluster-epochs', type=int, default=3)
+    parser.add_argument('--output', default=os.path.join(script_dir, "card_segmentation_480_compressed.tflite"))
+    args = parser.parse_args()
+
+    try:
+        args.masks = resolve_masks_dir(args.masks)
+    except IOError as e:
+        print(f"EROARE: {e}")
+        exit(1)
+
+    if tfmot is None:
+        print(f"EROARE: tensorflow-model-optimization nu este instalat!")
+        print(f"Ruleaza: py -m pip install tensorflow-model-optimization")
+        exit(1)
+
+    if not os.path.exists(args.model):
+        print(f"EROARE: Modelul {args.model} nu exista!")
+        print(f"Ruleaza mai intai: py train_tflite_480_masks.py")
+        exit(1)
+
+    model = keras.models.load_model(
+        args.model,
+        custom_objects=CUSTOM_OBJECTS
+    )
+
+    # Acelasi split ca la antrenare (manifestul are split-ul cu duplicatele dHash grupate)
+    manifest_path = os.path.join(os.path.dirname(os.path.abspath(args.images)), MANIFEST_NAME)
+    if manifest_is_current(manifest_path):
+        X_train, y_train = load_pairs(manifest_pairs(manifest_path, 'train'))
+        X_val, y_val = load_pairs(manifest_pairs(manifest_path, 'val'))
+    else:
+        images, masks = load_dataset(args.images, args.masks)
+        train_idx, val_idx = split_pairs_by_source(list_dataset_pairs(args.images, args.masks))
+        X_train, X_val = images[train_idx], images[val_idx]
+        y_train, y_val = masks[train_idx], masks[val_idx]
+
+    results = {}
+    print(f"\n=== MODEL ORIGINAL ===")
+    results['original'] = benchmark_tflite(convert_to_tflite(model), X_val, y_val)
+
+    print(f"\n=== PRUNING (tinta {args.target_sparsity:.0%}) ===")
+    pruned = prune_model(
+        model, X_train, y_train, X_val, y_val,
+        args.target_sparsity, args.pruning_epochs, args.max_epochs
+    )
+    print(f"Sparsitate finala: {measure_sparsity(pruned):.2%}")
+    pruned_tflite = convert_to_tflite(pruned, sparse=True)
+    results['pruned'] = benchmark_tflite(pruned_tflite, X_val, y_val)
+    final_tflite = pruned_tflite
+
+    if args.clusters > 0:
+        print(f"\n=== CLUSTERING ({args.clusters} clustere) ===")
+        clustered = cluster_model(pruned, X_train, y_train, X_val, y_val, args.clusters, args.cluster_epochs)
+        clustered_tflite = convert_to_tflite(clustered, sparse=True)
+        results['pruned+clustered'] = benchmark_tflite(clustered_tflite, X_val, y_val)
+        final_tflite = clustered_tflite
+
+    print_tradeoff_table(results)
+
+    with open(args.output, 'wb') as f:
+        f.write(final_tflite)
+    with open(os.path.splitext(args.output)[0] + '_report.json', 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"\nModel comprimat salvat: {args.output}")
+    print(f"Verifica paritatea/Dice cu: py evaluate_tflite.py --model {os.path.basename(args.output)}")
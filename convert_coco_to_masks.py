@@ -8,6 +8,8 @@ import os
 import numpy as np
 from PIL import Image, ImageDraw
 
+from mask_store import MaskStoreWriter, is_store, open_store
+
 def create_mask_from_polygon(image_width, image_height, polygon_points):
     """
     Creează o mască PNG din coordonatele poligonului
@@ -77,9 +79,10 @@ def create_mask_from_polygon(image_width, image_height, polygon_points):
     
     return mask
 
-def process_single_json(json_path, images_dir, output_masks_dir):
+def process_single_json(json_path, images_dir, output_masks_dir, mask_store=None):
     """
     Procesează un singur fișier JSON și creează masca corespunzătoare
+    Cu mask_store (MaskStoreWriter) masca se adaugă în container în loc de PNG
     """
     print(f"\n📖 Procesare: {os.path.basename(json_path)}")
     
@@ -209,9 +212,13 @@ def process_single_json(json_path, images_dir, output_masks_dir):
         mask = create_mask_from_polygon(image_width, image_height, polygon)
         
         # Salvează masca (folosește numele JSON-ului ca bază pentru a evita conflicte)
-        mask_filename = json_name + '.png'
-        mask_path = os.path.join(output_masks_dir, mask_filename)
-        mask.save(mask_path)
+        if mask_store is not None:
+            mask_store.add(json_name, np.array(mask))
+            mask_filename = json_name
+        else:
+            mask_filename = json_name + '.png'
+            mask_path = os.path.join(output_masks_dir, mask_filename)
+            mask.save(mask_path)
         
         print(f"   ✅ Mască creată: {mask_filename}")
         return True
@@ -229,7 +236,12 @@ def verify_masks(images_dir, masks_dir):
     print("\n🔍 Verificare măști...")
     
     image_files = [f for f in os.listdir(images_dir) if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
-    mask_files = [f for f in os.listdir(masks_dir) if f.lower().endswith('.png')]
+    if is_store(masks_dir):
+        store = open_store(masks_dir)
+        mask_files = [sample_id + '.png' for sample_id in store.keys()]
+    else:
+        store = None
+        mask_files = [f for f in os.listdir(masks_dir) if f.lower().endswith('.png')]
     
     print(f"   Imagini: {len(image_files)}")
     print(f"   Măști: {len(mask_files)}")
@@ -248,9 +260,10 @@ def verify_masks(images_dir, masks_dir):
     
     # Verifică că măștile sunt corecte (alb pe negru)
     for mask_file in mask_files[:5]:  # Verifică primele 5
-        mask_path = os.path.join(masks_dir, mask_file)
-        mask = Image.open(mask_path)
-        mask_array = np.array(mask)
+        if store is not None:
+            mask_array = store.get_gray(os.path.splitext(mask_file)[0])
+        else:
+            mask_array = np.array(Image.open(os.path.join(masks_dir, mask_file)))
         
         unique_values = np.unique(mask_array)
         if len(unique_values) == 2 and 0 in unique_values and 255 in unique_values:
@@ -273,6 +286,7 @@ def main():
     JSON_DIR = "."  # Folderul cu JSON-urile (același cu scriptul)
     IMAGES_DIR = "images"  # Directorul cu imaginile originale
     OUTPUT_MASKS_DIR = "masks"  # Directorul unde se salvează măștile
+    MASK_STORE = None  # Ex: "masks.maskpack" - un singur container în loc de PNG-uri
     
     # Verifică că directorul cu imagini există
     if not os.path.exists(IMAGES_DIR):
@@ -281,7 +295,10 @@ def main():
         return
     
     # Creează directorul pentru măști
-    os.makedirs(OUTPUT_MASKS_DIR, exist_ok=True)
+    if MASK_STORE:
+        OUTPUT_MASKS_DIR = MASK_STORE
+    else:
+        os.makedirs(OUTPUT_MASKS_DIR, exist_ok=True)
     
     # Găsește toate JSON-urile
     json_files = [f for f in os.listdir(JSON_DIR) if f.lower().endswith('.json')]
@@ -297,10 +314,13 @@ def main():
     
     # Procesează fiecare JSON
     masks_created = 0
+    mask_store = MaskStoreWriter(MASK_STORE) if MASK_STORE else None
     for json_file in json_files:
         json_path = os.path.join(JSON_DIR, json_file)
-        if process_single_json(json_path, IMAGES_DIR, OUTPUT_MASKS_DIR):
+        if process_single_json(json_path, IMAGES_DIR, OUTPUT_MASKS_DIR, mask_store):
             masks_created += 1
+    if mask_store is not None:
+        mask_store.close()
     
     # Verifică rezultatele
     if masks_created > 0:
@@ -0,0 +1,221 @@
+"""
+Manifest SQLite pentru dataset (un singur index in loc de os.listdir repetat)
+Fiecare rand: imagine, masca, dimensiuni, dHash, imagine sursa, split, parametri augmentare
+"""
+
+import os
+import json
+import sqlite3
+import argparse
+import numpy as np
+from PIL import Image
+
+from image_hashing import compute_hashes, build_groups, group_train_val_split, source_image_id
+from image_loading import IMAGE_EXTENSIONS
+from mask_store import mask_location, split_ref, resolve_masks_dir
+
+MANIFEST_NAME = "manifest.sqlite"
+AUGMENTATIONS_NAME = "augmentations.json"  # Scris de augment_dataset.py
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    sample_id TEXT PRIMARY KEY,
+    image_path TEXT NOT NULL,
+    mask_path TEXT NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    dhash TEXT,
+    source TEXT,
+    split TEXT,
+    augmentation TEXT,
+    image_mtime REAL,
+    image_size INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_samples_split ON samples(split);
+CREATE INDEX IF NOT EXISTS idx_samples_source ON samples(source);
+"""
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def build_manifest(images_dir, masks_dir, db_path, test_size=0.2, random_state=42, workers=8):
+    """
+    Scaneaza directoarele o singura data si scrie/actualizeaza manifestul.
+    Imaginile nemodificate (acelasi mtime + marime) nu se mai decodeaza pentru hash.
+
+    Returns:
+        Numarul de esantioane din manifest
+    """
+    base_dir = os.path.dirname(os.path.abspath(db_path))
+    conn = _connect(db_path)
+
+    existing = {
+        row['sample_id']: row for row in conn.execute("SELECT * FROM samples")
+    }
+
+    augmentations = {}
+    augmentations_path = os.path.join(os.path.dirname(os.path.abspath(images_dir)), AUGMENTATIONS_NAME)
+    if os.path.exists(augmentations_path):
+        with open(augmentations_path, 'r', encoding='utf-8') as f:
+            augmentations = json.load(f)
+
+    samples = []
+    with os.scandir(images_dir) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if not entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            sample_id = os.path.splitext(entry.name)[0]
+            mask_path = mask_location(masks_dir, sample_id)
+            if mask_path is None:
+                print(f"ATENTIE: Masca lipseste pentru {entry.name}, skip...")
+                continue
+            stat = entry.stat()
+            samples.append({
+                'sample_id': sample_id,
+                'image_abs': entry.path,
+                'image_path': os.path.relpath(entry.path, base_dir),
+                'mask_path': os.path.relpath(mask_path, base_dir),
+                'image_mtime': stat.st_mtime,
+                'image_size': stat.st_size,
+                'source': source_image_id(entry.name),
+                'augmentation': augmentations.get(sample_id)
+            })
+
+    if not samples:
+        conn.close()
+        print(f"EROARE: Nu s-au gasit imagini cu masti in {images_dir}")
+        return 0
+
+    # Hash + dimensiuni doar pentru imaginile noi sau modificate
+    changed = [
+        s for s in samples
+        if s['sample_id'] not in existing
+        or existing[s['sample_id']]['image_mtime'] != s['image_mtime']
+        or existing[s['sample_id']]['image_size'] != s['image_size']
+    ]
+    if changed:
+        _, dhashes = compute_hashes([s['image_abs'] for s in changed], workers=workers)
+        for s, dhash in zip(changed, dhashes):
+            with Image.open(s['image_abs']) as img:
+                s['width'], s['height'] = img.size
+            s['dhash'] = f"{int(dhash):016x}"
+    for s in samples:
+        if 'dhash' not in s:
+            old = existing[s['sample_id']]
+            s['width'], s['height'], s['dhash'] = old['width'], old['height'], old['dhash']
+
+    # Split pe grupuri (sursa + duplicate dHash) recalculat pe tot setul
+    dhashes = np.array([int(s['dhash'], 16) for s in samples], dtype=np.uint64)
+    groups = build_groups([s['image_abs'] for s in samples], dhashes)
+    if len(np.unique(groups)) < 2:
+        print(f"ATENTIE: O singura imagine sursa, toate esantioanele raman in antrenare")
+        val_set = set()
+    else:
+        _, val_idx = group_train_val_split(groups, test_size, random_state)
+        val_set = set(val_idx.tolist())
+    for i, s in enumerate(samples):
+        s['split'] = 'val' if i in val_set else 'train'
+
+    with conn:
+        conn.execute("DELETE FROM samples")
+        conn.executemany(
+            "INSERT INTO samples VALUES (:sample_id, :image_path, :mask_path, :width, :height, "
+            ":dhash, :source, :split, :augmentation, :image_mtime, :image_size)",
+            [dict(s, augmentation=json.dumps(s['augmentation']) if s['augmentation'] else None)
+             for s in samples]
+        )
+    conn.close()
+
+    print(f"Manifest: {len(samples)} esantioane ({len(changed)} noi/modificate) -> {db_path}")
+    return len(samples)
+
+
+def load_manifest(db_path, split=None):
+    """
+    Citeste esantioanele din manifest (cai absolute)
+
+    Args:
+        split: 'train', 'val' sau None pentru toate
+    """
+    base_dir = os.path.dirname(os.path.abspath(db_path))
+    conn = _connect(db_path)
+    if split is None:
+        rows = conn.execute("SELECT * FROM samples ORDER BY sample_id").fetchall()
+    else:
+        rows = conn.execute("SELECT * FROM samples WHERE split = ? ORDER BY sample_id", (split,)).fetchall()
+    conn.close()
+
+    samples = []
+    for row in rows:
+        sample = dict(row)
+        sample['image_path'] = os.path.join(base_dir, sample['image_path'])
+        sample['mask_path'] = os.path.join(base_dir, sample['mask_path'])
+        sample['augmentation'] = json.loads(sample['augmentation']) if sample['augmentation'] else None
+        samples.append(sample)
+    return samples
+
+
+def manifest_is_current(db_path):
+    """
+    True daca manifestul exista si descrie setul de pe disc: fiecare imagine are aceeasi
+    marime si mtime ca la construire, iar masca ei exista inca. Un manifest depasit
+    (ex. augment_dataset.py rulat separat) se semnaleaza, iar apelantul revine la split_pairs_by_source.
+    """
+    if not os.path.exists(db_path):
+        return False
+
+    for s in load_manifest(db_path):
+        ref = split_ref(s['mask_path'])
+        mask_file = s['mask_path'] if ref is None else ref[0]
+        try:
+            stat = os.stat(s['image_path'])
+            current = (stat.st_mtime == s['image_mtime'] and stat.st_size == s['image_size']
+                       and os.path.exists(mask_file))
+        except OSError:
+            current = False
+        if not current:
+            print(f"ATENTIE: {db_path} nu mai corespunde setului de pe disc ({s['sample_id']}) - ignorat")
+            print(f"Reconstruieste-l cu: py dataset_manifest.py (pana atunci: split pe imaginea sursa)")
+            return False
+    return True
+
+
+def manifest_pairs(db_path, split=None):
+    """
+    Lista (image_path, mask_path), compatibila cu list_dataset_pairs
+    """
+    return [(s['image_path'], s['mask_path']) for s in load_manifest(db_path, split)]
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Construire manifest dataset")
+    parser.add_argument('--dataset', default=os.path.join(script_dir, "training_480"),
+                        help="Director cu images/ si masks/")
+    args = parser.parse_args()
+
+    images_dir = os.path.join(args.dataset, "images")
+    try:
+        masks_dir = resolve_masks_dir(os.path.join(args.dataset, "masks"))
+    except IOError as e:
+        print(f"EROARE: {e}")
+        exit(1)
+    if not os.path.exists(images_dir) or not os.path.exists(masks_dir):
+        print(f"EROARE: {args.dataset} trebuie sa contina images/ si masks/")
+        exit(1)
+
+    db_path = os.path.join(args.dataset, MANIFEST_NAME)
+    print(f"=== MANIFEST DATASET ===")
+    if build_manifest(images_dir, masks_dir, db_path) == 0:
+        exit(1)
+
+    train_count = len(load_manifest(db_path, 'train'))
+    val_count = len(load_manifest(db_path, 'val'))
+    print(f"  - Antrenare: {train_count}")
+    print(f"  - Validare: {val_count}")
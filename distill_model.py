@@ -0,0 +1,209 @@
+"""
+Distilare: UNet-ul mare (create_unet_model, best_model_480.h5) este profesorul inghetat,
+iar un UNet mic configurabil (studentul) invata din mastile lui "soft".
+Mastile profesorului se calculeaza o singura data si se salveaza pe disc ca uint8.
+Loss student = alpha * dice_loss(masca reala) + (1 - alpha) * BCE(masca profesor)
+"""
+
+import os
+import argparse
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+
+from train_tflite_480_masks import load_pairs, IMG_SIZE
+from segmentation_metrics import CUSTOM_OBJECTS, dice_loss, dice_coefficient
+from evaluate_tflite import list_dataset_pairs
+from image_hashing import split_pairs_by_source
+from dataset_manifest import MANIFEST_NAME, manifest_is_current, manifest_pairs
+from compress_model import convert_to_tflite, benchmark_tflite, print_tradeoff_table
+from hard_example_mining import sample_id
+from mask_store import resolve_masks_dir
+
+SOFT_MASKS_NAME = "teacher_soft_masks.npz"
+BATCH_SIZE = 16
+LEARNING_RATE = 0.001
+
+
+def create_student_model(input_shape=(IMG_SIZE, IMG_SIZE, 3), base_filters=8, depth=4):
+    """
+    UNet mic: base_filters canale la primul nivel, dublate la fiecare nivel (depth niveluri)
+    Ex: base_filters=8, depth=4 -> 8/16/32/64 + bottleneck 128 (fata de 32..512 la profesor)
+    """
+    inputs = keras.Input(shape=input_shape)
+    x = inputs
+    skips = []
+
+    for level in range(depth):
+        filters = base_filters * 2 ** level
+        x = layers.Conv2D(filters, (3, 3), activation='relu', padding='same')(x)
+        x = layers.Conv2D(filters, (3, 3), activation='relu', padding='same')(x)
+        skips.append(x)
+        x = layers.MaxPooling2D((2, 2))(x)
+
+    x = layers.Conv2D(base_filters * 2 ** depth, (3, 3), activation='relu', padding='same')(x)
+    x = layers.Conv2D(base_filters * 2 ** depth, (3, 3), activation='relu', padding='same')(x)
+
+    for level in reversed(range(depth)):
+        filters = base_filters * 2 ** level
+        x = layers.UpSampling2D((2, 2))(x)
+        x = layers.concatenate([x, skips[level]])
+        x = layers.Conv2D(filters, (3, 3), activation='relu', padding='same')(x)
+        x = layers.Conv2D(filters, (3, 3), activation='relu', padding='same')(x)
+
+    outputs = layers.Conv2D(1, (1, 1), activation='sigmoid')(x)
+    return keras.Model(inputs=[inputs], outputs=[outputs])
+
+
+def teacher_soft_masks(teacher_path, pairs, images, cache_path, batch_size=BATCH_SIZE):
+    """
+    Mastile profesorului (N, S, S) uint8, din cache daca profesorul si esantioanele nu s-au schimbat
+    """
+    ids = np.array([sample_id(p[0]) for p in pairs])
+    teacher_mtime = os.path.getmtime(teacher_path)
+
+    if os.path.exists(cache_path):
+        cached = np.load(cache_path, allow_pickle=False)
+        if float(cached['teacher_mtime']) == teacher_mtime and cached['soft'].shape[1] == images.shape[1]:
+            index = {sid: i for i, sid in enumerate(cached['ids'])}
+            if all(sid in index for sid in ids):
+                print(f"Masti profesor din cache: {cache_path}")
+                return cached['soft'][[index[sid] for sid in ids]]
+
+    print(f"Calculare masti profesor ({len(images)} imagini)...")
+    teacher = keras.models.load_model(
+        teacher_path,
+        custom_objects=CUSTOM_OBJECTS
+    )
+    teacher.trainable = False
+
+    soft = np.empty(images.shape[:3], dtype=np.uint8)
+    for start in range(0, len(images), batch_size):
+        prob = teacher.predict_on_batch(images[start:start + batch_size])
+        soft[start:start + batch_size] = np.round(np.asarray(prob)[..., 0] * 255).astype(np.uint8)
+
+    np.savez(cache_path, ids=ids, soft=soft, teacher_mtime=teacher_mtime)
+    print(f"Masti profesor salvate: {cache_path} ({soft.nbytes / (1024 * 1024):.1f} MB)")
+    return soft
+
+
+def pack_targets(masks, soft):
+    """
+    Tinta (N, S, S, 2): canalul 0 = masca reala, canalul 1 = probabilitatea profesorului
+    """
+    return np.concatenate([masks, soft[..., None].astype(np.float32) / 255.0], axis=-1)
+
+
+def make_distillation_loss(alpha):
+    def distillation_loss(y_true, y_pred):
+        hard = y_true[..., 0:1]
+        soft = y_true[..., 1:2]
+        soft_loss = tf.reduce_mean(keras.losses.binary_crossentropy(soft, y_pred))
+        return alpha * dice_loss(hard, y_pred) + (1 - alpha) * soft_loss
+    return distillation_loss
+
+
+def hard_dice(y_true, y_pred):
+    """
+    Dice fata de masca reala (canalul 0 al tintei impachetate)
+    """
+    return dice_coefficient(y_true[..., 0:1], y_pred)
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Distilare UNet mare -> UNet mic (student)")
+    parser.add_argument('--teacher', default=os.path.join(script_dir, "best_model_480.h5"))
+    parser.add_argument('--dataset', default=os.path.join(script_dir, "training_480"),
+                        help="Director cu images/ si masks/")
+    parser.add_argument('--base-filters', type=int, default=8)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--alpha', type=float, default=0.5, help="Ponderea dice_loss fata de loss-ul soft")
+    parser.add_argument('--epochs', type=int, default=60)
+    parser.add_argument('--output', default=os.path.join(script_dir, "card_segmentation_student.tflite"))
+    args = parser.parse_args()
+
+    if not os.path.exists(args.teacher):
+        print(f"EROARE: Modelul profesor {args.teacher} nu exista!")
+        print(f"Ruleaza mai intai: py train_tflite_480_masks.py")
+        exit(1)
+
+    images_dir = os.path.join(args.dataset, "images")
+    try:
+        masks_dir = resolve_masks_dir(os.path.join(args.dataset, "masks"))
+    except IOError as e:
+        print(f"EROARE: {e}")
+        exit(1)
+    if not os.path.exists(images_dir) or not os.path.exists(masks_dir):
+        print(f"EROARE: {args.dataset} trebuie sa contina images/ si masks/")
+        exit(1)
+
+    # Acelasi split ca la antrenarea profesorului
+    manifest_path = os.path.join(args.dataset, MANIFEST_NAME)
+    if manifest_is_current(manifest_path):
+        train_pairs = manifest_pairs(manifest_path, 'train')
+        val_pairs = manifest_pairs(manifest_path, 'val')
+    else:
+        pairs = list_dataset_pairs(images_dir, masks_dir)
+        train_idx, val_idx = split_pairs_by_source(pairs)
+        train_pairs = [pairs[i] for i in train_idx]
+        val_pairs = [pairs[i] for i in val_idx]
+
+    print(f"\n=== INCARCARE DATASET ===")
+    X_train, y_train = load_pairs(train_pairs)
+    X_val, y_val = load_pairs(val_pairs)
+    print(f"Antrenare: {len(X_train)}, validare: {len(X_val)}")
+
+    print(f"\n=== MASTI PROFESOR ===")
+    cache_path = os.path.join(args.dataset, SOFT_MASKS_NAME)
+    soft = teacher_soft_masks(
+        args.teacher, train_pairs + val_pairs, np.concatenate([X_train, X_val]), cache_path
+    )
+    t_train = pack_targets(y_train, soft[:len(X_train)])
+    t_val = pack_targets(y_val, soft[len(X_train):])
+
+    print(f"\n=== ANTRENARE STUDENT (base_filters={args.base_filters}, depth={args.depth}) ===")
+    student = create_student_model(base_filters=args.base_filters, depth=args.depth)
+    student.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=LEARNING_RATE),
+        loss=make_distillation_loss(args.alpha),
+        metrics=[hard_dice]
+    )
+    print(f"Parametri student: {student.count_params():,}")
+
+    student.fit(
+        X_train, t_train,
+        validation_data=(X_val, t_val),
+        batch_size=BATCH_SIZE,
+        epochs=args.epochs,
+        callbacks=[
+            keras.callbacks.EarlyStopping(
+                monitor='val_hard_dice', mode='max', patience=10, verbose=1, restore_best_weights=True
+            ),
+            keras.callbacks.ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=5, verbose=1, min_lr=1e-7)
+        ],
+        verbose=1
+    )
+
+    print(f"\n=== CONVERSIE SI COMPARATIE ===")
+    teacher = keras.models.load_model(
+        args.teacher,
+        custom_objects=CUSTOM_OBJECTS
+    )
+    print(f"Parametri profesor: {teacher.count_params():,}")
+
+    student_tflite = convert_to_tflite(student)
+    results = {
+        'profesor': benchmark_tflite(convert_to_tflite(teacher), X_val, y_val),
+        'student': benchmark_tflite(student_tflite, X_val, y_val)
+    }
+    print_tradeoff_table(results)
+    speedup = results['profesor']['latency_ms'] / max(results['student']['latency_ms'], 1e-9)
+    print(f"\nStudentul este {speedup:.1f}x mai rapid "
+          f"(Dice {results['student']['dice']:.4f} vs {results['profesor']['dice']:.4f})")
+
+    with open(args.output, 'wb') as f:
+        f.write(student_tflite)
+    print(f"Model student salvat: {args.output}")
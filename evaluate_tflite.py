@@ -0,0 +1,263 @@
+"""
+Evaluare model TFLite pe tot setul de validare
+Calculeaza per imagine IoU, Dice si Boundary F-score (vectorizat NumPy)
+si arata histograma + cele mai slabe cazuri
+"""
+
+import os
+import csv
+import json
+import argparse
+import numpy as np
+
+from tflite_inference import TFLiteSegmenter
+from image_loading import load_image_rgb, load_mask_gray, IMAGE_EXTENSIONS
+from mask_store import mask_location, resolve_masks_dir
+
+IMG_SIZE = 256
+LOAD_CHUNK = 256  # Cate imagini se decodeaza odata (memorie limitata pe seturi mari)
+
+
+def list_dataset_pairs(images_dir, masks_dir):
+    """
+    Returneaza lista (image_path, mask_path) pentru imaginile care au masca
+    masks_dir poate fi un director cu PNG-uri sau un container .maskpack
+    """
+    image_files = sorted([f for f in os.listdir(images_dir) if f.lower().endswith(IMAGE_EXTENSIONS)])
+
+    pairs = []
+    for img_file in image_files:
+        base_name = os.path.splitext(img_file)[0]
+        mask_path = mask_location(masks_dir, base_name)
+        if mask_path is not None:
+            pairs.append((os.path.join(images_dir, img_file), mask_path))
+    return pairs
+
+
+def load_batch(pairs, img_size=IMG_SIZE):
+    """
+    Decodeaza un grup de perechi la (N, S, S, 3) float32 si (N, S, S) bool
+    """
+    images = np.empty((len(pairs), img_size, img_size, 3), dtype=np.float32)
+    masks = np.empty((len(pairs), img_size, img_size), dtype=bool)
+
+    for i, (img_path, mask_path) in enumerate(pairs):
+        images[i] = load_image_rgb(img_path, img_size).astype(np.float32) / 255.0
+        masks[i] = load_mask_gray(mask_path, img_size) > 127
+
+    return images, masks
+
+
+def iou_dice_batch(pred, gt):
+    """
+    IoU si Dice per imagine pentru masti binare (N, H, W).
+    Imaginile unde ambele masti sunt goale primesc scor 1.0.
+    """
+    pred = pred.reshape(len(pred), -1)
+    gt = gt.reshape(len(gt), -1)
+
+    intersection = np.count_nonzero(pred & gt, axis=1).astype(np.float64)
+    pred_sum = np.count_nonzero(pred, axis=1)
+    gt_sum = np.count_nonzero(gt, axis=1)
+    union = pred_sum + gt_sum - intersection
+    total = pred_sum + gt_sum
+
+    iou = np.where(union > 0, intersection / np.maximum(union, 1), 1.0)
+    dice = np.where(total > 0, 2 * intersection / np.maximum(total, 1), 1.0)
+    return iou, dice
+
+
+def _shift_reduce(masks, op):
+    """
+    Aplica op (np.logical_and / np.logical_or) pe vecinatatea 3x3 a fiecarui pixel
+    """
+    padded = np.pad(masks, ((0, 0), (1, 1), (1, 1)), mode='edge')
+    h, w = masks.shape[1:]
+    result = masks.copy()
+    for dy in range(3):
+        for dx in range(3):
+            op(result, padded[:, dy:dy + h, dx:dx + w], out=result)
+    return result
+
+
+def extract_boundaries(masks):
+    """
+    Pixelii de margine: masca minus eroziunea ei (N, H, W) bool
+    """
+    return masks & ~_shift_reduce(masks, np.logical_and)
+
+
+def dilate(masks, radius):
+    """
+    Dilatare patrata cu raza data (N, H, W) bool
+    """
+    for _ in range(radius):
+        masks = _shift_reduce(masks, np.logical_or)
+    return masks
+
+
+def boundary_f_score_batch(pred, gt, tolerance=2):
+    """
+    Boundary F-score per imagine: precizia/recall-ul marginilor prezise
+    fata de marginile reale, cu toleranta de `tolerance` pixeli
+    """
+    pred_b = extract_boundaries(pred)
+    gt_b = extract_boundaries(gt)
+    pred_b_dil = dilate(pred_b, tolerance)
+    gt_b_dil = dilate(gt_b, tolerance)
+
+    n = len(pred)
+    pred_count = np.count_nonzero(pred_b.reshape(n, -1), axis=1)
+    gt_count = np.count_nonzero(gt_b.reshape(n, -1), axis=1)
+    precision_hits = np.count_nonzero((pred_b & gt_b_dil).reshape(n, -1), axis=1)
+    recall_hits = np.count_nonzero((gt_b & pred_b_dil).reshape(n, -1), axis=1)
+
+    precision = np.where(pred_count > 0, precision_hits / np.maximum(pred_count, 1), 0.0)
+    recall = np.where(gt_count > 0, recall_hits / np.maximum(gt_count, 1), 0.0)
+    denom = precision + recall
+    f_score = np.where(denom > 0, 2 * precision * recall / np.maximum(denom, 1e-12), 0.0)
+
+    # Ambele fara margini (masti goale) = potrivire perfecta
+    return np.where((pred_count == 0) & (gt_count == 0), 1.0, f_score)
+
+
+def evaluate_tflite(model_path, pairs, batch_size=16, threshold=0.5, tolerance=2, num_threads=None):
+    """
+    Ruleaza modelul TFLite pe toate perechile si calculeaza metricile per imagine
+
+    Returns:
+        dict cu 'files', 'iou', 'dice', 'boundary_f' (array-uri de lungime N)
+    """
+    segmenter = TFLiteSegmenter(model_path, batch_size=batch_size, num_threads=num_threads)
+    img_size = segmenter.input_height
+
+    ious, dices, bfs = [], [], []
+    for start in range(0, len(pairs), LOAD_CHUNK):
+        chunk = pairs[start:start + LOAD_CHUNK]
+        images, gt = load_batch(chunk, img_size)
+        pred = segmenter.predict(images) > threshold
+
+        iou, dice = iou_dice_batch(pred, gt)
+        ious.append(iou)
+        dices.append(dice)
+        bfs.append(boundary_f_score_batch(pred, gt, tolerance))
+        print(f"  Evaluat {min(start + LOAD_CHUNK, len(pairs))}/{len(pairs)}")
+
+    return {
+        'files': [os.path.basename(p[0]) for p in pairs],
+        'iou': np.concatenate(ious),
+        'dice': np.concatenate(dices),
+        'boundary_f': np.concatenate(bfs)
+    }
+
+
+def print_report(results, worst=10, bins=10):
+    """
+    Afiseaza rezumatul, histograma IoU si cele mai slabe imagini
+    """
+    print(f"\n=== REZULTATE ({len(results['files'])} imagini) ===")
+    for key in ('iou', 'dice', 'boundary_f'):
+        values = results[key]
+        print(f"  {key:<11} medie={values.mean():.4f}  mediana={np.median(values):.4f}  "
+              f"min={values.min():.4f}  p10={np.percentile(values, 10):.4f}")
+
+    print(f"\n=== HISTOGRAMA IoU ===")
+    counts, edges = np.histogram(results['iou'], bins=bins, range=(0.0, 1.0))
+    scale = 50 / max(counts.max(), 1)
+    for count, lo, hi in zip(counts, edges[:-1], edges[1:]):
+        print(f"  [{lo:.1f}-{hi:.1f}) {count:>6} {'#' * int(round(count * scale))}")
+
+    print(f"\n=== CELE MAI SLABE {worst} IMAGINI ===")
+    for idx in np.argsort(results['iou'])[:worst]:
+        print(f"  {results['files'][idx]:<40} IoU={results['iou'][idx]:.4f}  "
+              f"Dice={results['dice'][idx]:.4f}  BF={results['boundary_f'][idx]:.4f}")
+
+
+def save_report(results, output_path):
+    """
+    Salveaza metricile per imagine (CSV) si rezumatul (JSON alaturi)
+    """
+    with open(output_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['file', 'iou', 'dice', 'boundary_f'])
+        for row in zip(results['files'], results['iou'], results['dice'], results['boundary_f']):
+            writer.writerow([row[0]] + [f"{v:.6f}" for v in row[1:]])
+
+    summary_path = os.path.splitext(output_path)[0] + '_summary.json'
+    with open(summary_path, 'w') as f:
+        json.dump({
+            key: {
+                'mean': float(results[key].mean()),
+                'median': float(np.median(results[key])),
+                'min': float(results[key].min())
+            }
+            for key in ('iou', 'dice', 'boundary_f')
+        }, f, indent=2)
+
+    print(f"\nRaport salvat: {output_path}")
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Evaluare model TFLite pe setul de validare")
+    parser.add_argument('--model', default=os.path.join(script_dir, "card_segmentation_480.tflite"))
+    parser.add_argument('--images', default=os.path.join(script_dir, "training_480", "images"))
+    parser.add_argument('--masks', default=os.path.join(script_dir, "training_480", "masks"))
+    parser.add_argument('--manifest', default=None, help="manifest.sqlite (in loc de --images/--masks)")
+    parser.add_argument('--split', default='val', help="Split-ul din manifest (train/val)")
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--threshold', type=float, default=0.5)
+    parser.add_argument('--tolerance', type=int, default=2, help="Toleranta (pixeli) pentru Boundary F-score")
+    parser.add_argument('--worst', type=int, default=10)
+    parser.add_argument('--report', default=os.path.join(script_dir, "evaluation_report.csv"))
+    parser.add_argument('--min-dice', type=float, default=None, help="Respinge modelul sub acest Dice mediu")
+    parser.add_argument('--min-iou', type=float, default=None, help="Respinge modelul sub acest IoU mediu")
+    args = parser.parse_args()
+
+    try:
+        args.masks = resolve_masks_dir(args.masks)
+    except IOError as e:
+        print(f"EROARE: {e}")
+        exit(1)
+
+    if not os.path.exists(args.model):
+        print(f"EROARE: Modelul {args.model} nu exista!")
+        exit(1)
+
+    if args.manifest:
+        from dataset_manifest import manifest_pairs
+        pairs = manifest_pairs(args.manifest, args.split)
+    else:
+        pairs = list_dataset_pairs(args.images, args.masks)
+    if not pairs:
+        print(f"EROARE: Nu s-au gasit perechi imagine-masca in {args.images}")
+        exit(1)
+
+    print(f"=== EVALUARE TFLITE ===")
+    print(f"Model: {args.model}")
+    print(f"Imagini: {len(pairs)}")
+
+    results = evaluate_tflite(
+        args.model, pairs,
+        batch_size=args.batch_size,
+        threshold=args.threshold,
+        tolerance=args.tolerance,
+        num_threads=args.threads
+    )
+    print_report(results, worst=args.worst)
+    save_report(results, args.report)
+
+    failed = False
+    if args.min_dice is not None and results['dice'].mean() < args.min_dice:
+        print(f"RESPINS: Dice mediu {results['dice'].mean():.4f} < {args.min_dice}")
+        failed = True
+    if args.min_iou is not None and results['iou'].mean() < args.min_iou:
+        print(f"RESPINS: IoU mediu {results['iou'].mean():.4f} < {args.min_iou}")
+        failed = True
+
+    if failed:
+        exit(1)
+    if args.min_dice is not None or args.min_iou is not None:
+        print(f"\nModel acceptat.")
@@ -0,0 +1,161 @@
+"""
+Export multi-rezolutie pentru modelul UNet antrenat
+Produce modele TFLite la 160/192/256/320 + un model cu input dinamic
+si un tabel latenta vs Dice per rezolutie (pentru alegerea la runtime)
+"""
+
+import os
+import json
+import time
+import argparse
+import tensorflow as tf
+from tensorflow import keras
+
+from train_tflite_480_masks import create_unet_model
+from segmentation_metrics import CUSTOM_OBJECTS
+from tflite_inference import TFLiteSegmenter
+from evaluate_tflite import list_dataset_pairs, load_batch, iou_dice_batch
+from image_hashing import split_pairs_by_source
+from dataset_manifest import MANIFEST_NAME, manifest_is_current, manifest_pairs
+from mask_store import resolve_masks_dir
+
+RESOLUTIONS = [160, 192, 256, 320]
+
+
+def rebuild_with_input(trained_model, input_shape):
+    """
+    Reconstruieste UNet-ul cu alt input si copiaza ponderile
+    (convolutiile nu depind de rezolutie; latura trebuie sa fie multiplu de 16)
+    """
+    model = create_unet_model(input_shape=input_shape)
+    model.set_weights(trained_model.get_weights())
+    return model
+
+
+def convert_to_tflite(model):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float32]
+    return converter.convert()
+
+
+def benchmark_resolution(segmenter, val_pairs, resolution, repeats=20):
+    """
+    Latenta (batch 1) si Dice pe validare la rezolutia data
+    """
+    if segmenter.dynamic_size:
+        segmenter.resize_input(resolution, resolution)
+
+    images, gt = load_batch(val_pairs, resolution)
+    _, dice = iou_dice_batch(segmenter.predict(images) > 0.5, gt)
+
+    sample = images[:segmenter.batch_size]
+    segmenter.predict(sample)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        segmenter.predict(sample)
+    latency_ms = (time.perf_counter() - start) / (repeats * len(sample)) * 1000
+
+    return {
+        'resolution': resolution,
+        'latency_ms': latency_ms,
+        'dice': float(dice.mean())
+    }
+
+
+def pick_resolution(table, latency_budget_ms):
+    """
+    Alege rezolutia cu cel mai bun Dice care se incadreaza in bugetul de latenta.
+    Daca nicio rezolutie nu se incadreaza, o returneaza pe cea mai rapida.
+    """
+    within_budget = [row for row in table if row['latency_ms'] <= latency_budget_ms]
+    if not within_budget:
+        return min(table, key=lambda row: row['latency_ms'])['resolution']
+    return max(within_budget, key=lambda row: row['dice'])['resolution']
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Export TFLite multi-rezolutie")
+    parser.add_argument('--model', default=os.path.join(script_dir, "best_model_480.h5"))
+    parser.add_argument('--images', default=os.path.join(script_dir, "training_480", "images"))
+    parser.add_argument('--masks', default=os.path.join(script_dir, "training_480", "masks"))
+    parser.add_argument('--resolutions', type=int, nargs='+', default=RESOLUTIONS)
+    parser.add_argument('--output-dir', default=os.path.join(script_dir, "multi_resolution"))
+    parser.add_argument('--latency-budget', type=float, default=None,
+                        help="Buget latenta (ms) pentru a arata rezolutia recomandata")
+    args = parser.parse_args()
+
+    try:
+        args.masks = resolve_masks_dir(args.masks)
+    except IOError as e:
+        print(f"EROARE: {e}")
+        exit(1)
+
+    for res in args.resolutions:
+        if res % 16 != 0:
+            print(f"EROARE: Rezolutia {res} nu este multiplu de 16 (UNet are 4 nivele de pooling)")
+            exit(1)
+
+    if not os.path.exists(args.model):
+        print(f"EROARE: Modelul {args.model} nu exista!")
+        print(f"Ruleaza mai intai: py train_tflite_480_masks.py")
+        exit(1)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    trained = keras.models.load_model(
+        args.model,
+        custom_objects=CUSTOM_OBJECTS
+    )
+
+    # Acelasi split ca la antrenare: manifestul daca exista, altfel pe imaginea sursa
+    manifest_path = os.path.join(os.path.dirname(os.path.abspath(args.images)), MANIFEST_NAME)
+    if manifest_is_current(manifest_path):
+        val_pairs = manifest_pairs(manifest_path, 'val')
+    else:
+        pairs = list_dataset_pairs(args.images, args.masks)
+        _, val_idx = split_pairs_by_source(pairs)
+        val_pairs = [pairs[i] for i in val_idx]
+
+    print(f"\n=== EXPORT MODELE FIXE ===")
+    table = []
+    for res in args.resolutions:
+        tflite_model = convert_to_tflite(rebuild_with_input(trained, (res, res, 3)))
+        path = os.path.join(args.output_dir, f"card_segmentation_{res}.tflite")
+        with open(path, 'wb') as f:
+            f.write(tflite_model)
+
+        row = benchmark_resolution(TFLiteSegmenter(path, batch_size=1), val_pairs, res)
+        row['model'] = os.path.basename(path)
+        table.append(row)
+        print(f"  {res}x{res}: {row['latency_ms']:.2f} ms, Dice {row['dice']:.4f}")
+
+    print(f"\n=== EXPORT MODEL CU INPUT DINAMIC ===")
+    dynamic_tflite = convert_to_tflite(rebuild_with_input(trained, (None, None, 3)))
+    dynamic_path = os.path.join(args.output_dir, "card_segmentation_dynamic.tflite")
+    with open(dynamic_path, 'wb') as f:
+        f.write(dynamic_tflite)
+
+    dynamic_segmenter = TFLiteSegmenter(dynamic_path, batch_size=1, input_size=args.resolutions[0])
+    dynamic_table = [benchmark_resolution(dynamic_segmenter, val_pairs, res) for res in args.resolutions]
+    print(f"Model dinamic salvat: {dynamic_path} ({len(dynamic_tflite) / 1024:.2f} KB)")
+
+    print(f"\n=== LATENTA vs DICE PER REZOLUTIE ===")
+    print(f"{'Rezolutie':<10} {'Fix ms':>8} {'Dinamic ms':>11} {'Dice':>8}")
+    for fixed, dynamic in zip(table, dynamic_table):
+        res = fixed['resolution']
+        print(f"{res:<10} {fixed['latency_ms']:>8.2f} {dynamic['latency_ms']:>11.2f} {fixed['dice']:>8.4f}")
+
+    table_path = os.path.join(args.output_dir, "resolution_table.json")
+    with open(table_path, 'w') as f:
+        json.dump({'fixed': table, 'dynamic': dynamic_table}, f, indent=2)
+    print(f"\nTabel salvat: {table_path}")
+
+    if args.latency_budget is not None:
+        res = pick_resolution(table, args.latency_budget)
+        print(f"Rezolutie recomandata pentru {args.latency_budget:.0f} ms: {res}x{res}")
+
+    print(f"\nCopiaza resolution_table.json si modelul ales in app/src/main/assets/models/")
+    print(f"(TFLiteSegmentationManager citeste dimensiunea de input direct din model)")
@@ -0,0 +1,160 @@
+"""
+Hard-example mining: scorul IoU al fiecarui esantion de antrenare cu modelul curent
+(inferenta TFLite in batch-uri) -> ponderi per esantion salvate pe disc.
+La urmatoarea antrenare, train_tflite_480_masks.py esantioneaza batch-urile
+proportional cu ponderile (reflexii, gauri, fundaluri aglomerate apar mai des).
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+from tensorflow import keras
+
+from evaluate_tflite import evaluate_tflite, list_dataset_pairs
+from dataset_manifest import MANIFEST_NAME, manifest_is_current, manifest_pairs
+from image_hashing import split_pairs_by_source
+from mask_store import resolve_masks_dir
+
+WEIGHTS_NAME = "hard_examples.json"
+MAX_WEIGHT = 5.0  # Cel mai greu esantion apare de cel mult 5x mai des decat unul usor
+
+
+def sample_id(image_path):
+    return os.path.splitext(os.path.basename(image_path))[0]
+
+
+def compute_weights(iou, max_weight=MAX_WEIGHT):
+    """
+    Pondere liniara in (1 - IoU): 1.0 pentru IoU perfect, max_weight pentru cel mai slab
+    """
+    hardness = 1.0 - np.asarray(iou, dtype=np.float64)
+    if hardness.max() <= 0:
+        return np.ones_like(hardness)
+    return 1.0 + (max_weight - 1.0) * hardness / hardness.max()
+
+
+def model_signature(model_path):
+    """
+    (mtime, marime) ale modelului cu care s-au calculat ponderile
+    """
+    stat = os.stat(model_path)
+    return {'path': os.path.basename(model_path), 'mtime': stat.st_mtime, 'size': stat.st_size}
+
+
+def save_weights(pairs, iou, weights, output_path, model_path):
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'model': model_signature(model_path),
+            'samples': {
+                sample_id(img_path): {'iou': round(float(i), 6), 'weight': round(float(w), 6)}
+                for (img_path, _), i, w in zip(pairs, iou, weights)
+            },
+        }, f, indent=2)
+
+
+def load_weights(weights_path, pairs, model_path):
+    """
+    Ponderile pentru perechile date, sau None daca fisierul e depasit:
+    modelul s-a schimbat de la scorare (alta antrenare) sau setul de antrenare
+    nu mai are aceleasi esantioane (re-augmentare, alt split)
+    """
+    with open(weights_path, 'r', encoding='utf-8') as f:
+        stored = json.load(f)
+
+    if 'samples' not in stored or 'model' not in stored:
+        print(f"ATENTIE: {weights_path} are formatul vechi (fara model/esantioane) - ignorat")
+        return None
+    if not os.path.exists(model_path) or model_signature(model_path) != stored['model']:
+        print(f"ATENTIE: {weights_path} a fost calculat cu alt model decat {model_path} - ignorat")
+        print(f"Recalculeaza cu: py hard_example_mining.py")
+        return None
+    if set(stored['samples']) != {sample_id(p[0]) for p in pairs}:
+        print(f"ATENTIE: {weights_path} nu corespunde setului de antrenare curent - ignorat")
+        print(f"Recalculeaza cu: py hard_example_mining.py")
+        return None
+
+    return np.array([stored['samples'][sample_id(p[0])]['weight'] for p in pairs], dtype=np.float64)
+
+
+class WeightedSampler(keras.utils.Sequence):
+    """
+    Batch-uri esantionate cu inlocuire, cu probabilitate proportionala cu ponderea.
+    O epoca are acelasi numar de pasi ca parcurgerea uniforma a setului.
+    """
+
+    def __init__(self, images, masks, weights, batch_size, seed=42):
+        super().__init__()
+        self.images = images
+        self.masks = masks
+        self.probabilities = np.asarray(weights, dtype=np.float64) / np.sum(weights)
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        self._indices = None
+        self.on_epoch_end()
+
+    def __len__(self):
+        return int(np.ceil(len(self.images) / self.batch_size))
+
+    def __getitem__(self, idx):
+        batch = self._indices[idx * self.batch_size:(idx + 1) * self.batch_size]
+        return self.images[batch], self.masks[batch]
+
+    def on_epoch_end(self):
+        self._indices = self.rng.choice(
+            len(self.images), size=len(self) * self.batch_size, p=self.probabilities
+        )
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Ponderi hard-example pentru antrenare")
+    parser.add_argument('--model', default=os.path.join(script_dir, "card_segmentation_480.tflite"))
+    parser.add_argument('--dataset', default=os.path.join(script_dir, "training_480"),
+                        help="Director cu images/ si masks/")
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--threads', type=int, default=None, help="Thread-uri TFLite")
+    parser.add_argument('--max-weight', type=float, default=MAX_WEIGHT)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"EROARE: Modelul {args.model} nu exista!")
+        exit(1)
+
+    images_dir = os.path.join(args.dataset, "images")
+    try:
+        masks_dir = resolve_masks_dir(os.path.join(args.dataset, "masks"))
+    except IOError as e:
+        print(f"EROARE: {e}")
+        exit(1)
+    if not os.path.exists(images_dir) or not os.path.exists(masks_dir):
+        print(f"EROARE: {args.dataset} trebuie sa contina images/ si masks/")
+        exit(1)
+
+    # Doar split-ul de antrenare (manifest sau acelasi split pe sursa ca antrenarea);
+    # ponderile pe validare ar scurge informatie din val in esantionare
+    manifest_path = os.path.join(args.dataset, MANIFEST_NAME)
+    if manifest_is_current(manifest_path):
+        pairs = manifest_pairs(manifest_path, 'train')
+    else:
+        pairs = list_dataset_pairs(images_dir, masks_dir)
+        train_idx, _ = split_pairs_by_source(pairs)
+        pairs = [pairs[i] for i in train_idx]
+
+    print(f"=== HARD-EXAMPLE MINING ===")
+    print(f"Model: {args.model}")
+    print(f"Esantioane: {len(pairs)}")
+
+    results = evaluate_tflite(args.model, pairs, batch_size=args.batch_size, num_threads=args.threads)
+    weights = compute_weights(results['iou'], args.max_weight)
+
+    output_path = os.path.join(args.dataset, WEIGHTS_NAME)
+    save_weights(pairs, results['iou'], weights, output_path, args.model)
+
+    effective = weights / weights.sum()
+    hard = results['iou'] < np.percentile(results['iou'], 10)
+    print(f"\nIoU mediu: {results['iou'].mean():.4f}")
+    print(f"Cele mai grele 10% din esantioane primesc {effective[hard].sum() * 100:.1f}% din batch-uri")
+    print(f"Ponderi salvate: {output_path}")
+    print(f"Urmatoarea rulare a train_tflite_480_masks.py le foloseste automat")
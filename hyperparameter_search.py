@@ -0,0 +1,387 @@
+"""
+Cautare automata de hiperparametri si arhitectura (local, in stilul Optuna)
+
+- Fiecare trial antreneaza un UNet configurabil (latime, adancime, rezolutie, batch, LR, loss)
+  intr-un pool de procese; dataset-ul se decodeaza o singura data per rezolutie
+  si se partajeaza prin fisiere .npy mapate in memorie
+- Trial-urile slabe se opresc devreme: Dice de validare sub mediana celorlalte
+  trial-uri la aceeasi epoca (dupa PRUNE_WARMUP epoci)
+- Obiectiv comun: Dice TFLite pe validare si latenta TFLite masurata
+  (latenta se masoara la final, serial, in procesul principal: masurata in timp ce alte
+  trial-uri antreneaza ar include concurenta pe procesor; in timpul cautarii
+  frontul foloseste costul estimat parametri x pixeli)
+- Rezultatul: frontul Pareto (Dice maxim, latenta minima), modelele .tflite sunt deja exportate
+
+Esantionare: primele trial-uri aleator, apoi mutatii ale punctelor de pe frontul Pareto.
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+from tensorflow import keras
+
+from image_loading import load_image_rgb, load_mask_gray
+from evaluate_tflite import list_dataset_pairs
+from image_hashing import split_pairs_by_source
+from dataset_manifest import MANIFEST_NAME, manifest_is_current, manifest_pairs
+from mask_store import split_ref, resolve_masks_dir
+
+SEARCH_SPACE = {
+    'img_size': [192, 224, 256, 320],
+    'batch_size': [4, 8, 16],
+    'learning_rate': [1e-4, 3e-4, 1e-3, 3e-3],
+    'base_filters': [8, 12, 16, 24, 32],
+    'depth': [3, 4, 5],
+    'loss': ['dice', 'bce_dice']
+}
+PRUNE_WARMUP = 3       # Epoci inainte ca un trial sa poata fi oprit
+PRUNE_MIN_TRIALS = 3   # Cate alte trial-uri trebuie sa fi raportat epoca respectiva
+RANDOM_TRIALS = 6      # Trial-uri aleatoare inainte de mutatiile frontului Pareto
+CACHE_ARRAYS = ('X_train', 'y_train', 'X_val', 'y_val')
+CACHE_KEY_NAME = "dataset_key.txt"
+EVAL_CHUNK = 64        # Imagini de validare normalizate odata la evaluarea TFLite
+LATENCY_REPEATS = 20
+
+
+def dataset_key(train_pairs, val_pairs):
+    """
+    Cheia cache-ului: caile si mtime-urile imaginilor si mastilor din fiecare split
+    (re-augmentare, alt manifest sau alt split -> alt cache)
+    """
+    digest = hashlib.sha256()
+    for split, pairs in (('train', train_pairs), ('val', val_pairs)):
+        digest.update(split.encode('utf-8'))
+        for img_path, mask_path in pairs:
+            ref = split_ref(mask_path)
+            mask_file = ref[0] if ref is not None else mask_path
+            digest.update(f"{img_path}|{os.path.getmtime(img_path)}|{mask_path}|{os.path.getmtime(mask_file)}\n"
+                          .encode('utf-8'))
+    return digest.hexdigest()
+
+
+def build_dataset_cache(train_pairs, val_pairs, img_size, cache_dir):
+    """
+    Decodeaza o singura data imaginile (uint8) si mastile la img_size, partajate de toate trial-urile
+    (cate un .npy per array, citit cu mmap_mode de fiecare proces).
+    Cache-ul se refoloseste doar daca a fost construit din aceleasi fisiere (dataset_key).
+    """
+    key = dataset_key(train_pairs, val_pairs)
+    key_path = os.path.join(cache_dir, CACHE_KEY_NAME)
+    if os.path.exists(key_path) and all(os.path.exists(os.path.join(cache_dir, f"{name}.npy")) for name in CACHE_ARRAYS):
+        with open(key_path, 'r') as f:
+            if f.read().strip() == key:
+                return cache_dir
+
+    def load(pairs):
+        images = np.stack([load_image_rgb(p[0], img_size) for p in pairs])
+        masks = np.stack([load_mask_gray(p[1], img_size) > 127 for p in pairs])
+        return images, masks
+
+    os.makedirs(cache_dir, exist_ok=True)
+    if os.path.exists(key_path):
+        os.remove(key_path)
+    X_train, y_train = load(train_pairs)
+    X_val, y_val = load(val_pairs)
+    for name, array in zip(CACHE_ARRAYS, (X_train, y_train, X_val, y_val)):
+        np.save(os.path.join(cache_dir, f"{name}.npy"), array)
+    # Cheia se scrie ultima: un cache intrerupt la jumatate nu e refolosit
+    with open(key_path, 'w') as f:
+        f.write(key)
+    print(f"  Cache dataset {img_size}x{img_size}: {cache_dir}")
+    return cache_dir
+
+
+class NormalizedBatches(keras.utils.Sequence):
+    """
+    Batch-uri float32 din array-urile uint8 / bool mapate in memorie:
+    se normalizeaza doar batch-ul curent, nu tot setul (memoria ramane ~ un batch per trial)
+    """
+
+    def __init__(self, images, masks, batch_size, shuffle=False, seed=0):
+        super().__init__()
+        self.images = images
+        self.masks = masks
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+        self.order = np.arange(len(images))
+        self.on_epoch_end()
+
+    def __len__(self):
+        return int(np.ceil(len(self.images) / self.batch_size))
+
+    def __getitem__(self, idx):
+        # Indici sortati: citiri in ordine din fisierul mapat
+        batch = np.sort(self.order[idx * self.batch_size:(idx + 1) * self.batch_size])
+        return (self.images[batch].astype(np.float32) / 255.0,
+                self.masks[batch][..., None].astype(np.float32))
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.order)
+
+
+class MedianPruningCallback(keras.callbacks.Callback):
+    """
+    Opreste trial-ul daca Dice de validare e sub mediana celorlalte trial-uri la aceeasi epoca.
+    Istoricul se partajeaza intre procese printr-un dict Manager.
+    """
+
+    def __init__(self, trial_id, shared_history):
+        super().__init__()
+        self.trial_id = trial_id
+        self.shared_history = shared_history
+        self.pruned_at = None
+
+    def on_epoch_end(self, epoch, logs=None):
+        dice = float(logs.get('val_dice_coefficient', 0.0))
+        self.shared_history[self.trial_id] = list(self.shared_history.get(self.trial_id, [])) + [dice]
+
+        if epoch + 1 < PRUNE_WARMUP:
+            return
+        others = [
+            history[epoch] for trial_id, history in self.shared_history.items()
+            if trial_id != self.trial_id and len(history) > epoch
+        ]
+        if len(others) >= PRUNE_MIN_TRIALS and dice < np.median(others):
+            print(f"  [trial {self.trial_id}] oprit la epoca {epoch + 1} "
+                  f"(Dice {dice:.4f} < mediana {np.median(others):.4f})")
+            self.pruned_at = epoch + 1
+            self.model.stop_training = True
+
+
+def run_trial(trial_id, params, cache_dir, epochs, shared_history, output_dir):
+    """
+    Antreneaza, exporta si evalueaza (Dice TFLite) un trial (ruleaza intr-un proces separat).
+    Latenta nu se masoara aici: vezi measure_latency.
+    """
+    import tensorflow as tf
+    from distill_model import create_student_model
+    from segmentation_metrics import dice_coefficient, dice_loss, bce_dice_loss
+    from compress_model import convert_to_tflite
+
+    for gpu in tf.config.list_physical_devices('GPU'):
+        tf.config.experimental.set_memory_growth(gpu, True)
+    tf.random.set_seed(trial_id)
+
+    data = {name: np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode='r') for name in CACHE_ARRAYS}
+
+    size = params['img_size']
+    model = create_student_model((size, size, 3), params['base_filters'], params['depth'])
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=params['learning_rate']),
+        loss={'dice': dice_loss, 'bce_dice': bce_dice_loss}[params['loss']],
+        metrics=[dice_coefficient]
+    )
+
+    pruning = MedianPruningCallback(trial_id, shared_history)
+    start = time.perf_counter()
+    model.fit(
+        NormalizedBatches(data['X_train'], data['y_train'], params['batch_size'], shuffle=True, seed=trial_id),
+        validation_data=NormalizedBatches(data['X_val'], data['y_val'], params['batch_size']),
+        epochs=epochs,
+        callbacks=[pruning],
+        verbose=0
+    )
+    train_seconds = time.perf_counter() - start
+
+    result = {
+        'trial': trial_id,
+        'params': params,
+        'parameters': int(model.count_params()),
+        'cost_proxy': int(model.count_params()) * size * size / 1e9,
+        'train_seconds': train_seconds,
+        'pruned_at': pruning.pruned_at
+    }
+    if pruning.pruned_at is None:
+        tflite_model = convert_to_tflite(model)
+        result.update({
+            'size_kb': len(tflite_model) / 1024,
+            'gzip_kb': len(gzip.compress(tflite_model)) / 1024,
+            'dice': tflite_dice(tflite_model, data['X_val'], data['y_val'])
+        })
+        result['tflite_path'] = os.path.join(output_dir, f"trial_{trial_id:03d}.tflite")
+        with open(result['tflite_path'], 'wb') as f:
+            f.write(tflite_model)
+    return result
+
+
+def tflite_dice(tflite_model, X_val, y_val):
+    """
+    Dice mediu al modelului TFLite pe validare, normalizand cate EVAL_CHUNK imagini odata
+    """
+    from tflite_inference import TFLiteSegmenter
+    from evaluate_tflite import iou_dice_batch
+
+    segmenter = TFLiteSegmenter(model_content=tflite_model, batch_size=8)
+    dices = []
+    for start in range(0, len(X_val), EVAL_CHUNK):
+        pred = segmenter.predict(X_val[start:start + EVAL_CHUNK].astype(np.float32) / 255.0) > 0.5
+        _, dice = iou_dice_batch(pred, np.asarray(y_val[start:start + EVAL_CHUNK]))
+        dices.append(dice)
+    return float(np.concatenate(dices).mean())
+
+
+def measure_latency(tflite_path, sample, repeats=LATENCY_REPEATS):
+    """
+    Latenta per imagine (ms, batch 1). Se apeleaza serial, dupa ce toate trial-urile s-au terminat.
+    """
+    from tflite_inference import TFLiteSegmenter
+
+    segmenter = TFLiteSegmenter(tflite_path, batch_size=1)
+    segmenter.predict(sample)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        segmenter.predict(sample)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def pareto_front(results, cost='latency_ms'):
+    """
+    Trial-urile nedominate: niciun alt trial nu are Dice mai mare si cost (latenta) mai mic
+    """
+    finished = [r for r in results if r.get('pruned_at') is None and 'dice' in r and cost in r]
+    front = []
+    for r in finished:
+        dominated = any(
+            o['dice'] >= r['dice'] and o[cost] <= r[cost]
+            and (o['dice'] > r['dice'] or o[cost] < r[cost])
+            for o in finished
+        )
+        if not dominated:
+            front.append(r)
+    return sorted(front, key=lambda r: r[cost])
+
+
+def suggest(rng, results):
+    """
+    Parametri noi: aleator la inceput, apoi mutatia unui parametru dintr-un punct Pareto
+    (frontul pe costul estimat; latenta reala se masoara abia la final)
+    """
+    front = pareto_front(results, cost='cost_proxy')
+    if len(results) < RANDOM_TRIALS or not front or rng.random() < 0.25:
+        return {key: values[rng.integers(len(values))] for key, values in SEARCH_SPACE.items()}
+
+    params = dict(front[rng.integers(len(front))]['params'])
+    key = list(SEARCH_SPACE)[rng.integers(len(SEARCH_SPACE))]
+    values = SEARCH_SPACE[key]
+    idx = values.index(params[key]) + rng.choice([-1, 1])
+    params[key] = values[int(np.clip(idx, 0, len(values) - 1))]
+    return params
+
+
+def _to_builtin(params):
+    return {k: v.item() if hasattr(v, 'item') else v for k, v in params.items()}
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Cautare hiperparametri + arhitectura UNet")
+    parser.add_argument('--dataset', default=os.path.join(script_dir, "training_480"),
+                        help="Director cu images/ si masks/")
+    parser.add_argument('--trials', type=int, default=20)
+    parser.add_argument('--epochs', type=int, default=15, help="Epoci maxime per trial")
+    parser.add_argument('--workers', type=int, default=2, help="Trial-uri in paralel")
+    parser.add_argument('--output', default=os.path.join(script_dir, "search_results"))
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    images_dir = os.path.join(args.dataset, "images")
+    try:
+        masks_dir = resolve_masks_dir(os.path.join(args.dataset, "masks"))
+    except IOError as e:
+        print(f"EROARE: {e}")
+        exit(1)
+    if not os.path.exists(images_dir) or not os.path.exists(masks_dir):
+        print(f"EROARE: {args.dataset} trebuie sa contina images/ si masks/")
+        exit(1)
+
+    os.makedirs(args.output, exist_ok=True)
+    manifest_path = os.path.join(args.dataset, MANIFEST_NAME)
+    if manifest_is_current(manifest_path):
+        train_pairs = manifest_pairs(manifest_path, 'train')
+        val_pairs = manifest_pairs(manifest_path, 'val')
+    else:
+        pairs = list_dataset_pairs(images_dir, masks_dir)
+        train_idx, val_idx = split_pairs_by_source(pairs)
+        train_pairs = [pairs[i] for i in train_idx]
+        val_pairs = [pairs[i] for i in val_idx]
+
+    print(f"=== CAUTARE HIPERPARAMETRI ===")
+    print(f"Antrenare: {len(train_pairs)}, validare: {len(val_pairs)}")
+    print(f"Trial-uri: {args.trials}, epoci maxime: {args.epochs}, in paralel: {args.workers}")
+
+    print(f"\n=== CACHE DATASET ===")
+    caches = {
+        size: build_dataset_cache(
+            train_pairs, val_pairs, size, os.path.join(args.output, f"dataset_{size}")
+        )
+        for size in SEARCH_SPACE['img_size']
+    }
+
+    rng = np.random.default_rng(args.seed)
+    results = []
+    results_path = os.path.join(args.output, "trials.json")
+
+    # spawn: fiecare trial are propriul runtime TensorFlow (la fel pe Windows si Linux)
+    context = multiprocessing.get_context('spawn')
+    with context.Manager() as manager, ProcessPoolExecutor(args.workers, mp_context=context) as pool:
+        shared_history = manager.dict()
+        running = {}
+        next_trial = 0
+
+        while next_trial < args.trials or running:
+            while next_trial < args.trials and len(running) < args.workers:
+                params = _to_builtin(suggest(rng, results))
+                print(f"\n[trial {next_trial}] {params}")
+                future = pool.submit(
+                    run_trial, next_trial, params, caches[params['img_size']],
+                    args.epochs, shared_history, args.output
+                )
+                running[future] = next_trial
+                next_trial += 1
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                trial_id = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"[trial {trial_id}] EROARE: {e}")
+                    continue
+                results.append(result)
+                if result['pruned_at'] is None:
+                    print(f"[trial {trial_id}] Dice={result['dice']:.4f}  ({result['train_seconds']:.0f}s)")
+
+                with open(results_path, 'w') as f:
+                    json.dump(results, f, indent=2)
+
+    # Latenta: serial, cu pool-ul inchis (niciun trial nu mai concureaza pe procesor)
+    print(f"\n=== LATENTA TFLITE ===")
+    for r in results:
+        if r['pruned_at'] is None:
+            X_val = np.load(os.path.join(caches[r['params']['img_size']], "X_val.npy"), mmap_mode='r')
+            r['latency_ms'] = measure_latency(r['tflite_path'], X_val[:1].astype(np.float32) / 255.0)
+            print(f"[trial {r['trial']}] {r['latency_ms']:.2f} ms/img")
+    with open(results_path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    front = pareto_front(results)
+    pruned = sum(1 for r in results if r['pruned_at'] is not None)
+    print(f"\n=== FRONT PARETO ({len(front)} modele, {pruned} trial-uri oprite devreme) ===")
+    print(f"{'Trial':>6} {'Dice':>8} {'ms/img':>8} {'KB':>8} {'Rez':>5} {'Filtre':>7} {'Adanc':>6}  Model")
+    for r in front:
+        p = r['params']
+        print(f"{r['trial']:>6} {r['dice']:>8.4f} {r['latency_ms']:>8.2f} {r['size_kb']:>8.1f} "
+              f"{p['img_size']:>5} {p['base_filters']:>7} {p['depth']:>6}  {os.path.basename(r['tflite_path'])}")
+
+    with open(os.path.join(args.output, "pareto.json"), 'w') as f:
+        json.dump(front, f, indent=2)
+    print(f"\nRezultate: {results_path}")
@@ -0,0 +1,242 @@
+"""
+Hash-uri perceptuale (aHash / dHash) pentru dataset + detectare duplicate
+si split pe grupuri (fara scurgeri de augmentari intre antrenare si validare)
+"""
+
+import os
+import re
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cv2
+from sklearn.model_selection import GroupShuffleSplit
+
+HASH_SIZE = 8  # 8x8 = 64 biti
+DEFAULT_MAX_DISTANCE = 6
+
+# Sufixele puse de augment_dataset.py: <nume>_orig.jpg / <nume>_aug3.jpg
+_AUGMENT_SUFFIX = re.compile(r'_(orig|aug\d+)$')
+
+
+def source_image_id(filename):
+    """
+    Numele imaginii originale din care provine o imagine augmentata
+    """
+    base_name = os.path.splitext(os.path.basename(filename))[0]
+    return _AUGMENT_SUFFIX.sub('', base_name)
+
+
+def _load_thumbnail(path):
+    """
+    Decodeaza redus (1/8, DCT) si micsoreaza la 9x8 pentru hash
+    """
+    img = cv2.imread(path, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if img is None:
+        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    return cv2.resize(img, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+
+
+def _pack_bits(bits):
+    """
+    (N, 64) bool -> (N,) uint64
+    """
+    return np.packbits(bits, axis=1).view('>u8').ravel().astype(np.uint64)
+
+
+def compute_hashes(paths, workers=8):
+    """
+    Calculeaza aHash si dHash pentru toate imaginile (vectorizat pe tot setul)
+
+    Returns:
+        (ahash, dhash) - doua array-uri (N,) uint64
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        thumbs = np.stack(list(pool.map(_load_thumbnail, paths))).astype(np.float32)
+
+    n = len(thumbs)
+    # aHash: pixel > media (pe 8x8)
+    ahash_px = thumbs[:, :, :HASH_SIZE]
+    ahash_bits = (ahash_px > ahash_px.mean(axis=(1, 2), keepdims=True)).reshape(n, -1)
+    # dHash: gradient orizontal (pixel > vecinul din dreapta)
+    dhash_bits = (thumbs[:, :, 1:] > thumbs[:, :, :-1]).reshape(n, -1)
+
+    return _pack_bits(ahash_bits), _pack_bits(dhash_bits)
+
+
+def hamming_distance(a, b):
+    """
+    Distanta Hamming intre doua hash-uri (int)
+    """
+    return bin(int(a) ^ int(b)).count('1')
+
+
+class BKTree:
+    """
+    BK-tree pe distanta Hamming: cautare in raza r fara comparatii O(n^2)
+    """
+
+    def __init__(self):
+        self.root = None  # [hash, index, {distanta: copil}]
+
+    def add(self, value, index):
+        if self.root is None:
+            self.root = [value, index, {}]
+            return
+        node = self.root
+        while True:
+            d = hamming_distance(value, node[0])
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, index, {}]
+                return
+            node = child
+
+    def query(self, value, radius):
+        """
+        Indicii tuturor hash-urilor la distanta <= radius
+        """
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            d = hamming_distance(value, node[0])
+            if d <= radius:
+                found.append(node[1])
+            for child_d, child in node[2].items():
+                if d - radius <= child_d <= d + radius:
+                    stack.append(child)
+        return found
+
+
+def find_near_duplicates(hashes, max_distance=DEFAULT_MAX_DISTANCE):
+    """
+    Grupeaza imaginile aproape identice (union-find peste perechile gasite in BK-tree)
+
+    Returns:
+        Array (N,) cu id-ul grupului pentru fiecare imagine
+    """
+    parent = list(range(len(hashes)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    tree = BKTree()
+    for i, value in enumerate(hashes):
+        for j in tree.query(value, max_distance):
+            parent[find(i)] = find(j)
+        tree.add(value, i)
+
+    return np.array([find(i) for i in range(len(hashes))])
+
+
+def build_groups(paths, dhashes=None, max_distance=DEFAULT_MAX_DISTANCE):
+    """
+    Grupuri pentru split: aceeasi imagine sursa (sufix _orig/_augN) SAU
+    imagini aproape identice dupa dHash (ex: aceeasi poza salvata de doua ori)
+    """
+    sources = [source_image_id(p) for p in paths]
+    _, source_groups = np.unique(sources, return_inverse=True)
+
+    if dhashes is None:
+        return source_groups
+
+    # Uneste grupurile de sursa cu grupurile de duplicate
+    dup_groups = find_near_duplicates(dhashes, max_distance)
+    parent = {}
+
+    def find(key):
+        while parent.get(key, key) != key:
+            key = parent[key]
+        return key
+
+    for src, dup in zip(source_groups, dup_groups):
+        a, b = find(('s', src)), find(('d', dup))
+        if a != b:
+            parent[a] = b
+
+    roots = [find(('s', src)) for src in source_groups]
+    _, groups = np.unique([str(r) for r in roots], return_inverse=True)
+    return groups
+
+
+def group_train_val_split(groups, test_size=0.2, random_state=42):
+    """
+    Split 80/20 la nivel de grup: toate augmentarile unei imagini raman
+    in aceeasi parte (train sau val)
+
+    Returns:
+        (train_idx, val_idx)
+    """
+    splitter = GroupShuffleSplit(n_splits=1, test_size=test_size, random_state=random_state)
+    train_idx, val_idx = next(splitter.split(np.zeros(len(groups)), groups=groups))
+    return train_idx, val_idx
+
+
+def split_pairs_by_source(pairs, test_size=0.2, random_state=42):
+    """
+    Split pe imaginea sursa pentru perechile (image_path, mask_path)
+    in ordinea din list_dataset_pairs / load_dataset
+
+    Returns:
+        (train_idx, val_idx)
+    """
+    groups = build_groups([img_path for img_path, _ in pairs])
+    return group_train_val_split(groups, test_size, random_state)
+
+
+def count_leakage(groups, train_idx, val_idx):
+    """
+    Cate imagini din validare au un frate (acelasi grup) in antrenare
+    """
+    train_groups = set(groups[train_idx].tolist())
+    return int(sum(1 for g in groups[val_idx] if g in train_groups))
+
+
+if __name__ == "__main__":
+    from sklearn.model_selection import train_test_split
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Deduplicare si verificare scurgeri in dataset")
+    parser.add_argument('--images', default=os.path.join(script_dir, "training_480", "images"))
+    parser.add_argument('--max-distance', type=int, default=DEFAULT_MAX_DISTANCE)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.images):
+        print(f"EROARE: Directorul {args.images} nu exista!")
+        exit(1)
+
+    paths = sorted(
+        os.path.join(args.images, f) for f in os.listdir(args.images)
+        if f.lower().endswith(('.jpg', '.jpeg', '.png'))
+    )
+    print(f"=== INDEXARE HASH-URI ===")
+    print(f"Imagini: {len(paths)}")
+
+    ahashes, dhashes = compute_hashes(paths, workers=args.workers)
+    dup_groups = find_near_duplicates(dhashes, args.max_distance)
+
+    _, counts = np.unique(dup_groups, return_counts=True)
+    print(f"\n=== DUPLICATE (dHash, distanta <= {args.max_distance}) ===")
+    print(f"Grupuri cu duplicate: {np.count_nonzero(counts > 1)}")
+    print(f"Imagini in grupuri cu duplicate: {counts[counts > 1].sum()}")
+    print(f"Duplicate exacte (aHash identic): {len(ahashes) - len(np.unique(ahashes))}")
+
+    groups = build_groups(paths, dhashes, args.max_distance)
+    print(f"Grupuri sursa (dupa unire): {len(np.unique(groups))}")
+
+    print(f"\n=== VERIFICARE SCURGERI ===")
+    indices = np.arange(len(paths))
+    naive_train, naive_val = train_test_split(indices, test_size=0.2, random_state=42)
+    print(f"Split actual (train_test_split): {count_leakage(groups, naive_train, naive_val)} "
+          f"din {len(naive_val)} imagini de validare au sursa in antrenare")
+
+    group_train, group_val = group_train_val_split(groups)
+    print(f"Split pe grupuri: {count_leakage(groups, group_train, group_val)} "
+          f"din {len(group_val)} imagini de validare au sursa in antrenare")
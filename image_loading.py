@@ -0,0 +1,161 @@
+"""
+Incarcare rapida a imaginilor cu decodare JPEG redusa (in domeniul DCT)
+Pozele de 12 MP sunt decodate direct la 1/2, 1/4 sau 1/8 (cea mai mica scara
+care ramane peste dimensiunea tinta) in loc sa fie decodate complet si apoi micsorate
+"""
+
+import os
+import time
+import argparse
+import numpy as np
+import cv2
+from PIL import Image
+
+from mask_store import read_mask
+
+_REDUCED_COLOR_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+_EXIF_ORIENTATION = 0x0112
+
+# Extensiile acceptate in dataset (augment_dataset.py poate scrie si WebP)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def reduction_factor(width, height, target_size):
+    """
+    Cel mai mare factor (1/2/4/8) pentru care latura mica ramane >= target_size
+    """
+    for factor in (8, 4, 2):
+        if min(width, height) // factor >= target_size:
+            return factor
+    return 1
+
+
+def read_size(path):
+    """
+    Dimensiunile imaginii citite doar din header (fara decodare).
+    Tine cont de orientarea EXIF, la fel ca cv2.imread.
+    """
+    with Image.open(path) as img:
+        width, height = img.size
+        if img.getexif().get(_EXIF_ORIENTATION) in (5, 6, 7, 8):
+            return height, width
+        return width, height
+
+
+def decode_reduced(path, min_size):
+    """
+    Imaginea BGR decodata la cea mai mica scara (1, 1/2, 1/4, 1/8) cu latura mica >= min_size,
+    fara redimensionare finala (aspectul se pastreaza)
+    """
+    width, height = read_size(path)
+    factor = reduction_factor(width, height, min_size)
+
+    img = cv2.imread(path, _REDUCED_COLOR_FLAGS[factor])
+    if img is None:
+        raise IOError(f"Nu s-a putut citi {path}")
+    return img
+
+
+def load_image_rgb(path, target_size, interpolation=cv2.INTER_LINEAR):
+    """
+    Incarca imaginea RGB uint8 redimensionata la (target_size, target_size)
+    folosind decodarea redusa OpenCV
+    """
+    img = cv2.cvtColor(decode_reduced(path, target_size), cv2.COLOR_BGR2RGB)
+    return cv2.resize(img, (target_size, target_size), interpolation=interpolation)
+
+
+def load_image_pil(path, target_size, resample=Image.Resampling.LANCZOS):
+    """
+    Varianta PIL: draft() alege scara JPEG >= target_size inainte de decodare
+    (pentru PNG draft() nu are efect si imaginea se decodeaza complet)
+    """
+    with Image.open(path) as img:
+        img.draft('RGB', (target_size, target_size))
+        img = img.convert('RGB')
+        return np.array(img.resize((target_size, target_size), resample))
+
+
+def load_mask_gray(path, target_size):
+    """
+    Incarca masca grayscale uint8 redimensionata (de binarizat cu > 127)
+    path poate fi un PNG sau o referinta '<container>.maskpack::<sample_id>'
+    """
+    mask = read_mask(path)
+    if mask is None:
+        raise IOError(f"Nu s-a putut citi {path}")
+    return cv2.resize(mask, (target_size, target_size))
+
+
+def _load_full_then_resize(path, target_size):
+    img = cv2.imread(path)
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return img, cv2.resize(img, (target_size, target_size))
+
+
+def _load_reduced_then_resize(path, target_size):
+    width, height = read_size(path)
+    img = cv2.imread(path, _REDUCED_COLOR_FLAGS[reduction_factor(width, height, target_size)])
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return img, cv2.resize(img, (target_size, target_size))
+
+
+def benchmark_decode(paths, target_size):
+    """
+    Timp si memorie de decodare per imagine: decodare completa vs redusa
+
+    Memoria = marimea buffer-ului decodat inainte de resize (ce ocupa poza in RAM)
+    """
+    results = {}
+    for name, loader in (('full', _load_full_then_resize), ('reduced', _load_reduced_then_resize)):
+        times = []
+        decoded_bytes = []
+        for path in paths:
+            start = time.perf_counter()
+            decoded, _ = loader(path, target_size)
+            times.append((time.perf_counter() - start) * 1000)
+            decoded_bytes.append(decoded.nbytes)
+        results[name] = {
+            'ms_per_image': float(np.mean(times)),
+            'mb_per_image': float(np.mean(decoded_bytes)) / (1024 * 1024)
+        }
+    return results
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Benchmark decodare JPEG completa vs redusa")
+    parser.add_argument('--images', default=os.path.join(script_dir, "images"))
+    parser.add_argument('--size', type=int, default=256)
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.images):
+        print(f"EROARE: Directorul {args.images} nu exista!")
+        exit(1)
+
+    paths = sorted(
+        os.path.join(args.images, f) for f in os.listdir(args.images)
+        if f.lower().endswith(('.jpg', '.jpeg'))
+    )[:args.limit]
+    if not paths:
+        print(f"EROARE: Nu s-au gasit JPEG-uri in {args.images}")
+        exit(1)
+
+    print(f"=== BENCHMARK DECODARE ({len(paths)} imagini, tinta {args.size}x{args.size}) ===")
+    results = benchmark_decode(paths, args.size)
+
+    print(f"{'Metoda':<10} {'ms/imagine':>12} {'MB/imagine':>12}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['ms_per_image']:>12.2f} {r['mb_per_image']:>12.2f}")
+
+    speedup = results['full']['ms_per_image'] / max(results['reduced']['ms_per_image'], 1e-9)
+    memory = results['full']['mb_per_image'] / max(results['reduced']['mb_per_image'], 1e-9)
+    print(f"\nDecodare redusa: {speedup:.1f}x mai rapida, {memory:.1f}x mai putina memorie")
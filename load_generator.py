@@ -0,0 +1,142 @@
+"""
+Generator de incarcare pentru segmentation_service.py (doar localhost)
+N clienti concurenti cu conexiuni keep-alive trimit poze la POST /segment;
+la final: throughput, percentile de latenta, raspunsuri 503 si /metrics ale serviciului
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import numpy as np
+import cv2
+
+from image_loading import IMAGE_EXTENSIONS
+
+
+def load_payloads(images_dir, limit):
+    """
+    Bytes-ii pozelor din images_dir; fara poze, imagini sintetice (cartonas alb pe fundal zgomotos)
+    """
+    if images_dir and os.path.exists(images_dir):
+        files = sorted(f for f in os.listdir(images_dir) if f.lower().endswith(IMAGE_EXTENSIONS))[:limit]
+        payloads = []
+        for f in files:
+            with open(os.path.join(images_dir, f), 'rb') as fh:
+                payloads.append(fh.read())
+        if payloads:
+            return payloads
+
+    rng = np.random.default_rng(0)
+    payloads = []
+    for _ in range(min(limit, 8)):
+        image = rng.integers(0, 255, (1200, 900, 3), dtype=np.uint8)
+        cv2.rectangle(image, (200, 250), (700, 950), (255, 255, 255), -1)
+        payloads.append(cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes())
+    return payloads
+
+
+async def http_request(reader, writer, host, method, path, body=b''):
+    """
+    O cerere HTTP/1.1 pe o conexiune deschisa; returneaza (status, headers, body)
+    """
+    head = (f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+            f"Content-Length: {len(body)}\r\nContent-Type: application/octet-stream\r\n\r\n")
+    writer.write(head.encode('latin-1') + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split(b' ', 2)[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        key, _, value = line.decode('latin-1').partition(':')
+        headers[key.strip().lower()] = value.strip()
+    payload = await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers, payload
+
+
+async def client(host, port, path, payloads, counter, results):
+    reader = writer = None
+    while counter['remaining'] > 0:
+        counter['remaining'] -= 1
+        body = random.choice(payloads)
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            status, headers, _ = await http_request(reader, writer, host, 'POST', path, body)
+            if headers.get('connection') == 'close':
+                writer.close()
+                writer = None
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            status = type(e).__name__
+            writer = None
+        results.append((status, (time.perf_counter() - start) * 1000))
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(args, payloads):
+    path = f"/segment?output={args.output}"
+    counter = {'remaining': args.requests}
+    results = []
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client(args.host, args.port, path, payloads, counter, results)
+        for _ in range(args.concurrency)
+    ])
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    _, _, metrics = await http_request(reader, writer, args.host, 'GET', '/metrics')
+    writer.close()
+    return results, elapsed, json.loads(metrics)
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Test de incarcare pentru segmentation_service.py")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--images', default=os.path.join(script_dir, "images"),
+                        help="Poze trimise (sintetice daca directorul lipseste)")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--output', choices=['card', 'mask'], default='card')
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.images, limit=32)
+    print(f"=== TEST INCARCARE ===")
+    print(f"Tinta: http://{args.host}:{args.port}, cereri: {args.requests}, "
+          f"clienti concurenti: {args.concurrency}, poze distincte: {len(payloads)}")
+
+    try:
+        results, elapsed, metrics = asyncio.run(run_load(args, payloads))
+    except ConnectionRefusedError:
+        print(f"EROARE: Serviciul nu ruleaza pe {args.host}:{args.port}!")
+        print(f"Porneste-l cu: py segmentation_service.py")
+        exit(1)
+
+    ok = np.array([ms for status, ms in results if status == 200])
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+
+    print(f"\n=== REZULTATE CLIENT ===")
+    print(f"Durata: {elapsed:.2f}s, throughput: {len(ok) / elapsed:.1f} cereri/s reusite")
+    print(f"Raspunsuri: {', '.join(f'{s}: {n}' for s, n in sorted(statuses.items(), key=str))}")
+    if len(ok):
+        p50, p95, p99 = np.percentile(ok, [50, 95, 99])
+        print(f"Latenta (ms): p50 {p50:.1f}, p95 {p95:.1f}, p99 {p99:.1f}, max {ok.max():.1f}")
+
+    print(f"\n=== METRICI SERVICIU ===")
+    print(f"Batch mediu: {metrics['mean_batch_size']:.2f} ({metrics['batches']} batch-uri)")
+    print(f"Inferenta per batch (ms): p50 {metrics['inference_ms_per_batch']['p50']:.1f}, "
+          f"p95 {metrics['inference_ms_per_batch']['p95']:.1f}")
+    print(f"Respinse (503): {metrics['rejected']}, erori: {metrics['errors']}, timeout: {metrics['timeouts']}")
@@ -0,0 +1,290 @@
+"""
+Implementare Python de referinta a post-procesarii mastilor de pe Android
+(OpenCVMaskProcessor.refineMask + detectCardContourHighRes)
+cu timp masurat per etapa si benchmark pe un director de poze
+"""
+
+import os
+import time
+import argparse
+from contextlib import contextmanager
+import numpy as np
+import cv2
+
+from tflite_inference import TFLiteSegmenter
+
+# Aceleasi constante ca in OpenCVMaskProcessor.kt
+REFINE_THRESHOLD = 200
+OPEN_KERNEL = 5
+CLOSE_KERNEL = 7
+MAX_DIMENSION = 2000
+CANNY_LOW = 80
+CANNY_HIGH = 160
+MIN_CONTOUR_AREA = 500
+TARGET_ASPECT_RATIO = 0.65
+ASPECT_RATIO_TOLERANCE = 0.25
+APPROX_EPSILON_RATIO = 0.005
+
+
+@contextmanager
+def _timed(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def refine_mask(mask, timings=None):
+    """
+    Echivalentul refineMask: threshold, OPEN 5x5, CLOSE 7x7, cel mai mare contur umplut
+
+    Args:
+        mask: Masca grayscale uint8 (0-255), deja scalata la rezolutia dorita
+        timings: dict optional in care se aduna timpii (ms) per etapa
+
+    Returns:
+        Masca rafinata uint8 (0/255)
+    """
+    timings = {} if timings is None else timings
+
+    with _timed(timings, 'refine_threshold'):
+        _, binary = cv2.threshold(mask, REFINE_THRESHOLD, 255, cv2.THRESH_BINARY)
+
+    with _timed(timings, 'refine_morphology'):
+        kernel_open = cv2.getStructuringElement(cv2.MORPH_RECT, (OPEN_KERNEL, OPEN_KERNEL))
+        kernel_close = cv2.getStructuringElement(cv2.MORPH_RECT, (CLOSE_KERNEL, CLOSE_KERNEL))
+        opened = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel_open)
+        closed = cv2.morphologyEx(opened, cv2.MORPH_CLOSE, kernel_close)
+
+    with _timed(timings, 'refine_contours'):
+        contours, _ = cv2.findContours(closed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    with _timed(timings, 'refine_fill'):
+        if not contours:
+            # Fallback: masca inchisa daca nu exista contururi
+            return closed
+        biggest = max(contours, key=cv2.contourArea)
+        refined = np.zeros_like(closed)
+        cv2.drawContours(refined, [biggest], -1, 255, thickness=-1)
+
+    return refined
+
+
+def _select_contour(contours):
+    """
+    Cel mai mare contur (>= 500 px), apoi preferinta pentru aspect ratio ~0.65
+    (scor 70% arie + 30% aspect, la fel ca pe Android)
+    """
+    areas = [cv2.contourArea(c) for c in contours]
+    candidates = [i for i, a in enumerate(areas) if a >= MIN_CONTOUR_AREA]
+    if not candidates:
+        return contours[int(np.argmax(areas))]
+
+    best_idx = max(candidates, key=lambda i: areas[i])
+    max_area = areas[best_idx]
+
+    best_score = 0.0
+    best_aspect_idx = None
+    for i, area in enumerate(areas):
+        if area < max_area * 0.3:
+            continue
+        _, _, w, h = cv2.boundingRect(contours[i])
+        aspect_diff = abs(w / h - TARGET_ASPECT_RATIO)
+        aspect_score = 1.0 - aspect_diff / ASPECT_RATIO_TOLERANCE if aspect_diff < ASPECT_RATIO_TOLERANCE else 0.0
+        score = (area / max_area) * 0.7 + aspect_score * 0.3
+        if score > best_score:
+            best_score = score
+            best_aspect_idx = i
+
+    if best_aspect_idx is not None and best_score > 0.5:
+        return contours[best_aspect_idx]
+    return contours[best_idx]
+
+
+def _smooth_contour(contour, working_h):
+    """
+    approxPolyDP cu epsilon = 0.5% din perimetru + convex hull pentru zona hanger-ului
+    """
+    epsilon = APPROX_EPSILON_RATIO * cv2.arcLength(contour, True)
+    approx = cv2.approxPolyDP(contour, epsilon, True)
+
+    _, y, _, _ = cv2.boundingRect(approx)
+    original_area = cv2.contourArea(contour)
+    area_loss = (original_area - cv2.contourArea(approx)) / original_area if original_area > 0 else 0.0
+
+    if y < working_h * 0.15 or area_loss > 0.1:
+        return cv2.convexHull(approx)
+    return approx
+
+
+def detect_card_contour_high_res(crop, tflite_mask=None, timings=None):
+    """
+    Echivalentul detectCardContourHighRes: CLAHE, blur, Canny (fallback adaptive
+    threshold), masca TFLite dilatata ca ghid, selectie contur, approxPolyDP/convexHull
+
+    Args:
+        crop: Imagine RGB uint8 la rezolutie mare
+        tflite_mask: Masca TFLite grayscale uint8 (orice dimensiune) sau None
+        timings: dict optional pentru timpii (ms) per etapa
+
+    Returns:
+        Masca uint8 (0/255) la rezolutia crop-ului sau None daca nu s-a gasit contur
+    """
+    timings = {} if timings is None else timings
+    original_h, original_w = crop.shape[:2]
+
+    with _timed(timings, 'detect_downscale'):
+        if original_w > MAX_DIMENSION or original_h > MAX_DIMENSION:
+            scale = MAX_DIMENSION / max(original_w, original_h)
+            working_w, working_h = int(original_w * scale), int(original_h * scale)
+            working = cv2.resize(crop, (working_w, working_h), interpolation=cv2.INTER_LINEAR)
+            scale_factor = 1.0 / scale
+        else:
+            working = crop
+            working_w, working_h = original_w, original_h
+            scale_factor = 1.0
+
+    with _timed(timings, 'detect_clahe_blur'):
+        gray = cv2.cvtColor(working, cv2.COLOR_RGB2GRAY) if working.ndim == 3 else working
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(gray)
+        blurred = cv2.GaussianBlur(clahe, (5, 5), 0)
+
+    with _timed(timings, 'detect_edges'):
+        edges = cv2.Canny(blurred, CANNY_LOW, CANNY_HIGH)
+        if cv2.countNonZero(edges) <= working_w * working_h * 0.01:
+            edges = cv2.adaptiveThreshold(
+                blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+            )
+
+    if tflite_mask is not None:
+        with _timed(timings, 'detect_tflite_guide'):
+            guide = cv2.resize(tflite_mask, (working_w, working_h), interpolation=cv2.INTER_LINEAR)
+            _, guide = cv2.threshold(guide, 64, 255, cv2.THRESH_BINARY)
+            kernel_size = max(7, working_w // 200)
+            guide = cv2.dilate(guide, cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_size, kernel_size)))
+            edges = cv2.bitwise_or(cv2.bitwise_and(edges, guide), edges)
+
+    with _timed(timings, 'detect_contours'):
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+
+    with _timed(timings, 'detect_select'):
+        best = _select_contour(contours)
+
+    with _timed(timings, 'detect_approx'):
+        smoothed = _smooth_contour(best, working_h)
+
+    with _timed(timings, 'detect_fill'):
+        if scale_factor != 1.0:
+            smoothed = np.round(smoothed.astype(np.float64) * scale_factor).astype(np.int32)
+        mask = np.zeros((original_h, original_w), dtype=np.uint8)
+        cv2.drawContours(mask, [smoothed], -1, 255, thickness=-1)
+
+    return mask
+
+
+def run_pipeline(segmenter, photo_paths, batch_size=8):
+    """
+    Ruleaza pipeline-ul complet (TFLite -> refineMask -> detectCardContourHighRes)
+    pe o lista de poze si returneaza timpii per poza
+
+    Returns:
+        Lista de dict-uri {'file', 'megapixels', <etapa>: ms, ...}
+    """
+    size = segmenter.input_height
+    results = []
+
+    for start in range(0, len(photo_paths), batch_size):
+        batch_paths = photo_paths[start:start + batch_size]
+        photos = []
+        batch_timings = [{} for _ in batch_paths]
+
+        for path, timings in zip(batch_paths, batch_timings):
+            with _timed(timings, 'decode'):
+                photo = cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2RGB)
+            photos.append(photo)
+
+        inputs = np.stack([
+            cv2.resize(p, (size, size)).astype(np.float32) / 255.0 for p in photos
+        ])
+        infer_start = time.perf_counter()
+        probs = segmenter.predict(inputs)
+        infer_ms = (time.perf_counter() - infer_start) * 1000 / len(photos)
+
+        for path, photo, prob, timings in zip(batch_paths, photos, probs, batch_timings):
+            timings['tflite'] = infer_ms
+            h, w = photo.shape[:2]
+
+            with _timed(timings, 'upscale_mask'):
+                mask = cv2.resize((prob * 255).astype(np.uint8), (w, h), interpolation=cv2.INTER_LINEAR)
+
+            refined = refine_mask(mask, timings)
+            detect_card_contour_high_res(photo, refined, timings)
+
+            timings['file'] = os.path.basename(path)
+            timings['megapixels'] = h * w / 1e6
+            results.append(timings)
+
+        print(f"  Procesat {min(start + batch_size, len(photo_paths))}/{len(photo_paths)}")
+
+    return results
+
+
+def print_stage_summary(results):
+    """
+    Tabel cu media si p95 (ms) per etapa
+    """
+    stages = []
+    for r in results:
+        stages += [k for k in r if k not in stages and k not in ('file', 'megapixels')]
+
+    print(f"\n=== TIMP PER ETAPA ({len(results)} poze) ===")
+    print(f"{'Etapa':<22} {'medie ms':>10} {'p95 ms':>10}")
+    total = np.zeros(len(results))
+    for stage in stages:
+        values = np.array([r.get(stage, 0.0) for r in results])
+        total += values
+        print(f"{stage:<22} {values.mean():>10.2f} {np.percentile(values, 95):>10.2f}")
+    print(f"{'TOTAL':<22} {total.mean():>10.2f} {np.percentile(total, 95):>10.2f}")
+
+    megapixels = np.array([r['megapixels'] for r in results])
+    print(f"\nMedie: {(total / megapixels).mean():.2f} ms/megapixel")
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Benchmark post-procesare masti (ca pe Android)")
+    parser.add_argument('--model', default=os.path.join(script_dir, "card_segmentation_480.tflite"))
+    parser.add_argument('--photos', default=os.path.join(script_dir, "images"))
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--limit', type=int, default=None, help="Numar maxim de poze")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"EROARE: Modelul {args.model} nu exista!")
+        exit(1)
+
+    if not os.path.exists(args.photos):
+        print(f"EROARE: Directorul {args.photos} nu exista!")
+        exit(1)
+
+    photo_paths = sorted(
+        os.path.join(args.photos, f) for f in os.listdir(args.photos)
+        if f.lower().endswith(('.jpg', '.jpeg', '.png'))
+    )[:args.limit]
+
+    if not photo_paths:
+        print(f"EROARE: Nu s-au gasit poze in {args.photos}")
+        exit(1)
+
+    print(f"=== BENCHMARK POST-PROCESARE ===")
+    print(f"Model: {args.model}")
+    print(f"Poze: {len(photo_paths)}")
+
+    segmenter = TFLiteSegmenter(args.model, batch_size=args.batch_size, num_threads=args.threads)
+    results = run_pipeline(segmenter, photo_paths, batch_size=args.batch_size)
+    print_stage_summary(results)
@@ -0,0 +1,328 @@
+"""
+Container compact pentru masti binare (in loc de PNG-uri 0/255 separate)
+
+Un singur fisier .maskpack:
+    [magic 'MSKP' | versiune uint32 | offset index uint64]
+    [blob-uri np.packbits, unul per masca, aliniate la 8 bytes]
+    [index JSON: {sample_id: [offset, inaltime, latime]}]
+
+Citirea se face prin np.memmap: bytes-ii impachetati ai unei masti sunt o felie
+din fisierul mapat (fara copiere), iar np.unpackbits ii expandeaza direct la (H, W).
+
+Mastile din container se adreseaza in perechile (image_path, mask_path) ca
+"<cale>.maskpack::<sample_id>", deci load_mask_gray / list_dataset_pairs
+functioneaza la fel ca pentru directoarele cu PNG-uri.
+"""
+
+import os
+import json
+import time
+import struct
+import shutil
+import argparse
+import tempfile
+import threading
+import numpy as np
+import cv2
+
+STORE_EXT = ".maskpack"
+REF_SEPARATOR = "::"
+_MAGIC = b"MSKP"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIQ")
+_ALIGN = 8
+
+_open_stores = {}
+_open_lock = threading.Lock()
+
+
+def is_store(path):
+    return path.lower().endswith(STORE_EXT)
+
+
+def mask_ref(store_path, sample_id):
+    return f"{store_path}{REF_SEPARATOR}{sample_id}"
+
+
+def split_ref(path):
+    """
+    (store_path, sample_id) pentru o referinta, altfel None
+    """
+    if REF_SEPARATOR not in path:
+        return None
+    store_path, sample_id = path.rsplit(REF_SEPARATOR, 1)
+    return (store_path, sample_id) if is_store(store_path) else None
+
+
+class MaskStoreWriter:
+    """
+    Scrie masti intr-un container. Cu append=True, mastile existente se pastreaza
+    (o masca rescrisa inlocuieste doar intrarea din index; pack_directory rescrie containerul compact).
+
+    Scrierea nu lasa niciodata un container invalid la o intrerupere:
+    - un container nou se scrie in <cale>.tmp si inlocuieste atomic fisierul la close()
+    - in append, datele noi si noul index se adauga dupa indexul vechi (care ramane intact),
+      iar header-ul se rescrie ultimul; pana atunci el indica tot indexul vechi
+    """
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.index = {}
+        if append and os.path.exists(path):
+            with open(path, 'rb') as f:
+                _, _, index_offset = _read_header(f)
+                f.seek(index_offset)
+                self.index = json.loads(f.read().decode('utf-8'))
+            self._write_path = path
+            self.file = open(path, 'r+b')
+            self.file.seek(0, os.SEEK_END)
+        else:
+            self._write_path = path + ".tmp"
+            self.file = open(self._write_path, 'wb')
+            self.file.write(_HEADER.pack(_MAGIC, _VERSION, 0))
+
+    def add(self, sample_id, mask):
+        """
+        mask: (H, W) bool sau uint8 (> 127 = cartonas)
+        """
+        mask = np.asarray(mask)
+        binary = mask if mask.dtype == bool else mask > 127
+        packed = np.packbits(binary, axis=None)
+
+        offset = self.file.tell()
+        padding = (-offset) % _ALIGN
+        if padding:
+            self.file.write(b"\0" * padding)
+            offset += padding
+        self.file.write(packed.tobytes())
+        self.index[str(sample_id)] = [offset, int(binary.shape[0]), int(binary.shape[1])]
+
+    def close(self):
+        index_offset = self.file.tell()
+        self.file.write(json.dumps(self.index, separators=(',', ':')).encode('utf-8'))
+        # Datele si indexul ajung pe disc inaintea header-ului care le indica
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.seek(0)
+        self.file.write(_HEADER.pack(_MAGIC, _VERSION, index_offset))
+        self.file.close()
+        if self._write_path != self.path:
+            os.replace(self._write_path, self.path)
+        with _open_lock:
+            _open_stores.pop(os.path.abspath(self.path), None)
+
+    def abort(self):
+        """
+        Renunta la scriere: containerul existent ramane cum era
+        """
+        self.file.close()
+        if self._write_path != self.path:
+            os.remove(self._write_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _read_header(f):
+    magic, version, index_offset = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != _MAGIC:
+        raise IOError(f"{getattr(f, 'name', '?')} nu este un container de masti")
+    return magic, version, index_offset
+
+
+class MaskStore:
+    """
+    Citire cu acces aleator dupa sample_id (fisierul este mapat in memorie)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            _, _, index_offset = _read_header(f)
+            f.seek(index_offset)
+            self.index = json.loads(f.read().decode('utf-8'))
+        self.data = np.memmap(path, dtype=np.uint8, mode='r')
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, sample_id):
+        return sample_id in self.index
+
+    def keys(self):
+        return sorted(self.index)
+
+    def packed(self, sample_id):
+        """
+        Bytes-ii impachetati (view in fisierul mapat, fara copiere) si forma mastii
+        """
+        offset, height, width = self.index[sample_id]
+        nbytes = (height * width + 7) // 8
+        return self.data[offset:offset + nbytes], (height, width)
+
+    def get(self, sample_id):
+        """
+        Masca (H, W) bool
+        """
+        packed, (height, width) = self.packed(sample_id)
+        return np.unpackbits(packed, count=height * width).reshape(height, width).view(bool)
+
+    def get_gray(self, sample_id):
+        """
+        Masca (H, W) uint8 0/255, ca un PNG citit cu cv2.IMREAD_GRAYSCALE
+        """
+        packed, (height, width) = self.packed(sample_id)
+        return np.unpackbits(packed, count=height * width).reshape(height, width) * np.uint8(255)
+
+
+def open_store(path):
+    """
+    MaskStore partajat per proces (un singur memmap per fisier)
+    """
+    key = os.path.abspath(path)
+    with _open_lock:
+        store = _open_stores.get(key)
+        if store is None:
+            store = _open_stores[key] = MaskStore(path)
+        return store
+
+
+def resolve_masks_dir(masks_dir):
+    """
+    masks_dir (PNG-uri) sau containerul masks_dir.maskpack, oricare exista.
+    Daca exista ambele nu se ghiceste care e actual: IOError.
+    """
+    store_path = masks_dir + STORE_EXT
+    if os.path.exists(store_path):
+        if os.path.isdir(masks_dir):
+            raise IOError(f"Exista si {masks_dir} si {store_path}; sterge varianta veche "
+                          f"(sau ruleaza din nou augment_dataset.py)")
+        return store_path
+    return masks_dir
+
+
+def mask_location(masks_dir, sample_id):
+    """
+    Calea PNG sau referinta din container pentru masca unui esantion; None daca lipseste
+    """
+    if is_store(masks_dir):
+        return mask_ref(masks_dir, sample_id) if sample_id in open_store(masks_dir) else None
+    path = os.path.join(masks_dir, f"{sample_id}.png")
+    return path if os.path.exists(path) else None
+
+
+def read_mask(path):
+    """
+    Masca uint8 0/255 dintr-un PNG sau dintr-o referinta '<container>::<sample_id>'
+    """
+    ref = split_ref(path)
+    if ref is not None:
+        return open_store(ref[0]).get_gray(ref[1])
+    return cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+
+
+def pack_directory(masks_dir, store_path):
+    """
+    Impacheteaza toate PNG-urile dintr-un director intr-un container
+    """
+    files = sorted(f for f in os.listdir(masks_dir) if f.lower().endswith('.png'))
+    with MaskStoreWriter(store_path) as writer:
+        for f in files:
+            writer.add(os.path.splitext(f)[0], cv2.imread(os.path.join(masks_dir, f), cv2.IMREAD_GRAYSCALE))
+    return len(files)
+
+
+def unpack_to_directory(store_path, masks_dir):
+    """
+    Scrie mastile inapoi ca PNG-uri 0/255 (pentru unelte care asteapta fisiere)
+    """
+    os.makedirs(masks_dir, exist_ok=True)
+    store = MaskStore(store_path)
+    for sample_id in store.keys():
+        cv2.imwrite(os.path.join(masks_dir, f"{sample_id}.png"), store.get_gray(sample_id))
+    return len(store)
+
+
+def benchmark(masks_dir, store_path, repeats=3):
+    """
+    Marime totala si timp de decodare per masca: PNG vs container
+    """
+    files = sorted(f for f in os.listdir(masks_dir) if f.lower().endswith('.png'))
+    png_bytes = sum(os.path.getsize(os.path.join(masks_dir, f)) for f in files)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for f in files:
+            cv2.imread(os.path.join(masks_dir, f), cv2.IMREAD_GRAYSCALE)
+    png_ms = (time.perf_counter() - start) / (repeats * len(files)) * 1000
+
+    store = MaskStore(store_path)
+    ids = store.keys()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for sample_id in ids:
+            store.get(sample_id)
+    store_ms = (time.perf_counter() - start) / (repeats * len(ids)) * 1000
+
+    return {
+        'count': len(files),
+        'png_mb': png_bytes / (1024 * 1024),
+        'store_mb': os.path.getsize(store_path) / (1024 * 1024),
+        'png_ms': png_ms,
+        'store_ms': store_ms
+    }
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Container compact pentru masti binare")
+    parser.add_argument('command', choices=['pack', 'unpack', 'benchmark'])
+    parser.add_argument('--masks', default=os.path.join(script_dir, "training_480", "masks"))
+    parser.add_argument('--store', default=os.path.join(script_dir, "training_480", "masks" + STORE_EXT))
+    parser.add_argument('--keep-source', action='store_true',
+                        help="Pastreaza sursa (PNG-urile la pack, containerul la unpack); "
+                             "antrenarea refuza un set care le are pe amandoua")
+    args = parser.parse_args()
+
+    # Dupa pack / unpack ramane o singura reprezentare (vezi resolve_masks_dir)
+    if args.command == 'unpack':
+        if not os.path.exists(args.store):
+            print(f"EROARE: Containerul {args.store} nu exista!")
+            exit(1)
+        count = unpack_to_directory(args.store, args.masks)
+        print(f"Despachetate {count} masti in {args.masks}")
+        if not args.keep_source:
+            os.remove(args.store)
+            print(f"Container sters: {args.store}")
+        exit(0)
+
+    if not os.path.exists(args.masks):
+        print(f"EROARE: Directorul {args.masks} nu exista!")
+        exit(1)
+
+    if args.command == 'pack':
+        count = pack_directory(args.masks, args.store)
+        print(f"Impachetate {count} masti in {args.store}")
+        if not args.keep_source:
+            shutil.rmtree(args.masks)
+            print(f"PNG-uri sterse: {args.masks}")
+
+    if args.command == 'benchmark':
+        # Containerul de test e temporar: setul de antrenare ramane neschimbat
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store_path = os.path.join(tmp_dir, "benchmark" + STORE_EXT)
+            pack_directory(args.masks, store_path)
+            r = benchmark(args.masks, store_path)
+        print(f"\n=== BENCHMARK MASTI ({r['count']} masti) ===")
+        print(f"{'Format':<12} {'MB total':>10} {'ms/masca':>10}")
+        print(f"{'PNG':<12} {r['png_mb']:>10.2f} {r['png_ms']:>10.3f}")
+        print(f"{'maskpack':<12} {r['store_mb']:>10.2f} {r['store_ms']:>10.3f}")
+        print(f"\nContainer: {r['png_mb'] / max(r['store_mb'], 1e-9):.1f}x mai mic, "
+              f"decodare {r['png_ms'] / max(r['store_ms'], 1e-9):.1f}x mai rapida")
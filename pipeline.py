@@ -0,0 +1,408 @@
+"""
+Pipeline complet: conversie COCO -> masti, augmentare, antrenare, test masti
+Fiecare etapa isi declara input-urile si output-urile (fisiere sau directoare);
+dependentele rezulta automat (output-ul unei etape e input-ul alteia).
+
+- Etapele cu acelasi hash de continut al input-urilor (si output-uri intacte) sunt sarite
+- Etapele independente ruleaza in paralel (ex. test_masks in timpul augmentarii/antrenarii)
+- Timpul fiecarei etape se salveaza in .pipeline/runs.json
+
+Utilizare:
+    py pipeline.py                 # ruleaza ce s-a schimbat
+    py pipeline.py --force train   # reruleaza o etapa (in aval doar daca output-ul se schimba)
+    py pipeline.py --dry-run       # arata ce s-ar rula
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+STATE_DIR = ".pipeline"
+HASH_CHUNK = 1024 * 1024
+# Scriptul de antrenare si modulele importate de el (o schimbare in oricare reantreneaza)
+TRAIN_MODULES = [
+    "train_tflite_480_masks.py", "image_loading.py", "image_hashing.py", "evaluate_tflite.py",
+    "segmentation_metrics.py", "dataset_manifest.py", "hard_example_mining.py", "mask_store.py",
+    "synthetic_cards.py", "tflite_inference.py", "check_tflite_parity.py", "training_profiler.py",
+]
+
+
+class Stage:
+    """
+    Etapa din pipeline
+
+    Args:
+        name: Numele etapei
+        inputs: Cai (fisiere/directoare) citite de etapa, inclusiv scripturile ei
+        outputs: Cai produse de etapa (un cache citit si rescris de etapa apare si in inputs)
+        run: Functie fara argumente care executa etapa
+        clean: Output-urile (directoare si fisiere) se sterg inainte de rulare (fara fisiere ramase de la rularea trecuta)
+    """
+
+    def __init__(self, name, inputs, outputs, run, clean=False):
+        self.name = name
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.run = run
+        self.clean = clean
+
+
+class ContentHasher:
+    """
+    SHA-256 pentru fisiere si directoare. Digest-ul unui fisier se refoloseste
+    cat timp (mtime, marime) nu se schimba, deci un re-run nu reciteste tot dataset-ul.
+    """
+
+    def __init__(self, known=None):
+        self.files = dict(known or {})
+
+    def file_digest(self, path):
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        cached = self.files.get(key)
+        if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+                digest.update(chunk)
+        self.files[key] = [stat.st_mtime, stat.st_size, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def path_digest(self, path):
+        """
+        Hash pentru fisier sau director (cai relative + continut); None daca lipseste
+        """
+        if not os.path.exists(path):
+            return None
+        if os.path.isfile(path):
+            return self.file_digest(path)
+
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                digest.update(os.path.relpath(full, path).replace(os.sep, '/').encode('utf-8'))
+                digest.update(self.file_digest(full).encode('ascii'))
+        return digest.hexdigest()
+
+    def stage_digest(self, paths):
+        digest = hashlib.sha256()
+        for path in paths:
+            digest.update(path.encode('utf-8'))
+            digest.update((self.path_digest(path) or 'lipsa').encode('ascii'))
+        return digest.hexdigest()
+
+
+def build_dag(stages):
+    """
+    Dependentele fiecarei etape: etapele care produc una din caile ei de input
+    """
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            producers[os.path.abspath(output)] = stage.name
+
+    return {
+        stage.name: sorted({
+            producers[os.path.abspath(p)] for p in stage.inputs
+            if os.path.abspath(p) in producers and producers[os.path.abspath(p)] != stage.name
+        })
+        for stage in stages
+    }
+
+
+def _load_state(state_dir):
+    path = os.path.join(state_dir, "cache.json")
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'stages': {}, 'files': {}}
+
+
+def _save_state(state_dir, state):
+    os.makedirs(state_dir, exist_ok=True)
+    path = os.path.join(state_dir, "cache.json")
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def _run_stage(stage):
+    if stage.clean:
+        for output in stage.outputs:
+            if os.path.isdir(output):
+                shutil.rmtree(output)
+            elif os.path.isfile(output):
+                os.remove(output)
+    start = time.perf_counter()
+    stage.run()
+    return time.perf_counter() - start
+
+
+def run_pipeline(stages, state_dir, force=(), dry_run=False, max_workers=2):
+    """
+    Ruleaza DAG-ul: o etapa porneste cand toate dependentele ei s-au terminat
+
+    Returns:
+        dict {etapa: {'status': 'rulat'|'sarit'|'esuat'|'blocat', 'seconds': float}}
+    """
+    dag = build_dag(stages)
+    by_name = {stage.name: stage for stage in stages}
+    state = _load_state(state_dir)
+    hasher = ContentHasher(state.get('files'))
+
+    results = {}
+    forced = set(force)
+    would_run = set()  # Doar pentru --dry-run
+    running = {}
+
+    def ready(name):
+        return name not in results and name not in running.values() and all(
+            dep in results and results[dep]['status'] in ('rulat', 'sarit') for dep in dag[name]
+        )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while len(results) < len(stages):
+            progressed = False
+            for stage in stages:
+                if not ready(stage.name):
+                    continue
+                progressed = True
+
+                # Hash-ul se calculeaza dupa ce dependentele au terminat (input-uri finale)
+                input_digest = hasher.stage_digest(stage.inputs)
+                previous = state['stages'].get(stage.name, {})
+                up_to_date = (
+                    stage.name not in forced
+                    and previous.get('input_digest') == input_digest
+                    and previous.get('output_digest') == hasher.stage_digest(stage.outputs)
+                )
+
+                if dry_run:
+                    if not up_to_date:
+                        print(f"[{stage.name}] s-ar rula")
+                        would_run.add(stage.name)
+                    elif would_run.intersection(dag[stage.name]):
+                        print(f"[{stage.name}] s-ar rula daca dependentele produc alt output")
+                        would_run.add(stage.name)
+                    else:
+                        print(f"[{stage.name}] neschimbat, sarit")
+                    results[stage.name] = {'status': 'sarit', 'seconds': 0.0}
+                elif up_to_date:
+                    print(f"[{stage.name}] neschimbat, sarit")
+                    results[stage.name] = {'status': 'sarit', 'seconds': 0.0}
+                else:
+                    print(f"[{stage.name}] pornit")
+                    running[pool.submit(_run_stage, stage)] = stage.name
+                    state['stages'].setdefault(stage.name, {})['pending_digest'] = input_digest
+
+            # Etape ramase care nu mai pot porni (dependenta esuata)
+            for stage in stages:
+                if stage.name not in results and stage.name not in running.values() and any(
+                    dep in results and results[dep]['status'] in ('esuat', 'blocat') for dep in dag[stage.name]
+                ):
+                    print(f"[{stage.name}] blocat (dependenta esuata)")
+                    results[stage.name] = {'status': 'blocat', 'seconds': 0.0}
+                    progressed = True
+
+            if not running:
+                if not progressed:
+                    raise RuntimeError("Dependente circulare intre etape")
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                entry = state['stages'][name]
+                try:
+                    seconds = future.result()
+                except (Exception, SystemExit) as e:
+                    print(f"[{name}] EROARE: {e}")
+                    results[name] = {'status': 'esuat', 'seconds': 0.0}
+                    entry.pop('pending_digest', None)
+                    continue
+
+                # Etapele din aval ruleaza doar daca output-ul s-a schimbat efectiv
+                entry['input_digest'] = entry.pop('pending_digest')
+                stage = by_name[name]
+                if {os.path.abspath(p) for p in stage.inputs} & {os.path.abspath(p) for p in stage.outputs}:
+                    # Cache citit si rescris de etapa: input-ul include versiunea scrisa acum,
+                    # altfel etapa s-ar invalida singura la fiecare rulare
+                    entry['input_digest'] = hasher.stage_digest(stage.inputs)
+                entry['output_digest'] = hasher.stage_digest(by_name[name].outputs)
+                entry['seconds'] = seconds
+                results[name] = {'status': 'rulat', 'seconds': seconds}
+                print(f"[{name}] terminat in {seconds:.1f}s")
+
+                state['files'] = hasher.files
+                _save_state(state_dir, state)
+
+    if not dry_run:
+        state['files'] = hasher.files
+        _save_state(state_dir, state)
+        runs_path = os.path.join(state_dir, "runs.json")
+        runs = []
+        if os.path.exists(runs_path):
+            with open(runs_path, 'r', encoding='utf-8') as f:
+                runs = json.load(f)
+        runs.append({'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'stages': results})
+        with open(runs_path, 'w', encoding='utf-8') as f:
+            json.dump(runs, f, indent=2)
+
+    return results
+
+
+def annotation_files(root):
+    """
+    JSON-urile COCO exportate din MakeSense din directorul proiectului.
+    Se aleg dupa continut (au 'annotations'), nu dupa extensie: in acelasi director
+    ajung si rapoartele scripturilor (*_report.json, *_summary.json, benchmark_history.json).
+    """
+    files = []
+    for f in sorted(os.listdir(root)):
+        if not f.lower().endswith('.json') or f == "preannotations.json":
+            continue
+        try:
+            with open(os.path.join(root, f), 'r', encoding='utf-8') as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        if isinstance(data, dict) and 'annotations' in data:
+            files.append(os.path.join(root, f))
+    return files
+
+
+def create_stages(root, python=sys.executable):
+    """
+    Etapele proiectului, cu toate caile relative la directorul scriptului
+    """
+    images_dir = os.path.join(root, "images")
+    masks_dir = os.path.join(root, "masks")
+    training_dir = os.path.join(root, "training_480")
+    training_images = os.path.join(training_dir, "images")
+    training_masks = os.path.join(training_dir, "masks")
+    training_mask_store = training_masks + ".maskpack"  # mask_store.STORE_EXT (augment_dataset.py --mask-store)
+    # Manifestul (split-ul) descrie setul augmentat vechi: se sterge odata cu el
+    # (antrenarea revine la split-ul pe sursa pana la py dataset_manifest.py)
+    training_manifest = os.path.join(training_dir, "manifest.sqlite")  # dataset_manifest.MANIFEST_NAME
+    results_dir = os.path.join(root, "test_results")
+
+    def script(name):
+        return os.path.join(root, name)
+
+    json_files = annotation_files(root)
+
+    def convert_masks():
+        from convert_coco_to_masks import process_single_json
+        os.makedirs(masks_dir, exist_ok=True)
+        created = sum(bool(process_single_json(p, images_dir, masks_dir)) for p in json_files)
+        if created == 0:
+            raise RuntimeError("Nu s-a creat nicio masca")
+
+    def augment():
+        from augment_dataset import augment_dataset, verify_dataset
+        if not augment_dataset(images_dir, masks_dir, training_images, training_masks, num_augmentations=9):
+            raise RuntimeError("Augmentare incompleta")
+        if not verify_dataset(training_images, training_masks):
+            raise RuntimeError("Dataset augmentat invalid")
+
+    def train():
+        subprocess.run([python, script("train_tflite_480_masks.py")], cwd=root, check=True)
+
+    def test_masks():
+        from test_masks import apply_mask_to_image
+        os.makedirs(results_dir, exist_ok=True)
+        for f in sorted(os.listdir(images_dir)):
+            base_name = os.path.splitext(f)[0]
+            mask_path = os.path.join(masks_dir, f"{base_name}.png")
+            if f.lower().endswith(('.jpg', '.jpeg', '.png')) and os.path.exists(mask_path):
+                apply_mask_to_image(
+                    os.path.join(images_dir, f), mask_path, os.path.join(results_dir, f"result_{base_name}.png")
+                )
+
+    return [
+        Stage(
+            'convert_masks',
+            json_files + [images_dir, script("convert_coco_to_masks.py")],
+            [masks_dir],
+            convert_masks
+        ),
+        Stage(
+            'augment',
+            [images_dir, masks_dir, script("augment_dataset.py")],
+            [training_images, training_masks, training_mask_store, training_manifest],
+            augment,
+            clean=True
+        ),
+        Stage(
+            'train',
+            [training_images, training_masks, training_mask_store, training_manifest,
+             os.path.join(training_dir, "hard_examples.json"),    # hard_example_mining.WEIGHTS_NAME
+             os.path.join(training_dir, "boundary_weights.npz"),  # segmentation_metrics.WEIGHTS_NAME
+             os.path.join(root, "app", "src", "main", "assets", "card_templates")]
+            + [script(name) for name in TRAIN_MODULES],
+            [os.path.join(root, "best_model_480.h5"), os.path.join(root, "card_segmentation_480.tflite"),
+             os.path.join(training_dir, "boundary_weights.npz")],
+            train
+        ),
+        Stage(
+            'test_masks',
+            [images_dir, masks_dir, script("test_masks.py")],
+            [results_dir],
+            test_masks,
+            clean=True
+        ),
+    ]
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Pipeline conversie -> augmentare -> antrenare -> test")
+    parser.add_argument('--force', nargs='*', default=[], help="Etape de rerulat indiferent de cache")
+    parser.add_argument('--dry-run', action='store_true', help="Doar arata ce s-ar rula")
+    parser.add_argument('--workers', type=int, default=2, help="Etape independente rulate in paralel")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(script_dir, "images")):
+        print(f"EROARE: Directorul images/ nu exista in {script_dir}")
+        exit(1)
+
+    # Modulele etapelor se importa din directorul proiectului
+    sys.path.insert(0, script_dir)
+    stages = create_stages(script_dir)
+    unknown = set(args.force) - {stage.name for stage in stages}
+    if unknown:
+        print(f"EROARE: Etape necunoscute: {', '.join(sorted(unknown))}")
+        exit(1)
+
+    print(f"=== PIPELINE ===")
+    dag = build_dag(stages)
+    for stage in stages:
+        print(f"  {stage.name:<14} <- {', '.join(dag[stage.name]) or '-'}")
+    print()
+
+    start = time.perf_counter()
+    results = run_pipeline(
+        stages, os.path.join(script_dir, STATE_DIR),
+        force=args.force, dry_run=args.dry_run, max_workers=args.workers
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"\n=== REZUMAT PIPELINE ===")
+    for stage in stages:
+        r = results[stage.name]
+        print(f"  {stage.name:<14} {r['status']:<8} {r['seconds']:>8.1f}s")
+    print(f"Total: {elapsed:.1f}s")
+
+    if any(r['status'] in ('esuat', 'blocat') for r in results.values()):
+        exit(1)
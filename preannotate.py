@@ -0,0 +1,189 @@
+"""
+Pre-anotare asistata de model pentru MakeSense.ai
+Ruleaza card_segmentation_480.tflite pe imagini neanotate, transforma masca
+prezisa intr-un poligon simplificat si scrie un JSON COCO importabil in MakeSense
+(anotatorii doar corecteaza poligoanele in loc sa le deseneze de la zero)
+"""
+
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cv2
+
+from tflite_inference import TFLiteSegmenter
+from image_loading import load_image_rgb, read_size
+
+CATEGORY_NAME = "card"  # Aceeasi clasa ca in MAKESENSE_ANOTARE.md
+MIN_AREA_RATIO = 0.01   # Ignora predictiile sub 1% din imagine
+EPSILON_RATIO = 0.01    # approxPolyDP: 1% din perimetru (poligoane usor de corectat)
+
+
+def load_for_inference(path, size):
+    """
+    Decodeaza imaginea (JPEG redus) si o redimensioneaza pentru model.
+    Dimensiunile originale se citesc din header, fara decodare completa.
+    """
+    width, height = read_size(path)
+    image = load_image_rgb(path, size)
+    return image.astype(np.float32) / 255.0, width, height
+
+
+def mask_to_polygon(prob, width, height, threshold=0.5, epsilon_ratio=EPSILON_RATIO):
+    """
+    Transforma probabilitatile (S, S) intr-un poligon COCO plat [x1, y1, x2, y2, ...]
+    in coordonatele imaginii originale. Returneaza None daca nu exista cartonas.
+    """
+    size_h, size_w = prob.shape
+    mask = (prob > threshold).astype(np.uint8) * 255
+
+    # Curatare usoara (ca refineMask pe Android, dar la rezolutia modelului)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+
+    contour = max(contours, key=cv2.contourArea)
+    if cv2.contourArea(contour) < MIN_AREA_RATIO * size_h * size_w:
+        return None
+
+    approx = cv2.approxPolyDP(contour, epsilon_ratio * cv2.arcLength(contour, True), True)
+    if len(approx) < 3:
+        return None
+
+    points = approx.reshape(-1, 2).astype(np.float64)
+    points[:, 0] *= width / size_w
+    points[:, 1] *= height / size_h
+    return [round(float(v), 1) for v in points.reshape(-1)]
+
+
+def polygon_area_bbox(polygon):
+    """
+    Aria (formula shoelace) si bbox-ul COCO [x, y, w, h]
+    """
+    xs = np.array(polygon[0::2])
+    ys = np.array(polygon[1::2])
+    area = 0.5 * abs(np.dot(xs, np.roll(ys, 1)) - np.dot(ys, np.roll(xs, 1)))
+    bbox = [float(xs.min()), float(ys.min()), float(xs.max() - xs.min()), float(ys.max() - ys.min())]
+    return float(area), bbox
+
+
+def preannotate(model_path, image_paths, batch_size=16, threshold=0.5, workers=4, num_threads=None):
+    """
+    Ruleaza modelul pe toate imaginile si construieste dict-ul COCO
+
+    Decodarea batch-ului urmator se face in paralel (thread pool) cat timp
+    interpreter-ul proceseaza batch-ul curent.
+    """
+    segmenter = TFLiteSegmenter(model_path, batch_size=batch_size, num_threads=num_threads)
+    size = segmenter.input_height
+
+    coco = {
+        'images': [],
+        'annotations': [],
+        'categories': [{'id': 1, 'name': CATEGORY_NAME, 'supercategory': 'none'}]
+    }
+
+    chunks = [image_paths[i:i + batch_size] for i in range(0, len(image_paths), batch_size)]
+    empty = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def submit(chunk):
+            return [pool.submit(load_for_inference, p, size) for p in chunk]
+
+        pending = submit(chunks[0]) if chunks else []
+        for chunk_idx, chunk in enumerate(chunks):
+            loaded = [f.result() for f in pending]
+            if chunk_idx + 1 < len(chunks):
+                pending = submit(chunks[chunk_idx + 1])
+
+            probs = segmenter.predict(np.stack([item[0] for item in loaded]))
+
+            for path, (_, width, height), prob in zip(chunk, loaded, probs):
+                image_id = len(coco['images']) + 1
+                coco['images'].append({
+                    'id': image_id,
+                    'file_name': os.path.basename(path),
+                    'width': width,
+                    'height': height
+                })
+
+                polygon = mask_to_polygon(prob, width, height, threshold)
+                if polygon is None:
+                    empty += 1
+                    continue
+
+                area, bbox = polygon_area_bbox(polygon)
+                coco['annotations'].append({
+                    'id': len(coco['annotations']) + 1,
+                    'image_id': image_id,
+                    'category_id': 1,
+                    'segmentation': [polygon],
+                    'area': area,
+                    'bbox': bbox,
+                    'iscrowd': 0
+                })
+
+            print(f"  [{min((chunk_idx + 1) * batch_size, len(image_paths))}/{len(image_paths)}] procesate")
+
+    return coco, empty
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Pre-anotare COCO pentru MakeSense.ai")
+    parser.add_argument('--model', default=os.path.join(script_dir, "card_segmentation_480.tflite"))
+    parser.add_argument('--images', default=os.path.join(script_dir, "unlabeled"))
+    parser.add_argument('--output', default=os.path.join(script_dir, "preannotations.json"))
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=4, help="Thread-uri pentru decodare")
+    parser.add_argument('--threads', type=int, default=None, help="Thread-uri TFLite")
+    parser.add_argument('--threshold', type=float, default=0.5)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"EROARE: Modelul {args.model} nu exista!")
+        exit(1)
+
+    if not os.path.exists(args.images):
+        print(f"EROARE: Directorul {args.images} nu exista!")
+        exit(1)
+
+    image_paths = sorted(
+        os.path.join(args.images, f) for f in os.listdir(args.images)
+        if f.lower().endswith(('.jpg', '.jpeg', '.png'))
+    )
+    if not image_paths:
+        print(f"EROARE: Nu s-au gasit imagini in {args.images}")
+        exit(1)
+
+    print(f"=== PRE-ANOTARE ===")
+    print(f"Model: {args.model}")
+    print(f"Imagini: {len(image_paths)}")
+
+    start = time.perf_counter()
+    coco, empty = preannotate(
+        args.model, image_paths,
+        batch_size=args.batch_size,
+        threshold=args.threshold,
+        workers=args.workers,
+        num_threads=args.threads
+    )
+    elapsed = time.perf_counter() - start
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(coco, f)
+
+    print(f"\n=== PRE-ANOTARE COMPLETA ===")
+    print(f"Poligoane generate: {len(coco['annotations'])}")
+    print(f"Imagini fara cartonas detectat: {empty}")
+    print(f"Timp: {elapsed:.1f}s ({len(image_paths) / elapsed:.1f} imagini/s)")
+    print(f"JSON COCO salvat: {args.output}")
+    print(f"\nIn MakeSense.ai: Actions -> Import Annotations -> COCO JSON")
+    print(f"Dupa corectare, exporta si ruleaza: py convert_coco_to_masks.py")
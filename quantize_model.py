@@ -0,0 +1,193 @@
+"""
+Cuantizare INT8 a modelului UNet: post-training (PTQ) vs quantization-aware training (QAT)
+QAT: fine-tuning cu noduri fake-quant (tfmot.quantization.keras.quantize_model),
+apoi export .tflite doar cu operatii intregi (input/output int8)
+Raport comun float / PTQ / QAT: Dice, Boundary F-score, marime si latenta interpretor
+
+REQUIREMENTS:
+py -m pip install tensorflow-model-optimization
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+try:
+    import tensorflow_model_optimization as tfmot
+except ImportError:
+    tfmot = None
+
+from train_tflite_480_masks import load_pairs
+from segmentation_metrics import CUSTOM_OBJECTS, dice_loss, dice_coefficient
+from tflite_inference import TFLiteSegmenter
+from evaluate_tflite import boundary_f_score_batch, list_dataset_pairs
+from image_hashing import split_pairs_by_source
+from dataset_manifest import MANIFEST_NAME, manifest_is_current, manifest_pairs
+from compress_model import benchmark_tflite
+from mask_store import resolve_masks_dir
+
+BATCH_SIZE = 8
+LEARNING_RATE = 1e-5       # Fine-tuning scurt: ponderile sunt deja antrenate
+CALIBRATION_SAMPLES = 100  # Imagini pentru calibrarea PTQ (din setul de antrenare)
+
+
+def representative_dataset(images, num_samples=CALIBRATION_SAMPLES):
+    """
+    Generator de calibrare: intervalele activarilor pentru cuantizarea int8
+    """
+    def generator():
+        for image in images[:num_samples]:
+            yield [image[None].astype(np.float32)]
+    return generator
+
+
+def convert_float(model):
+    """
+    Exportul actual din train_tflite_480_masks.py (ponderi si activari float32)
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float32]
+    return converter.convert()
+
+
+def convert_int8(model, calibration_images):
+    """
+    Conversie doar cu operatii intregi (TFLITE_BUILTINS_INT8), input si output int8.
+    Pentru modelul QAT intervalele vin din nodurile fake-quant, calibrarea acopera restul.
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset(calibration_images)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+def quantization_aware_finetune(model, X_train, y_train, X_val, y_val, epochs):
+    """
+    Fine-tuning cu fake-quant pe ponderi si activari, pastrand epoca cu cel mai bun Dice
+    """
+    qat_model = tfmot.quantization.keras.quantize_model(model)
+    qat_model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=LEARNING_RATE),
+        loss=dice_loss,
+        metrics=[dice_coefficient]
+    )
+    qat_model.fit(
+        X_train, y_train,
+        validation_data=(X_val, y_val),
+        batch_size=BATCH_SIZE,
+        epochs=epochs,
+        callbacks=[
+            keras.callbacks.EarlyStopping(
+                monitor='val_dice_coefficient', mode='max', patience=3, verbose=1, restore_best_weights=True
+            )
+        ],
+        verbose=1
+    )
+    return qat_model
+
+
+def benchmark_variant(tflite_model, X_val, y_val, tolerance=2):
+    """
+    benchmark_tflite (marime, latenta, Dice) + Boundary F-score pe validare
+    """
+    result = benchmark_tflite(tflite_model, X_val, y_val)
+    segmenter = TFLiteSegmenter(model_content=tflite_model, batch_size=BATCH_SIZE)
+    pred = segmenter.predict(X_val) > 0.5
+    result['boundary_f'] = float(boundary_f_score_batch(pred, y_val[..., 0] > 0.5, tolerance).mean())
+    return result
+
+
+def print_quantization_report(results):
+    print(f"\n=== RAPORT CUANTIZARE ===")
+    print(f"{'Varianta':<12} {'Marime KB':>10} {'ms/img':>8} {'Dice':>8} {'Boundary F':>11}")
+    for name, r in results.items():
+        print(f"{name:<12} {r['size_kb']:>10.1f} {r['latency_ms']:>8.2f} {r['dice']:>8.4f} {r['boundary_f']:>11.4f}")
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Cuantizare INT8: PTQ vs quantization-aware training")
+    parser.add_argument('--model', default=os.path.join(script_dir, "best_model_480.h5"))
+    parser.add_argument('--dataset', default=os.path.join(script_dir, "training_480"),
+                        help="Director cu images/ si masks/")
+    parser.add_argument('--epochs', type=int, default=10, help="Epoci de fine-tuning QAT")
+    parser.add_argument('--output', default=os.path.join(script_dir, "card_segmentation_480_int8.tflite"))
+    args = parser.parse_args()
+
+    if tfmot is None:
+        print(f"EROARE: tensorflow-model-optimization nu este instalat!")
+        print(f"Ruleaza: py -m pip install tensorflow-model-optimization")
+        exit(1)
+
+    if not os.path.exists(args.model):
+        print(f"EROARE: Modelul {args.model} nu exista!")
+        print(f"Ruleaza mai intai: py train_tflite_480_masks.py")
+        exit(1)
+
+    images_dir = os.path.join(args.dataset, "images")
+    try:
+        masks_dir = resolve_masks_dir(os.path.join(args.dataset, "masks"))
+    except IOError as e:
+        print(f"EROARE: {e}")
+        exit(1)
+    if not os.path.exists(images_dir) or not os.path.exists(masks_dir):
+        print(f"EROARE: {args.dataset} trebuie sa contina images/ si masks/")
+        exit(1)
+
+    # Acelasi split ca la antrenare
+    manifest_path = os.path.join(args.dataset, MANIFEST_NAME)
+    if manifest_is_current(manifest_path):
+        train_pairs = manifest_pairs(manifest_path, 'train')
+        val_pairs = manifest_pairs(manifest_path, 'val')
+    else:
+        pairs = list_dataset_pairs(images_dir, masks_dir)
+        train_idx, val_idx = split_pairs_by_source(pairs)
+        train_pairs = [pairs[i] for i in train_idx]
+        val_pairs = [pairs[i] for i in val_idx]
+
+    print(f"\n=== INCARCARE DATASET ===")
+    X_train, y_train = load_pairs(train_pairs)
+    X_val, y_val = load_pairs(val_pairs)
+    print(f"Antrenare: {len(X_train)}, validare: {len(X_val)}")
+
+    model = keras.models.load_model(
+        args.model,
+        custom_objects=CUSTOM_OBJECTS
+    )
+    calibration = X_train[np.random.default_rng(42).permutation(len(X_train))]
+
+    results = {}
+    print(f"\n=== FLOAT32 ===")
+    results['float32'] = benchmark_variant(convert_float(model), X_val, y_val)
+
+    print(f"\n=== PTQ INT8 (calibrare pe {min(CALIBRATION_SAMPLES, len(X_train))} imagini) ===")
+    ptq_tflite = convert_int8(model, calibration)
+    results['ptq_int8'] = benchmark_variant(ptq_tflite, X_val, y_val)
+
+    print(f"\n=== QAT INT8 (fine-tuning {args.epochs} epoci) ===")
+    qat_model = quantization_aware_finetune(model, X_train, y_train, X_val, y_val, args.epochs)
+    qat_tflite = convert_int8(qat_model, calibration)
+    results['qat_int8'] = benchmark_variant(qat_tflite, X_val, y_val)
+
+    print_quantization_report(results)
+    gain = results['qat_int8']['boundary_f'] - results['ptq_int8']['boundary_f']
+    speedup = results['float32']['latency_ms'] / max(results['qat_int8']['latency_ms'], 1e-9)
+    print(f"\nQAT vs PTQ: Boundary F {gain:+.4f}, Dice "
+          f"{results['qat_int8']['dice'] - results['ptq_int8']['dice']:+.4f}")
+    print(f"QAT INT8 este {speedup:.1f}x mai rapid decat float32")
+
+    with open(args.output, 'wb') as f:
+        f.write(qat_tflite)
+    with open(os.path.splitext(args.output)[0] + '_report.json', 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"\nModel QAT INT8 salvat: {args.output}")
+    print(f"Verifica Dice pe tot setul cu: py evaluate_tflite.py --model {os.path.basename(args.output)}")
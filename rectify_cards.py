@@ -0,0 +1,213 @@
+"""
+Rectificare perspectiva a cartonaselor extrase
+Din masca (prezisa sau ground-truth) se potriveste un patrulater (approxPolyDP,
+ca detectCardContourHighRes pe Android) si cartonasul este adus la un crop
+drept, de dimensiune fixa, din poza la rezolutie completa
+"""
+
+import os
+import time
+import argparse
+from multiprocessing import Pool
+import numpy as np
+import cv2
+
+OUTPUT_WIDTH = 432
+# Aspect ratio (latime / inaltime) pentru cele doua tipuri de sabloane
+# SMALL: 1276x1276, LONG: 1276x1949 (vezi CameraManager.detectCardType)
+CARD_ASPECTS = {'small': 1.0, 'long': 1276 / 1949}
+
+
+def fit_quadrilateral(mask):
+    """
+    Patrulaterul conturului principal din masca (4 puncte float32)
+    approxPolyDP cu epsilon crescator pana raman 4 colturi; fallback minAreaRect
+    """
+    _, binary = cv2.threshold(mask, 127, 255, cv2.THRESH_BINARY)
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+
+    contour = cv2.convexHull(max(contours, key=cv2.contourArea))
+    perimeter = cv2.arcLength(contour, True)
+    for ratio in (0.01, 0.02, 0.03, 0.05, 0.08, 0.1):
+        approx = cv2.approxPolyDP(contour, ratio * perimeter, True)
+        if len(approx) == 4:
+            return approx.reshape(4, 2).astype(np.float32)
+        if len(approx) < 4:
+            break
+
+    return cv2.boxPoints(cv2.minAreaRect(contour)).astype(np.float32)
+
+
+def order_corners(quad):
+    """
+    Ordoneaza colturile: stanga-sus, dreapta-sus, dreapta-jos, stanga-jos
+    """
+    sums = quad.sum(axis=1)
+    diffs = np.diff(quad, axis=1).ravel()
+    return np.array([
+        quad[np.argmin(sums)],
+        quad[np.argmin(diffs)],
+        quad[np.argmax(sums)],
+        quad[np.argmax(diffs)]
+    ], dtype=np.float32)
+
+
+def canonical_size(corners, output_width=OUTPUT_WIDTH):
+    """
+    Dimensiunea crop-ului: aspect ratio-ul celui mai apropiat tip de cartonas,
+    latura lunga pe verticala. Returneaza si daca trebuie rotit (cartonas culcat).
+    """
+    tl, tr, br, bl = corners
+    width = (np.linalg.norm(tr - tl) + np.linalg.norm(br - bl)) / 2
+    height = (np.linalg.norm(bl - tl) + np.linalg.norm(br - tr)) / 2
+    rotate = width > height
+    aspect = min(width, height) / max(max(width, height), 1e-6)
+
+    card_type = min(CARD_ASPECTS, key=lambda k: abs(CARD_ASPECTS[k] - aspect))
+    out_h = int(round(output_width / CARD_ASPECTS[card_type]))
+    return (output_width, out_h), rotate, card_type
+
+
+def rectify_card(image, mask, output_width=OUTPUT_WIDTH):
+    """
+    Warp de perspectiva catre un crop drept, de dimensiune fixa
+
+    Args:
+        image: Poza BGR la rezolutie completa
+        mask: Masca uint8 (poate fi la alta rezolutie, ex. 256x256 de la TFLite)
+
+    Returns:
+        (crop, card_type) sau (None, None) daca masca e goala
+    """
+    quad = fit_quadrilateral(mask)
+    if quad is None:
+        return None, None
+
+    # Colturile se scaleaza la rezolutia pozei (warp-ul foloseste pixelii originali)
+    scale = np.array([image.shape[1] / mask.shape[1], image.shape[0] / mask.shape[0]], dtype=np.float32)
+    corners = order_corners(quad * scale)
+
+    (out_w, out_h), rotate, card_type = canonical_size(corners, output_width)
+    if rotate:
+        # Cartonas culcat: latura de sus devine latura din stanga
+        corners = np.roll(corners, -1, axis=0)
+
+    destination = np.array([[0, 0], [out_w - 1, 0], [out_w - 1, out_h - 1], [0, out_h - 1]], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(corners, destination)
+    crop = cv2.warpPerspective(image, matrix, (out_w, out_h), flags=cv2.INTER_LINEAR, borderValue=(255, 255, 255))
+    return crop, card_type
+
+
+def _rectify_file(job):
+    image_path, mask_path, output_path, output_width = job
+    image = cv2.imread(image_path)
+    mask = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE)
+    if image is None or mask is None:
+        return os.path.basename(image_path), None
+
+    crop, card_type = rectify_card(image, mask, output_width)
+    if crop is None:
+        return os.path.basename(image_path), None
+
+    cv2.imwrite(output_path, crop, [cv2.IMWRITE_JPEG_QUALITY, 95])
+    return os.path.basename(image_path), card_type
+
+
+def rectify_directory(images_dir, masks_dir, output_dir, output_width=OUTPUT_WIDTH, workers=None):
+    """
+    Rectifica toate pozele care au masca, in paralel (pool de procese)
+
+    Returns:
+        Lista (file, card_type) - card_type None pentru esecuri
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    for f in sorted(os.listdir(images_dir)):
+        if not f.lower().endswith(('.jpg', '.jpeg', '.png')):
+            continue
+        base_name = os.path.splitext(f)[0]
+        mask_path = os.path.join(masks_dir, f"{base_name}.png")
+        if os.path.exists(mask_path):
+            jobs.append((
+                os.path.join(images_dir, f),
+                mask_path,
+                os.path.join(output_dir, f"{base_name}.jpg"),
+                output_width
+            ))
+
+    with Pool(processes=workers) as pool:
+        return pool.map(_rectify_file, jobs, chunksize=4)
+
+
+def predict_masks(model_path, images_dir, output_masks_dir, batch_size=16):
+    """
+    Scrie mastile prezise de model (la rezolutia modelului) pentru pozele fara ground-truth
+    """
+    from tflite_inference import TFLiteSegmenter
+    from image_loading import load_image_rgb
+
+    os.makedirs(output_masks_dir, exist_ok=True)
+    segmenter = TFLiteSegmenter(model_path, batch_size=batch_size)
+    size = segmenter.input_height
+
+    files = sorted(f for f in os.listdir(images_dir) if f.lower().endswith(('.jpg', '.jpeg', '.png')))
+    for start in range(0, len(files), batch_size):
+        chunk = files[start:start + batch_size]
+        batch = np.stack([load_image_rgb(os.path.join(images_dir, f), size) for f in chunk]).astype(np.float32) / 255.0
+        for f, prob in zip(chunk, segmenter.predict(batch)):
+            mask = (prob > 0.5).astype(np.uint8) * 255
+            cv2.imwrite(os.path.join(output_masks_dir, f"{os.path.splitext(f)[0]}.png"), mask)
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Rectificare perspectiva cartonase")
+    parser.add_argument('--images', default=os.path.join(script_dir, "images"))
+    parser.add_argument('--masks', default=None,
+                        help="Implicit: masks/ (ground-truth) sau masks_predicted/ cu --model")
+    parser.add_argument('--model', default=None,
+                        help="Model TFLite: mastile se prezic si se scriu in --masks")
+    parser.add_argument('--output', default=os.path.join(script_dir, "rectified"))
+    parser.add_argument('--width', type=int, default=OUTPUT_WIDTH)
+    parser.add_argument('--workers', type=int, default=None, help="Implicit: numarul de nuclee")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.images):
+        print(f"EROARE: Directorul {args.images} nu exista!")
+        exit(1)
+
+    if args.model:
+        if not os.path.exists(args.model):
+            print(f"EROARE: Modelul {args.model} nu exista!")
+            exit(1)
+        if args.masks is None:
+            args.masks = os.path.join(script_dir, "masks_predicted")
+        elif os.path.exists(args.masks) and any(f.lower().endswith('.png') for f in os.listdir(args.masks)):
+            # Mastile anotate manual nu se suprascriu cu predictii
+            print(f"EROARE: {args.masks} contine deja masti! Alege alt director pentru predictii.")
+            exit(1)
+        print(f"Prezicere masti cu {args.model} -> {args.masks}")
+        predict_masks(args.model, args.images, args.masks)
+    else:
+        args.masks = args.masks or os.path.join(script_dir, "masks")
+        if not os.path.exists(args.masks):
+            print(f"EROARE: Directorul {args.masks} nu exista (sau foloseste --model)!")
+            exit(1)
+
+    print(f"=== RECTIFICARE CARTONASE ===")
+    start = time.perf_counter()
+    results = rectify_directory(args.images, args.masks, args.output, args.width, args.workers)
+    elapsed = time.perf_counter() - start
+
+    failed = [f for f, card_type in results if card_type is None]
+    for card_type in CARD_ASPECTS:
+        print(f"  {card_type}: {sum(1 for _, t in results if t == card_type)}")
+    if failed:
+        print(f"  ATENTIE: {len(failed)} poze fara contur valid: {', '.join(failed[:5])}")
+
+    print(f"\nRectificate {len(results) - len(failed)} din {len(results)} in {elapsed:.1f}s")
+    print(f"Rezultate salvate in: {args.output}")
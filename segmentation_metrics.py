@@ -0,0 +1,235 @@
+"""
+Metrici si loss-uri pentru segmentare, calculate per imagine (nu pe tot batch-ul aplatizat)
+compilate cu XLA (tf.function(jit_compile=True))
+
+- dice_coefficient / iou_coefficient: media scorurilor per imagine
+- bce_dice_loss: BCE + Dice
+- boundary_loss: BCE ponderat cu harta de distanta fata de contur + Dice
+  Hartile de ponderi se calculeaza o singura data per masca (cv2.distanceTransform)
+  si se salveaza langa dataset; tinta devine (N, S, S, 2) = [masca, pondere]
+
+Toate functiile folosesc doar y_true[..., :1] ca masca, deci merg si cu tinta simpla
+si cu tinta impachetata.
+"""
+
+import os
+import time
+import argparse
+import numpy as np
+import cv2
+import tensorflow as tf
+
+from mask_store import split_ref
+
+SMOOTH = 1e-6
+BOUNDARY_W0 = 5.0      # Ponderea maxima suplimentara pe contur
+BOUNDARY_SIGMA = 3.0   # Latimea benzii de contur (pixeli la rezolutia de antrenare)
+WEIGHTS_NAME = "boundary_weights.npz"
+
+
+@tf.function(jit_compile=True)
+def per_image_dice(y_true, y_pred, smooth=SMOOTH):
+    """
+    Dice pentru fiecare imagine din batch -> (B,)
+    """
+    y_true = tf.cast(y_true[..., :1], y_pred.dtype)
+    intersection = tf.reduce_sum(y_true * y_pred, axis=[1, 2, 3])
+    total = tf.reduce_sum(y_true, axis=[1, 2, 3]) + tf.reduce_sum(y_pred, axis=[1, 2, 3])
+    return (2. * intersection + smooth) / (total + smooth)
+
+
+@tf.function(jit_compile=True)
+def per_image_iou(y_true, y_pred, smooth=SMOOTH):
+    """
+    IoU (soft) pentru fiecare imagine din batch -> (B,)
+    """
+    y_true = tf.cast(y_true[..., :1], y_pred.dtype)
+    intersection = tf.reduce_sum(y_true * y_pred, axis=[1, 2, 3])
+    union = tf.reduce_sum(y_true + y_pred, axis=[1, 2, 3]) - intersection
+    return (intersection + smooth) / (union + smooth)
+
+
+def dice_coefficient(y_true, y_pred):
+    """
+    Dice mediu per imagine (o imagine ratata nu mai e ascunsa de restul batch-ului)
+    """
+    return tf.reduce_mean(per_image_dice(y_true, y_pred))
+
+
+def iou_coefficient(y_true, y_pred):
+    return tf.reduce_mean(per_image_iou(y_true, y_pred))
+
+
+def pixel_accuracy(y_true, y_pred):
+    """
+    binary_accuracy doar pe canalul mastii (functioneaza si cu tinta impachetata)
+    """
+    y_true = tf.cast(y_true[..., :1], y_pred.dtype)
+    return tf.reduce_mean(tf.cast(tf.equal(y_true, tf.round(y_pred)), tf.float32))
+
+
+def dice_loss(y_true, y_pred):
+    return 1 - dice_coefficient(y_true, y_pred)
+
+
+@tf.function(jit_compile=True)
+def _bce_map(y_true, y_pred):
+    y_true = tf.cast(y_true[..., :1], y_pred.dtype)
+    y_pred = tf.clip_by_value(y_pred, 1e-7, 1 - 1e-7)
+    return -(y_true * tf.math.log(y_pred) + (1 - y_true) * tf.math.log(1 - y_pred))
+
+
+def bce_dice_loss(y_true, y_pred):
+    """
+    BCE (stabilizeaza gradientii la inceput) + Dice (optimizeaza direct suprapunerea)
+    """
+    return tf.reduce_mean(_bce_map(y_true, y_pred)) + dice_loss(y_true, y_pred)
+
+
+def boundary_loss(y_true, y_pred):
+    """
+    BCE ponderat cu harta de contur (canalul 1 al tintei) + Dice
+    """
+    weights = tf.cast(y_true[..., 1:2], y_pred.dtype)
+    weighted = tf.reduce_sum(_bce_map(y_true, y_pred) * weights, axis=[1, 2, 3]) / \
+        tf.reduce_sum(weights, axis=[1, 2, 3])
+    return tf.reduce_mean(weighted) + dice_loss(y_true, y_pred)
+
+
+CUSTOM_OBJECTS = {
+    'dice_coefficient': dice_coefficient,
+    'iou_coefficient': iou_coefficient,
+    'pixel_accuracy': pixel_accuracy,
+    'dice_loss': dice_loss,
+    'bce_dice_loss': bce_dice_loss,
+    'boundary_loss': boundary_loss
+}
+
+
+def boundary_weight_map(mask, w0=BOUNDARY_W0, sigma=BOUNDARY_SIGMA):
+    """
+    Pondere 1 + w0 * exp(-d^2 / 2 sigma^2), d = distanta pana la contur (in ambele parti)
+    """
+    binary = (mask > 127).astype(np.uint8)
+    inside = cv2.distanceTransform(binary, cv2.DIST_L2, 5)
+    outside = cv2.distanceTransform(1 - binary, cv2.DIST_L2, 5)
+    distance = np.where(binary > 0, inside, outside)
+    return 1.0 + w0 * np.exp(-(distance ** 2) / (2 * sigma ** 2))
+
+
+def _mask_key(mask_path):
+    """
+    (sample_id, mtime) pentru o masca PNG sau o referinta din container
+    (pentru container conteaza mtime-ul fisierului .maskpack)
+    """
+    ref = split_ref(mask_path)
+    if ref is not None:
+        return ref[1], os.path.getmtime(ref[0])
+    return os.path.splitext(os.path.basename(mask_path))[0], os.path.getmtime(mask_path)
+
+
+def load_weight_maps(pairs, masks, cache_path, w0=BOUNDARY_W0, sigma=BOUNDARY_SIGMA):
+    """
+    Hartile de ponderi (N, S, S) float32 pentru masti deja incarcate (N, S, S, 1).
+    Se salveaza cuantizate uint8 in cache_path si se recalculeaza doar pentru mastile modificate.
+    Cache-ul e comun pentru train si val: intrarile altor esantioane se pastreaza la salvare.
+    """
+    keys = [_mask_key(p[1]) for p in pairs]
+    ids = [sid for sid, _ in keys]
+    mtimes = np.array([mtime for _, mtime in keys], dtype=np.float64)
+    size = masks.shape[1]
+
+    cached = {}
+    if os.path.exists(cache_path):
+        data = np.load(cache_path, allow_pickle=False)
+        if data['maps'].shape[1] == size and float(data['w0']) == w0 and float(data['sigma']) == sigma:
+            cached = {str(sid): (mtime, i) for i, (sid, mtime) in enumerate(zip(data['ids'], data['mtimes']))}
+            cached_maps = data['maps']
+
+    quantized = np.empty((len(pairs), size, size), dtype=np.uint8)
+    computed = 0
+    for i, (sid, mtime) in enumerate(zip(ids, mtimes)):
+        if sid in cached and cached[sid][0] == mtime:
+            quantized[i] = cached_maps[cached[sid][1]]
+        else:
+            weights = boundary_weight_map(masks[i, :, :, 0] * 255, w0, sigma)
+            quantized[i] = np.round((weights - 1.0) / w0 * 255).astype(np.uint8)
+            computed += 1
+
+    if computed:
+        current = set(ids)
+        kept = [(sid, entry) for sid, entry in cached.items() if sid not in current]
+        np.savez(
+            cache_path,
+            ids=np.array(ids + [sid for sid, _ in kept]),
+            mtimes=np.concatenate([mtimes, np.array([e[0] for _, e in kept], dtype=np.float64)]),
+            maps=np.concatenate([quantized, cached_maps[[e[1] for _, e in kept]]]) if kept else quantized,
+            w0=w0, sigma=sigma
+        )
+        print(f"Harti de contur: {computed} calculate, {len(pairs) - computed} din cache -> {cache_path}")
+
+    return 1.0 + quantized.astype(np.float32) / 255.0 * w0
+
+
+def pack_targets(masks, weight_maps):
+    """
+    Tinta pentru boundary_loss: (N, S, S, 2) = [masca, pondere]
+    """
+    return np.concatenate([masks, weight_maps[..., None]], axis=-1)
+
+
+def _flatten_dice_loss(y_true, y_pred, smooth=1e-6):
+    # Varianta veche (Dice global pe batch aplatizat), pastrata doar pentru benchmark
+    y_true_f = tf.keras.backend.flatten(y_true[..., :1])
+    y_pred_f = tf.keras.backend.flatten(y_pred)
+    intersection = tf.keras.backend.sum(y_true_f * y_pred_f)
+    return 1 - (2. * intersection + smooth) / (tf.keras.backend.sum(y_true_f) + tf.keras.backend.sum(y_pred_f) + smooth)
+
+
+def benchmark_step_time(model_fn, img_size=256, batch_size=16, steps=20):
+    """
+    Timp per pas de antrenare (train_on_batch) pentru fiecare loss, pe date sintetice
+    """
+    rng = np.random.default_rng(42)
+    images = rng.random((batch_size, img_size, img_size, 3), dtype=np.float32)
+    masks = np.zeros((batch_size, img_size, img_size, 1), dtype=np.float32)
+    masks[:, img_size // 4:3 * img_size // 4, img_size // 3:2 * img_size // 3] = 1.0
+    weight_maps = np.stack([boundary_weight_map(m[:, :, 0] * 255) for m in masks]).astype(np.float32)
+
+    variants = {
+        'dice (flatten)': (_flatten_dice_loss, masks),
+        'dice (per imagine)': (dice_loss, masks),
+        'bce+dice': (bce_dice_loss, masks),
+        'boundary': (boundary_loss, pack_targets(masks, weight_maps))
+    }
+
+    results = {}
+    for name, (loss, targets) in variants.items():
+        model = model_fn()
+        model.compile(optimizer='adam', loss=loss, metrics=[dice_coefficient])
+        model.train_on_batch(images, targets)  # Compilare / warm-up
+        start = time.perf_counter()
+        for _ in range(steps):
+            model.train_on_batch(images, targets)
+        results[name] = (time.perf_counter() - start) / steps * 1000
+        tf.keras.backend.clear_session()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark timp per pas pentru loss-urile de segmentare")
+    parser.add_argument('--size', type=int, default=256)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--steps', type=int, default=20)
+    args = parser.parse_args()
+
+    from train_tflite_480_masks import create_unet_model
+
+    print(f"=== BENCHMARK LOSS (batch {args.batch_size}, {args.size}x{args.size}) ===")
+    results = benchmark_step_time(
+        lambda: create_unet_model((args.size, args.size, 3)), args.size, args.batch_size, args.steps
+    )
+    baseline = results['dice (flatten)']
+    print(f"{'Loss':<20} {'ms/pas':>10} {'vs flatten':>12}")
+    for name, ms in results.items():
+        print(f"{name:<20} {ms:>10.2f} {ms / baseline:>11.2f}x")
@@ -0,0 +1,352 @@
+"""
+Serviciu HTTP local (asyncio, fara dependinte web) pentru extragerea cartonaselor
+
+    POST /segment[?output=card|mask]   body = bytes JPEG/PNG -> PNG la rezolutia pozei
+         card: cartonasul pe fundal alb (composite_on_white, ca apply_mask_to_image)
+         mask: masca 0/255
+    GET  /metrics                      latenta, throughput, marimea batch-urilor, coada
+    GET  /health
+
+- Pool de interpretoare TFLite, fiecare rulat intr-un thread propriu (invoke elibereaza GIL-ul)
+- Micro-batching: cand un interpretor se elibereaza, colecteaza cererile din coada pana la
+  max_batch sau pana la termenul max_wait_ms de la prima cerere
+- Backpressure: peste max_pending cereri in lucru, raspunsul este imediat 503 + Retry-After
+  (body-ul nu se mai citeste), iar body-urile peste MAX_BODY_MB primesc 413
+
+Test local: py segmentation_service.py  si  py load_generator.py
+"""
+
+import os
+import json
+import time
+import asyncio
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+import cv2
+
+from tflite_inference import TFLiteSegmenter
+from test_masks import composite_on_white
+
+MAX_BODY_MB = 20
+REQUEST_TIMEOUT = 30.0  # Secunde pana la 504
+LATENCY_WINDOW = 2000   # Ultimele N cereri pentru percentile si throughput
+
+_REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable',
+    504: 'Gateway Timeout'
+}
+
+
+class ServiceMetrics:
+    """
+    Contoare si ferestre glisante pentru /metrics
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.counts = {'requests': 0, 'completed': 0, 'rejected': 0, 'errors': 0, 'timeouts': 0}
+        self.batches = 0
+        self.batched_items = 0
+        self.latencies_ms = deque(maxlen=LATENCY_WINDOW)
+        self.inference_ms = deque(maxlen=LATENCY_WINDOW)
+        self.completed_at = deque(maxlen=LATENCY_WINDOW)
+
+    def record_request(self, latency_ms):
+        self.counts['completed'] += 1
+        self.latencies_ms.append(latency_ms)
+        self.completed_at.append(time.time())
+
+    def record_batch(self, size, inference_ms):
+        self.batches += 1
+        self.batched_items += size
+        self.inference_ms.append(inference_ms)
+
+    def snapshot(self, pending, queued):
+        def percentiles(values):
+            if not values:
+                return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+            p50, p95, p99 = np.percentile(np.asarray(values), [50, 95, 99])
+            return {'p50': float(p50), 'p95': float(p95), 'p99': float(p99)}
+
+        window = self.completed_at[-1] - self.completed_at[0] if len(self.completed_at) > 1 else 0.0
+        return {
+            'uptime_s': time.time() - self.started,
+            **self.counts,
+            'pending': pending,
+            'queued': queued,
+            'throughput_rps': (len(self.completed_at) - 1) / window if window > 0 else 0.0,
+            'latency_ms': percentiles(self.latencies_ms),
+            'inference_ms_per_batch': percentiles(self.inference_ms),
+            'batches': self.batches,
+            'mean_batch_size': self.batched_items / self.batches if self.batches else 0.0
+        }
+
+
+class InterpreterPool:
+    """
+    N interpretoare TFLite independente + un thread dedicat fiecaruia
+    """
+
+    def __init__(self, model_path, size, batch_size, num_threads=None):
+        self.segmenters = [
+            TFLiteSegmenter(model_path, batch_size=batch_size, num_threads=num_threads)
+            for _ in range(size)
+        ]
+        self.executor = ThreadPoolExecutor(size, thread_name_prefix='tflite')
+        self.input_size = (self.segmenters[0].input_width, self.segmenters[0].input_height)
+        self.free = None
+
+    def start(self):
+        self.free = asyncio.Queue()
+        for segmenter in self.segmenters:
+            self.free.put_nowait(segmenter)
+
+    async def acquire(self):
+        return await self.free.get()
+
+    def release(self, segmenter):
+        self.free.put_nowait(segmenter)
+
+
+class MicroBatcher:
+    """
+    Grupeaza cererile in batch-uri: primul interpretor liber ia din coada
+    pana la max_batch imagini sau pana la max_wait_ms de la prima
+    """
+
+    def __init__(self, pool, max_batch, max_wait_ms, metrics):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.metrics = metrics
+        self.queue = None
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        return asyncio.create_task(self._collect())
+
+    def submit(self, image):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((image, future))
+        return future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            segmenter = await self.pool.acquire()
+            items = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(items) < self.max_batch:
+                if not self.queue.empty():
+                    items.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            asyncio.create_task(self._infer(segmenter, items))
+
+    async def _infer(self, segmenter, items):
+        items = [(image, future) for image, future in items if not future.done()]
+        try:
+            if not items:
+                return
+            batch = np.stack([image for image, _ in items])
+            start = time.perf_counter()
+            probs = await asyncio.get_running_loop().run_in_executor(self.pool.executor, segmenter.predict, batch)
+            self.metrics.record_batch(len(items), (time.perf_counter() - start) * 1000)
+            for (_, future), prob in zip(items, probs):
+                if not future.done():
+                    future.set_result(prob)
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.pool.release(segmenter)
+
+
+def decode_request_image(body, input_size):
+    """
+    Bytes JPEG/PNG -> (imagine BGR la rezolutia originala, input model float32 RGB [0, 1])
+    """
+    image = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None, None
+    model_input = cv2.resize(cv2.cvtColor(image, cv2.COLOR_BGR2RGB), input_size, interpolation=cv2.INTER_AREA)
+    return image, model_input.astype(np.float32) / 255.0
+
+
+def encode_response_image(image, prob, output, threshold=0.5):
+    """
+    Probabilitati model -> PNG cu masca sau cartonasul pe fundal alb, la rezolutia pozei
+    """
+    height, width = image.shape[:2]
+    prob = cv2.resize(prob, (width, height), interpolation=cv2.INTER_LINEAR)
+    mask = (prob > threshold).astype(np.uint8) * 255
+    result = mask if output == 'mask' else composite_on_white(image, mask)
+    return cv2.imencode('.png', result)[1].tobytes()
+
+
+class SegmentationService:
+    def __init__(self, pool, batcher, metrics, max_pending):
+        self.pool = pool
+        self.batcher = batcher
+        self.metrics = metrics
+        self.max_pending = max_pending
+        self.pending = 0
+
+    async def handle_connection(self, reader, writer):
+        """
+        HTTP/1.1 minimal cu keep-alive (suficient pentru clienti locali si load_generator.py)
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_MB * 1024 * 1024:
+                    await self._respond(writer, 413, {'error': f"Maxim {MAX_BODY_MB} MB"}, close=True)
+                    break
+                if method == 'POST' and self.pending >= self.max_pending:
+                    # Backpressure: refuz imediat, fara sa citim (si sa decodam) body-ul
+                    self.metrics.counts['rejected'] += 1
+                    await self._respond(writer, 503, {'error': "Serviciu supraincarcat"},
+                                        extra_headers={'Retry-After': '1'}, close=True)
+                    break
+
+                body = await reader.readexactly(length) if length else b''
+                status, payload, content_type = await self._route(method, target, body)
+                close = headers.get('connection', '').lower() == 'close'
+                await self._respond(writer, status, payload, content_type=content_type, close=close)
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, target, body):
+        url = urlsplit(target)
+        if url.path == '/health':
+            return 200, {'status': 'ok'}, None
+        if url.path == '/metrics':
+            return 200, self.metrics.snapshot(self.pending, self.batcher.queue.qsize()), None
+        if url.path != '/segment':
+            return 404, {'error': f"Ruta necunoscuta: {url.path}"}, None
+        if method != 'POST':
+            return 405, {'error': "Foloseste POST cu imaginea in body"}, None
+
+        output = parse_qs(url.query).get('output', ['card'])[0]
+        if output not in ('card', 'mask'):
+            return 400, {'error': "output trebuie sa fie 'card' sau 'mask'"}, None
+        return await self._segment(body, output)
+
+    async def _segment(self, body, output):
+        loop = asyncio.get_running_loop()
+        self.metrics.counts['requests'] += 1
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            image, model_input = await loop.run_in_executor(None, decode_request_image, body, self.pool.input_size)
+            if image is None:
+                self.metrics.counts['errors'] += 1
+                return 400, {'error': "Imagine invalida (JPEG/PNG asteptat)"}, None
+
+            future = self.batcher.submit(model_input)
+            try:
+                prob = await asyncio.wait_for(future, REQUEST_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.metrics.counts['timeouts'] += 1
+                return 504, {'error': f"Inferenta a depasit {REQUEST_TIMEOUT:.0f}s"}, None
+
+            png = await loop.run_in_executor(None, encode_response_image, image, prob, output)
+            self.metrics.record_request((time.perf_counter() - start) * 1000)
+            return 200, png, 'image/png'
+        except Exception as e:
+            self.metrics.counts['errors'] += 1
+            return 500, {'error': str(e)}, None
+        finally:
+            self.pending -= 1
+
+    async def _respond(self, writer, status, payload, content_type=None, extra_headers=None, close=False):
+        if content_type is None:
+            payload = json.dumps(payload).encode('utf-8')
+            content_type = 'application/json'
+        headers = {
+            'Content-Type': content_type,
+            'Content-Length': str(len(payload)),
+            'Connection': 'close' if close else 'keep-alive',
+            **(extra_headers or {})
+        }
+        head = f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        head += ''.join(f"{key}: {value}\r\n" for key, value in headers.items())
+        writer.write(head.encode('latin-1') + b"\r\n" + payload)
+        await writer.drain()
+
+
+async def serve(args):
+    metrics = ServiceMetrics()
+    pool = InterpreterPool(args.model, args.interpreters, args.max_batch, args.threads)
+    pool.start()
+    batcher = MicroBatcher(pool, args.max_batch, args.max_wait_ms, metrics)
+    collector = batcher.start()
+    service = SegmentationService(pool, batcher, metrics, args.max_pending)
+
+    server = await asyncio.start_server(service.handle_connection, args.host, args.port)
+    print(f"=== SERVICIU SEGMENTARE ===")
+    print(f"Model: {args.model} (input {pool.input_size[0]}x{pool.input_size[1]})")
+    print(f"Interpretoare: {args.interpreters}, batch maxim: {args.max_batch}, "
+          f"asteptare maxima: {args.max_wait_ms} ms, cereri in lucru maxim: {args.max_pending}")
+    print(f"Asculta pe http://{args.host}:{args.port}  (POST /segment, GET /metrics)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        collector.cancel()
+        pool.executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Serviciu HTTP local pentru extragerea cartonaselor")
+    parser.add_argument('--model', default=os.path.join(script_dir, "card_segmentation_480.tflite"))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--interpreters', type=int, default=2, help="Interpretoare TFLite in paralel")
+    parser.add_argument('--threads', type=int, default=None, help="Thread-uri per interpretor")
+    parser.add_argument('--max-batch', type=int, default=4)
+    parser.add_argument('--max-wait-ms', type=float, default=10.0,
+                        help="Cat asteapta primul element dintr-un batch dupa altele")
+    parser.add_argument('--max-pending', type=int, default=64, help="Peste aceasta limita: 503")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"EROARE: Modelul {args.model} nu exista!")
+        print(f"Ruleaza mai intai: py train_tflite_480_masks.py")
+        exit(1)
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print(f"\nServiciu oprit.")
@@ -0,0 +1,356 @@
+"""
+Generator de poze sintetice cu cartonase (date de antrenare nelimitate, masti exacte)
+
+- Cartonase: crop-uri din pozele anotate (masca = canal alfa) + sabloanele RGBA din
+  app/src/main/assets/card_templates
+- Fundal: poze din --backgrounds sau fundaluri procedurale (gradient, textura, obiecte)
+- Transformari: perspectiva + rotatie + scara, umbra purtata, umbre peste scena,
+  reflexii (glare), culoare/luminozitate, blur, zgomot, recompresie JPEG
+- Masca este alfa-ul cartonasului dupa aceeasi transformare (>= 0.5), deci exacta la pixel
+
+SyntheticStream genereaza batch-uri in thread-uri (cv2 si numpy elibereaza GIL-ul) cu
+prefetch limitat; mixed_batches le amesteca in batch-urile de antrenare
+(SYNTHETIC_PER_BATCH in train_tflite_480_masks.py).
+"""
+
+import os
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cv2
+
+from image_loading import IMAGE_EXTENSIONS, decode_reduced
+from image_hashing import source_image_id
+from mask_store import read_mask, resolve_masks_dir
+
+CROP_MAX_SIZE = 512         # Latura maxima a crop-urilor pastrate in memorie
+TEMPLATES_DIR = os.path.join("app", "src", "main", "assets", "card_templates")
+CARD_SCALE = (0.45, 0.9)    # Latura lunga a cartonasului fata de latura imaginii
+PERSPECTIVE_JITTER = 0.06   # Deplasarea colturilor (fractie din imagine)
+SHADOW_PROB = 0.6
+CAST_SHADOW_PROB = 0.3
+GLARE_PROB = 0.4
+JPEG_PROB = 0.5
+
+
+def _limit_size(image, max_size):
+    scale = max_size / max(image.shape[:2])
+    if scale >= 1:
+        return image
+    return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def load_template_crops(templates_dir, max_size=CROP_MAX_SIZE):
+    """
+    Sabloanele PNG ca RGBA uint8 (fara canal alfa: cartonas opac)
+    """
+    crops = []
+    if not os.path.exists(templates_dir):
+        return crops
+    for f in sorted(os.listdir(templates_dir)):
+        if not f.lower().endswith('.png'):
+            continue
+        image = cv2.imread(os.path.join(templates_dir, f), cv2.IMREAD_UNCHANGED)
+        if image is None:
+            continue
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGRA)
+        elif image.shape[2] == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+        crops.append(_limit_size(cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA), max_size))
+    return crops
+
+
+def extract_card_crop(image_path, mask_path, max_size=CROP_MAX_SIZE):
+    """
+    Cartonasul dintr-o poza anotata: bounding box-ul mastii, cu masca pe post de alfa (RGBA)
+    """
+    image = decode_reduced(image_path, max_size)
+    mask = cv2.resize(read_mask(mask_path), (image.shape[1], image.shape[0]), interpolation=cv2.INTER_NEAREST)
+    ys, xs = np.nonzero(mask > 127)
+    if len(xs) == 0:
+        return None
+    y0, y1, x0, x1 = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+    rgba = np.dstack([cv2.cvtColor(image[y0:y1, x0:x1], cv2.COLOR_BGR2RGB), mask[y0:y1, x0:x1]])
+    return _limit_size(rgba, max_size)
+
+
+def load_card_crops(pairs, templates_dir, max_size=CROP_MAX_SIZE):
+    """
+    Un crop per poza sursa (augmentarile aceleiasi poze ar da crop-uri aproape identice)
+    + sabloanele. pairs trebuie sa fie doar din setul de antrenare.
+    """
+    by_source = {}
+    for image_path, mask_path in sorted(pairs, key=lambda p: '_orig' not in os.path.basename(p[0])):
+        by_source.setdefault(source_image_id(image_path), (image_path, mask_path))
+
+    crops = [extract_card_crop(i, m, max_size) for i, m in by_source.values()]
+    crops = [c for c in crops if c is not None]
+    return crops + load_template_crops(templates_dir, max_size)
+
+
+def load_backgrounds(backgrounds_dir, size):
+    """
+    Poze de fundal (RGB), decodate redus la ~2x rezolutia de generare
+    """
+    if not backgrounds_dir or not os.path.exists(backgrounds_dir):
+        return []
+    return [
+        cv2.cvtColor(decode_reduced(os.path.join(backgrounds_dir, f), size * 2), cv2.COLOR_BGR2RGB)
+        for f in sorted(os.listdir(backgrounds_dir)) if f.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+
+
+def procedural_background(rng, size):
+    """
+    Gradient intre doua culori + textura de joasa frecventa + cateva obiecte/linii (float32 RGB)
+    """
+    c0, c1 = rng.uniform(0, 255, (2, 3))
+    angle = rng.uniform(0, 2 * np.pi)
+    yy, xx = np.mgrid[0:size, 0:size].astype(np.float32) / size
+    t = np.cos(angle) * xx + np.sin(angle) * yy
+    t = (t - t.min()) / max(float(np.ptp(t)), 1e-6)
+    background = c0 * (1 - t[..., None]) + c1 * t[..., None]
+
+    texture = cv2.resize(rng.normal(0, 1, (8, 8, 3)).astype(np.float32), (size, size), interpolation=cv2.INTER_CUBIC)
+    background += texture * rng.uniform(5, 30) + rng.normal(0, rng.uniform(1, 8), (size, size, 3))
+
+    canvas = np.clip(background, 0, 255).astype(np.uint8)
+    for _ in range(rng.integers(0, 4)):
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        p0, p1 = rng.integers(0, size, (2, 2))
+        if rng.random() < 0.5:
+            cv2.line(canvas, tuple(int(v) for v in p0), tuple(int(v) for v in p1), color, int(rng.integers(1, 6)))
+        else:
+            cv2.circle(canvas, tuple(int(v) for v in p0), int(rng.integers(size // 20, size // 5)), color, -1)
+    return canvas.astype(np.float32)
+
+
+def photo_background(rng, photo, size):
+    h, w = photo.shape[:2]
+    side = int(min(h, w) * rng.uniform(0.5, 1.0))
+    y, x = rng.integers(0, h - side + 1), rng.integers(0, w - side + 1)
+    return cv2.resize(photo[y:y + side, x:x + side], (size, size), interpolation=cv2.INTER_AREA).astype(np.float32)
+
+
+def card_quad(rng, crop_w, crop_h, size):
+    """
+    Colturile cartonasului in imagine: scara, rotatie (in general aproape vertical), perspectiva
+    """
+    scale = rng.uniform(*CARD_SCALE) * size / max(crop_w, crop_h)
+    angle = rng.uniform(-np.pi, np.pi) if rng.random() < 0.3 else rng.uniform(-0.35, 0.35)
+    rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+
+    src = np.float32([[0, 0], [crop_w, 0], [crop_w, crop_h], [0, crop_h]])
+    dst = ((src - [crop_w / 2, crop_h / 2]) * scale) @ rotation.T
+    dst += rng.normal(0, PERSPECTIVE_JITTER * size, dst.shape)
+
+    # Pozitie aleatoare cu cartonasul in cadru (cat se poate)
+    low, high = -dst.min(axis=0), size - dst.max(axis=0)
+    dst += rng.uniform(np.minimum(low, high), np.maximum(low, high))
+    return src, dst.astype(np.float32)
+
+
+def _gaussian_blob(rng, size, center, radius):
+    """
+    Pata gaussiana eliptica rotita, valori in [0, 1]
+    """
+    yy, xx = np.mgrid[0:size, 0:size].astype(np.float32)
+    angle = rng.uniform(0, np.pi)
+    dx, dy = xx - center[0], yy - center[1]
+    u = dx * np.cos(angle) + dy * np.sin(angle)
+    v = -dx * np.sin(angle) + dy * np.cos(angle)
+    ratio = rng.uniform(1.0, 3.0)
+    return np.exp(-(u ** 2 / (2 * (radius * ratio) ** 2) + v ** 2 / (2 * radius ** 2)))
+
+
+def render_sample(rng, crops, backgrounds, size):
+    """
+    O poza sintetica: (imagine RGB uint8 (size, size, 3), masca uint8 0/255 (size, size))
+    """
+    if backgrounds and rng.random() < 0.7:
+        scene = photo_background(rng, backgrounds[rng.integers(len(backgrounds))], size)
+    else:
+        scene = procedural_background(rng, size)
+
+    crop = crops[rng.integers(len(crops))]
+    crop_h, crop_w = crop.shape[:2]
+    src, dst = card_quad(rng, crop_w, crop_h, size)
+    matrix = cv2.getPerspectiveTransform(src, dst)
+
+    # Culoare premultiplicata cu alfa: marginile nu preiau fundalul pozei din care provine crop-ul
+    alpha = crop[:, :, 3:4].astype(np.float32) / 255.0
+    premultiplied = np.dstack([crop[:, :, :3].astype(np.float32) * alpha, alpha[:, :, 0]])
+    warped = cv2.warpPerspective(premultiplied, matrix, (size, size), flags=cv2.INTER_LINEAR,
+                                 borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+    card, card_alpha = warped[:, :, :3], np.clip(warped[:, :, 3:4], 0.0, 1.0)
+    mask = (card_alpha[:, :, 0] >= 0.5).astype(np.uint8) * 255
+
+    if rng.random() < SHADOW_PROB:
+        offset = rng.normal(0, 0.02 * size, 2)
+        shift = np.float32([[1, 0, offset[0]], [0, 1, abs(offset[1])]])
+        shadow = cv2.warpAffine(card_alpha[:, :, 0], shift, (size, size))
+        shadow = cv2.GaussianBlur(shadow, (0, 0), rng.uniform(0.01, 0.04) * size)
+        scene *= 1 - rng.uniform(0.2, 0.6) * shadow[..., None]
+
+    image = card + scene * (1 - card_alpha)
+
+    if rng.random() < GLARE_PROB and mask.any():
+        ys, xs = np.nonzero(mask)
+        pick = rng.integers(len(xs))
+        blob = _gaussian_blob(rng, size, (xs[pick], ys[pick]), rng.uniform(0.04, 0.2) * size)
+        image += (255 - image) * (rng.uniform(0.3, 0.9) * blob * card_alpha[:, :, 0])[..., None]
+
+    if rng.random() < CAST_SHADOW_PROB:
+        polygon = rng.integers(-size // 2, size + size // 2, (rng.integers(3, 6), 2)).astype(np.int32)
+        cast = np.zeros((size, size), dtype=np.float32)
+        cv2.fillPoly(cast, [polygon], 1.0)
+        cast = cv2.GaussianBlur(cast, (0, 0), rng.uniform(0.01, 0.05) * size)
+        image *= 1 - rng.uniform(0.15, 0.5) * cast[..., None]
+
+    # Culoare / expunere / senzor
+    image = image * rng.uniform(0.85, 1.15, 3) * rng.uniform(0.7, 1.3) + rng.uniform(-25, 25)
+    if rng.random() < 0.3:
+        image = cv2.GaussianBlur(image, (0, 0), rng.uniform(0.5, 1.5))
+    image += rng.normal(0, rng.uniform(0, 6), image.shape)
+    image = np.clip(image, 0, 255).astype(np.uint8)
+
+    if rng.random() < JPEG_PROB:
+        encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, int(rng.integers(50, 96))])[1]
+        image = cv2.imdecode(encoded, cv2.IMREAD_UNCHANGED)
+
+    return image, mask
+
+
+def render_batch(crops, backgrounds, size, count, seed):
+    """
+    count poze sintetice: (N, size, size, 3) uint8 si (N, size, size) uint8
+    """
+    rng = np.random.default_rng(seed)
+    images = np.empty((count, size, size, 3), dtype=np.uint8)
+    masks = np.empty((count, size, size), dtype=np.uint8)
+    for i in range(count):
+        images[i], masks[i] = render_sample(rng, crops, backgrounds, size)
+    return images, masks
+
+
+class SyntheticStream:
+    """
+    Batch-uri sintetice generate in fundal de `workers` thread-uri, cu cel mult `prefetch` in asteptare.
+    wait_seconds = cat a asteptat consumatorul (aproape 0 = generatorul tine pasul cu antrenarea)
+    """
+
+    def __init__(self, crops, backgrounds, size, batch_size, workers=4, prefetch=None, seed=0):
+        if not crops:
+            raise ValueError("Nu exista crop-uri de cartonase pentru generare")
+        self.args = (crops, backgrounds, size, batch_size)
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='synthetic')
+        self.seed = seed
+        self.submitted = 0
+        self.wait_seconds = 0.0
+        self.pending = deque()
+        for _ in range(prefetch or 2 * workers):
+            self._submit()
+
+    def _submit(self):
+        self.pending.append(self.executor.submit(render_batch, *self.args, self.seed * 1_000_003 + self.submitted))
+        self.submitted += 1
+
+    def next_batch(self):
+        start = time.perf_counter()
+        batch = self.pending.popleft().result()
+        self.wait_seconds += time.perf_counter() - start
+        self._submit()
+        return batch
+
+    def close(self):
+        for future in self.pending:
+            future.cancel()
+        self.executor.shutdown(wait=True)
+
+
+def mixed_batches(images, masks, stream, synthetic_per_batch, batch_size, seed=42, target_fn=None, weights=None):
+    """
+    Generator infinit pentru model.fit: fiecare batch = (batch_size - synthetic_per_batch) exemple
+    reale amestecate + synthetic_per_batch sintetice. O epoca = ceil(N / exemple reale per batch) pasi.
+    target_fn: transforma mastile sintetice (N, S, S, 1) ca tintele reale (ex. pack_targets pentru boundary)
+    weights: ponderi hard-example per exemplu real; exemplele reale se esantioneaza cu inlocuire
+        proportional cu ele (ca WeightedSampler), in loc de o permutare uniforma
+    """
+    rng = np.random.default_rng(seed)
+    real_per_batch = batch_size - synthetic_per_batch
+    probabilities = None if weights is None else np.asarray(weights, dtype=np.float64) / np.sum(weights)
+    while True:
+        if probabilities is None:
+            order = rng.permutation(len(images))
+        else:
+            order = rng.choice(len(images), size=len(images), p=probabilities)
+        for start in range(0, len(order), real_per_batch):
+            idx = order[start:start + real_per_batch]
+            synthetic_images, synthetic_masks = stream.next_batch()
+            x = synthetic_images.astype(np.float32) / 255.0
+            y = (synthetic_masks > 127).astype(np.float32)[..., None]
+            if target_fn is not None:
+                y = target_fn(y)
+            yield np.concatenate([images[idx], x]), np.concatenate([masks[idx], y])
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Generator de poze sintetice cu cartonase")
+    parser.add_argument('--dataset', default=os.path.join(script_dir, "training_48"),
+                        help="Director cu images/ si masks/ (sursa crop-urilor)")
+    parser.add_argument('--templates', default=os.path.join(script_dir, TEMPLATES_DIR))
+    parser.add_argument('--backgrounds', default=None, help="Director cu poze de fundal (optional)")
+    parser.add_argument('--output', default=os.path.join(script_dir, "training_synthetic"))
+    parser.add_argument('--count', type=int, default=256)
+    parser.add_argument('--size', type=int, default=256)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=16)
+    args = parser.parse_args()
+
+    from evaluate_tflite import list_dataset_pairs
+
+    images_dir = os.path.join(args.dataset, "images")
+    try:
+        masks_dir = resolve_masks_dir(os.path.join(args.dataset, "masks"))
+    except IOError as e:
+        print(f"EROARE: {e}")
+        exit(1)
+    pairs = list_dataset_pairs(images_dir, masks_dir) if os.path.exists(images_dir) and os.path.exists(masks_dir) else []
+    crops = load_card_crops(pairs, args.templates)
+    if not crops:
+        print(f"EROARE: Nu s-au gasit cartonase in {args.dataset} sau {args.templates}")
+        exit(1)
+    backgrounds = load_backgrounds(args.backgrounds, args.size)
+
+    print(f"=== GENERARE SINTETICA ===")
+    print(f"Crop-uri: {len(crops)} ({len(pairs)} perechi anotate + sabloane), fundaluri foto: {len(backgrounds)}")
+    print(f"Poze: {args.count} la {args.size}x{args.size}, thread-uri: {args.workers}")
+
+    os.makedirs(os.path.join(args.output, "images"), exist_ok=True)
+    os.makedirs(os.path.join(args.output, "masks"), exist_ok=True)
+
+    stream = SyntheticStream(crops, backgrounds, args.size, args.batch_size, args.workers)
+    written = 0
+    start = time.perf_counter()
+    try:
+        while written < args.count:
+            images, masks = stream.next_batch()
+            for image, mask in zip(images, masks):
+                if written >= args.count:
+                    break
+                name = f"synthetic_{written:06d}"
+                cv2.imwrite(os.path.join(args.output, "images", f"{name}.jpg"), cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+                cv2.imwrite(os.path.join(args.output, "masks", f"{name}.png"), mask)
+                written += 1
+    finally:
+        stream.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"\nGenerate {written} poze in {elapsed:.1f}s ({written / elapsed:.1f} poze/s, inclusiv scrierea)")
+    print(f"  - Imagini: {os.path.join(args.output, 'images')}")
+    print(f"  - Masti: {os.path.join(args.output, 'masks')}")
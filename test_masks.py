@@ -7,12 +7,29 @@ import os
 from PIL import Image
 import numpy as np
 
-def apply_mask_to_image(image_path, mask_path, output_path):
+def composite_on_white(image_array, mask_array):
+    """
+    Cartonașul pe fundal alb: pixelii din imagine unde masca > 127, alb în rest
+    image_array (H, W, 3) uint8, mask_array (H, W) uint8 la aceeași rezoluție
+    (folosit și de segmentation_service.py, fără fișiere pe disc)
+    """
+    mask_binary = (mask_array > 127)[:, :, None]  # Binarizează masca
+    return np.where(mask_binary, image_array, np.uint8(255)).astype(np.uint8)
+
+def apply_mask_to_image(image_path, mask_path, output_path, max_size=None):
     """
     Aplică masca pe imagine și extrage cartonașul pe fundal alb
+
+    max_size: opțional, latura maximă a rezultatului - JPEG-ul se decodează
+    direct la scară redusă (draft) în loc de decodare completă 12 MP
     """
     # Încarcă imaginea originală
-    image = Image.open(image_path).convert('RGB')
+    image = Image.open(image_path)
+    if max_size is not None:
+        image.draft('RGB', (max_size, max_size))
+        image = image.convert('RGB')
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+    image = image.convert('RGB')
     image_array = np.array(image)
     
     # Încarcă masca
@@ -24,18 +41,7 @@ def apply_mask_to_image(image_path, mask_path, output_path):
         mask = mask.resize((image_array.shape[1], image_array.shape[0]), Image.LANCZOS)
         mask_array = np.array(mask)
     
-    # Creează imaginea rezultat (fundal alb)
-    result_array = np.ones_like(image_array) * 255  # Fundal alb
-    
-    # Aplică masca: unde masca este alb (255), pune pixelul din imagine
-    # Unde masca este negru (0), păstrează fundalul alb
-    mask_binary = (mask_array > 127).astype(np.uint8)  # Binarizează masca
-    
-    for c in range(3):  # Pentru fiecare canal RGB
-        result_array[:, :, c] = (
-            image_array[:, :, c] * mask_binary +
-            result_array[:, :, c] * (1 - mask_binary)
-        ).astype(np.uint8)
+    result_array = composite_on_white(image_array, mask_array)
     
     # Salvează rezultatul
     result_image = Image.fromarray(result_array)
@@ -0,0 +1,115 @@
+"""
+Inferenta TFLite batch-uita pentru modelul de segmentare a cartonaselor
+Folosit de evaluare, verificare paritate si celelalte unelte offline
+"""
+
+import numpy as np
+import tensorflow as tf
+
+DEFAULT_INPUT_SIZE = 256  # Folosit pentru modelele cu input dinamic daca nu se specifica altceva
+
+
+class TFLiteSegmenter:
+    """
+    Wrapper peste tf.lite.Interpreter care:
+      - redimensioneaza input-ul la (batch_size, H, W, 3) o singura data
+      - reutilizeaza tensorii alocati intre apeluri (fara allocate_tensors repetat)
+      - cuantizeaza/decuantizeaza automat pentru modelele int8/uint8
+    """
+
+    def __init__(self, model_path=None, batch_size=8, num_threads=None, model_content=None, input_size=None):
+        self.model_path = model_path or '<in-memory>'
+        self.interpreter = tf.lite.Interpreter(
+            model_path=model_path,
+            model_content=model_content,
+            num_threads=num_threads
+        )
+
+        input_details = self.interpreter.get_input_details()[0]
+        self.input_index = input_details['index']
+        self.input_dtype = input_details['dtype']
+
+        # Modelele cu input dinamic au -1 in shape_signature
+        signature = input_details.get('shape_signature', input_details['shape'])
+        self.dynamic_size = bool(signature[1] == -1 or signature[2] == -1)
+        self.input_height = int(input_details['shape'][1])
+        self.input_width = int(input_details['shape'][2])
+
+        if self.dynamic_size:
+            height = width = input_size or DEFAULT_INPUT_SIZE
+        else:
+            height, width = self.input_height, self.input_width
+
+        self.batch_size = 0
+        self._allocate(batch_size, height, width)
+
+    def _allocate(self, batch_size, height, width):
+        """
+        Redimensioneaza si aloca tensorii doar cand forma se schimba
+        """
+        if (batch_size, height, width) == (self.batch_size, self.input_height, self.input_width):
+            return
+
+        self.interpreter.resize_tensor_input(self.input_index, [batch_size, height, width, 3])
+        self.interpreter.allocate_tensors()
+
+        input_details = self.interpreter.get_input_details()[0]
+        output_details = self.interpreter.get_output_details()[0]
+        self.input_quant = input_details['quantization']
+        self.output_index = output_details['index']
+        self.output_dtype = output_details['dtype']
+        self.output_quant = output_details['quantization']
+
+        self.batch_size = batch_size
+        self.input_height = height
+        self.input_width = width
+
+    def resize_input(self, height, width):
+        """
+        Schimba rezolutia de input (doar pentru modelele cu input dinamic)
+        """
+        if not self.dynamic_size and (height, width) != (self.input_height, self.input_width):
+            raise ValueError(
+                f"Modelul {self.model_path} are input fix {self.input_height}x{self.input_width}"
+            )
+        self._allocate(self.batch_size, height, width)
+
+    def _quantize_input(self, batch):
+        if self.input_dtype == np.float32:
+            return batch.astype(np.float32, copy=False)
+        scale, zero_point = self.input_quant
+        quantized = np.round(batch / scale + zero_point)
+        info = np.iinfo(self.input_dtype)
+        return np.clip(quantized, info.min, info.max).astype(self.input_dtype)
+
+    def _dequantize_output(self, output):
+        if self.output_dtype == np.float32:
+            return output
+        scale, zero_point = self.output_quant
+        return (output.astype(np.float32) - zero_point) * scale
+
+    def predict(self, images):
+        """
+        Ruleaza modelul pe un array (N, H, W, 3) float32 in [0, 1].
+        Ultimul batch incomplet este completat cu zero-uri ca sa nu se realoce tensorii.
+
+        Returns:
+            Probabilitati (N, H, W) float32
+        """
+        n = len(images)
+        outputs = np.empty((n, self.input_height, self.input_width), dtype=np.float32)
+
+        for start in range(0, n, self.batch_size):
+            batch = images[start:start + self.batch_size]
+            count = len(batch)
+            if count < self.batch_size:
+                padded = np.zeros((self.batch_size,) + batch.shape[1:], dtype=batch.dtype)
+                padded[:count] = batch
+                batch = padded
+
+            self.interpreter.set_tensor(self.input_index, self._quantize_input(batch))
+            self.interpreter.invoke()
+            result = self._dequantize_output(self.interpreter.get_tensor(self.output_index))
+            outputs[start:start + count] = result[:count, :, :, 0]
+
+        return outputs
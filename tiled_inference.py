@@ -0,0 +1,156 @@
+"""
+Inferenta TFLite pe tile-uri pentru poze mari (masti la rezolutie completa)
+Poza este impartita in tile-uri suprapuse, toate tile-urile trec prin interpreter
+in batch-uri, iar probabilitatile se combina cu o fereastra de ponderare
+(marginile tile-urilor conteaza mai putin decat centrul). Folosit offline pentru
+ground-truth de calitate mai buna decat masca 256x256 redimensionata.
+"""
+
+import os
+import time
+import argparse
+import numpy as np
+import cv2
+
+from tflite_inference import TFLiteSegmenter
+
+TILE_SIZE = 512        # Tile-ul din poza (redimensionat la input-ul modelului)
+TILE_OVERLAP = 128     # Suprapunere intre tile-uri vecine
+WORK_MAX_SIZE = 2000   # Latura maxima de lucru (ca MAX_DIMENSION din mask_refinement)
+
+
+def tile_positions(length, tile, overlap):
+    """
+    Pozitiile de start pe o axa; ultimul tile este lipit de margine
+    """
+    if length <= tile:
+        return [0]
+    stride = tile - overlap
+    positions = list(range(0, length - tile, stride))
+    positions.append(length - tile)
+    return positions
+
+
+def blend_window(tile, overlap):
+    """
+    Fereastra 2D: rampa liniara pe zona de suprapunere, 1.0 in interior
+    """
+    ramp = np.ones(tile, dtype=np.float32)
+    if overlap > 0:
+        edge = (np.arange(overlap, dtype=np.float32) + 1) / (overlap + 1)
+        ramp[:overlap] = edge
+        ramp[-overlap:] = edge[::-1]
+    return np.outer(ramp, ramp)
+
+
+def predict_tiled(segmenter, image, tile=TILE_SIZE, overlap=TILE_OVERLAP, work_max_size=WORK_MAX_SIZE):
+    """
+    Probabilitati la rezolutia imaginii pentru o poza RGB uint8 (H, W, 3)
+
+    Returns:
+        (probabilitati (H, W) float32, numarul de tile-uri)
+    """
+    height, width = image.shape[:2]
+    scale = min(1.0, work_max_size / max(height, width))
+    work = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA) \
+        if scale < 1.0 else image
+    work_h, work_w = work.shape[:2]
+
+    # Pozele mai mici decat un tile se completeaza cu alb (fundalul tipic)
+    tile = min(tile, max(work_h, work_w))
+    if work_h < tile or work_w < tile:
+        padded = np.full((max(work_h, tile), max(work_w, tile), 3), 255, dtype=np.uint8)
+        padded[:work_h, :work_w] = work
+        work = padded
+
+    overlap = min(overlap, tile // 2)
+    ys = tile_positions(work.shape[0], tile, overlap)
+    xs = tile_positions(work.shape[1], tile, overlap)
+    model_size = (segmenter.input_width, segmenter.input_height)
+
+    tiles = np.empty((len(ys) * len(xs), segmenter.input_height, segmenter.input_width, 3), dtype=np.float32)
+    for i, (y, x) in enumerate((y, x) for y in ys for x in xs):
+        crop = work[y:y + tile, x:x + tile]
+        tiles[i] = cv2.resize(crop, model_size, interpolation=cv2.INTER_AREA) / 255.0
+
+    probs = segmenter.predict(tiles)
+
+    window = blend_window(tile, overlap)
+    accumulated = np.zeros(work.shape[:2], dtype=np.float32)
+    weights = np.zeros(work.shape[:2], dtype=np.float32)
+    for i, (y, x) in enumerate((y, x) for y in ys for x in xs):
+        prob = cv2.resize(probs[i], (tile, tile), interpolation=cv2.INTER_LINEAR)
+        accumulated[y:y + tile, x:x + tile] += prob * window
+        weights[y:y + tile, x:x + tile] += window
+
+    result = (accumulated / np.maximum(weights, 1e-6))[:work_h, :work_w]
+    if scale < 1.0:
+        result = cv2.resize(result, (width, height), interpolation=cv2.INTER_LINEAR)
+    return result, len(tiles)
+
+
+if __name__ == "__main__":
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Inferenta TFLite pe tile-uri (masti la rezolutie completa)")
+    parser.add_argument('--model', default=os.path.join(script_dir, "card_segmentation_480.tflite"))
+    parser.add_argument('--images', default=os.path.join(script_dir, "images"))
+    parser.add_argument('--output', default=os.path.join(script_dir, "masks_highres"))
+    parser.add_argument('--tile', type=int, default=TILE_SIZE, help="Latura tile-ului in pixeli de lucru")
+    parser.add_argument('--overlap', type=int, default=TILE_OVERLAP)
+    parser.add_argument('--max-size', type=int, default=WORK_MAX_SIZE,
+                        help="Latura maxima a rezolutiei de lucru (masca finala e la rezolutia pozei)")
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=None, help="Thread-uri TFLite")
+    parser.add_argument('--threshold', type=float, default=0.5)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"EROARE: Modelul {args.model} nu exista!")
+        exit(1)
+
+    if not os.path.exists(args.images):
+        print(f"EROARE: Directorul {args.images} nu exista!")
+        exit(1)
+
+    if args.overlap >= args.tile:
+        print(f"EROARE: Suprapunerea ({args.overlap}) trebuie sa fie mai mica decat tile-ul ({args.tile})")
+        exit(1)
+
+    files = sorted(f for f in os.listdir(args.images) if f.lower().endswith(('.jpg', '.jpeg', '.png')))
+    if not files:
+        print(f"EROARE: Nu s-au gasit imagini in {args.images}")
+        exit(1)
+
+    os.makedirs(args.output, exist_ok=True)
+    segmenter = TFLiteSegmenter(args.model, batch_size=args.batch_size, num_threads=args.threads)
+
+    print(f"=== INFERENTA PE TILE-URI ===")
+    print(f"Model: {args.model} (input {segmenter.input_width}x{segmenter.input_height})")
+    print(f"Tile: {args.tile}px, suprapunere: {args.overlap}px, rezolutie de lucru max: {args.max_size}px")
+
+    total_time = 0.0
+    total_mp = 0.0
+    for f in files:
+        image = cv2.imread(os.path.join(args.images, f))
+        if image is None:
+            print(f"  ATENTIE: Nu s-a putut citi {f}, skip...")
+            continue
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+        start = time.perf_counter()
+        prob, num_tiles = predict_tiled(segmenter, image, args.tile, args.overlap, args.max_size)
+        elapsed = time.perf_counter() - start
+
+        mask = (prob > args.threshold).astype(np.uint8) * 255
+        cv2.imwrite(os.path.join(args.output, f"{os.path.splitext(f)[0]}.png"), mask)
+
+        megapixels = image.shape[0] * image.shape[1] / 1e6
+        total_time += elapsed
+        total_mp += megapixels
+        print(f"  {f:<30} {image.shape[1]}x{image.shape[0]}  {num_tiles:>3} tile-uri  "
+              f"{elapsed * 1000:>8.1f} ms  ({elapsed / megapixels * 1000:.1f} ms/MP)")
+
+    if total_mp > 0:
+        print(f"\nTotal: {total_mp:.1f} MP in {total_time:.1f}s -> {total_time / total_mp * 1000:.1f} ms/MP")
+    print(f"Masti salvate in: {args.output}")
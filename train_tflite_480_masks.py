@@ -8,8 +8,20 @@ import numpy as np
 import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
-import cv2
-from sklearn.model_selection import train_test_split
+from training_profiler import create_profiling, timed_input
+from check_tflite_parity import check_parity, print_parity_report
+from evaluate_tflite import list_dataset_pairs
+from image_hashing import split_pairs_by_source
+from dataset_manifest import MANIFEST_NAME, manifest_is_current, manifest_pairs
+from image_loading import load_image_rgb, load_mask_gray, IMAGE_EXTENSIONS
+from mask_store import mask_location, resolve_masks_dir
+from hard_example_mining import WEIGHTS_NAME, WeightedSampler, load_weights
+from segmentation_metrics import (
+    CUSTOM_OBJECTS, dice_coefficient, dice_loss, iou_coefficient, pixel_accuracy,
+    bce_dice_loss, boundary_loss, boundary_weight_map, load_weight_maps, pack_targets,
+    WEIGHTS_NAME as BOUNDARY_WEIGHTS_NAME
+)
+from synthetic_cards import TEMPLATES_DIR, SyntheticStream, load_card_crops, mixed_batches
 
 # Configurare seed pentru reproducibilitate
 np.random.seed(42)
@@ -34,49 +46,67 @@ BATCH_SIZE = 16  # RTX 5070 poate procesa batch-uri mari
 EPOCHS = 100
 LEARNING_RATE = 0.001
 
-def load_dataset(images_dir, masks_dir):
+# Loss: 'dice', 'bce_dice' sau 'boundary' (BCE ponderat pe contur + Dice)
+LOSS = 'dice'
+LOSSES = {'dice': dice_loss, 'bce_dice': bce_dice_loss, 'boundary': boundary_loss}
+
+# Profilare (dezactivata implicit, fara overhead)
+PROFILE_TRAINING = False
+PROFILE_TRACE_STEPS = None  # Ex: (10, 15) pentru trace tf.profiler pe pasii 10-14
+
+# Date sintetice (synthetic_cards.py): cate imagini din fiecare batch sunt generate, 0 = dezactivat
+SYNTHETIC_PER_BATCH = 0
+SYNTHETIC_WORKERS = 4
+
+# Verificare paritate Keras <-> TFLite inainte de salvare
+PARITY_NUM_IMAGES = 32
+
+def load_pairs(pairs, img_size=IMG_SIZE):
     """
-    Incarca dataset-ul de imagini si masti
+    Decodeaza perechile (image_path, mask_path) la array-uri pentru antrenare
+    """
+    images = []
+    masks = []
+    
+    for img_path, mask_path in pairs:
+        # Citeste imaginea (decodare JPEG redusa la scara >= img_size)
+        img = load_image_rgb(img_path, img_size)
+        img = img.astype(np.float32) / 255.0
+        
+        # Citeste masca
+        mask = load_mask_gray(mask_path, img_size)
+        mask = (mask > 127).astype(np.float32)  # Binarizare
+        mask = np.expand_dims(mask, axis=-1)
+        
+        images.append(img)
+        masks.append(mask)
+    
+    return np.array(images), np.array(masks)
+
+def load_dataset(images_dir, masks_dir, img_size=IMG_SIZE):
+    """
+    Incarca dataset-ul de imagini si masti (redimensionate la img_size x img_size)
     """
     print(f"\n=== INCARCARE DATASET ===")
     print(f"Imagini: {images_dir}")
     print(f"Masti: {masks_dir}")
     
     # Lista fisiere
-    image_files = sorted([f for f in os.listdir(images_dir) if f.lower().endswith(('.jpg', '.jpeg', '.png'))])
-    
-    images = []
-    masks = []
+    image_files = sorted([f for f in os.listdir(images_dir) if f.lower().endswith(IMAGE_EXTENSIONS)])
     
+    pairs = []
     for img_file in image_files:
         base_name = os.path.splitext(img_file)[0]
-        
-        # Cai complete
-        img_path = os.path.join(images_dir, img_file)
-        mask_path = os.path.join(masks_dir, f"{base_name}.png")
+        mask_path = mask_location(masks_dir, base_name)
         
         # Verifica ca exista masca
-        if not os.path.exists(mask_path):
+        if mask_path is None:
             print(f"ATENTIE: Masca lipseste pentru {img_file}, skip...")
             continue
         
-        # Citeste imaginea
-        img = cv2.imread(img_path)
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        img = cv2.resize(img, (IMG_SIZE, IMG_SIZE))
-        img = img.astype(np.float32) / 255.0
-        
-        # Citeste masca
-        mask = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE)
-        mask = cv2.resize(mask, (IMG_SIZE, IMG_SIZE))
-        mask = (mask > 127).astype(np.float32)  # Binarizare
-        mask = np.expand_dims(mask, axis=-1)
-        
-        images.append(img)
-        masks.append(mask)
+        pairs.append((os.path.join(images_dir, img_file), mask_path))
     
-    images = np.array(images)
-    masks = np.array(masks)
+    images, masks = load_pairs(pairs, img_size)
     
     print(f"Dataset incarcat:")
     print(f"  - Imagini: {images.shape}")
@@ -139,49 +169,67 @@ def create_unet_model(input_shape=(IMG_SIZE, IMG_SIZE, 3)):
     model = keras.Model(inputs=[inputs], outputs=[outputs])
     return model
 
-def dice_coefficient(y_true, y_pred, smooth=1e-6):
-    """
-    Calculeaza Dice Coefficient (metrica pentru segmentare)
-    """
-    y_true_f = tf.keras.backend.flatten(y_true)
-    y_pred_f = tf.keras.backend.flatten(y_pred)
-    intersection = tf.keras.backend.sum(y_true_f * y_pred_f)
-    return (2. * intersection + smooth) / (tf.keras.backend.sum(y_true_f) + tf.keras.backend.sum(y_pred_f) + smooth)
-
-def dice_loss(y_true, y_pred):
-    """
-    Dice Loss (loss function pentru segmentare)
-    """
-    return 1 - dice_coefficient(y_true, y_pred)
-
 if __name__ == "__main__":
     # Cai catre date
     script_dir = os.path.dirname(os.path.abspath(__file__))
     images_dir = os.path.join(script_dir, "training_480", "images")
-    masks_dir = os.path.join(script_dir, "training_480", "masks")
-    
+    # PNG-uri sau containerul scris de augment_dataset.py --mask-store (niciodata ambele)
+    try:
+        masks_dir = resolve_masks_dir(os.path.join(script_dir, "training_480", "masks"))
+    except IOError as e:
+        print(f"EROARE: {e}")
+        exit(1)
+
     # Verifica ca directoarele exista
     if not os.path.exists(images_dir) or not os.path.exists(masks_dir):
         print(f"EROARE: Directoarele training_480/images sau training_480/masks nu exista!")
         print(f"Ruleaza mai intai: py augment_dataset.py")
         exit(1)
     
-    # Incarca dataset
-    images, masks = load_dataset(images_dir, masks_dir)
+    # Profilare (optional)
+    stage_timer, profiling_callbacks = create_profiling(
+        PROFILE_TRAINING,
+        os.path.join(script_dir, "profiling_480"),
+        BATCH_SIZE,
+        trace_steps=PROFILE_TRACE_STEPS
+    )
     
-    if len(images) == 0:
+    # Split dataset: 80% antrenare, 20% validare
+    # Split pe imaginea sursa: augmentarile unei poze nu ajung si in train si in val
+    manifest_path = os.path.join(script_dir, "training_480", MANIFEST_NAME)
+    with stage_timer.stage("load_dataset"):
+        if manifest_is_current(manifest_path):
+            # Manifestul are deja split-ul (py dataset_manifest.py), fara re-listare
+            print(f"\n=== INCARCARE DATASET (manifest) ===")
+            print(f"Manifest: {manifest_path}")
+            train_pairs = manifest_pairs(manifest_path, 'train')
+            X_train, y_train = load_pairs(train_pairs)
+            val_pairs = manifest_pairs(manifest_path, 'val')
+            X_val, y_val = load_pairs(val_pairs)
+        else:
+            images, masks = load_dataset(images_dir, masks_dir)
+            pairs = list_dataset_pairs(images_dir, masks_dir)
+            train_idx, val_idx = split_pairs_by_source(pairs)
+            train_pairs = [pairs[i] for i in train_idx]
+            val_pairs = [pairs[i] for i in val_idx]
+            X_train, X_val = images[train_idx], images[val_idx]
+            y_train, y_val = masks[train_idx], masks[val_idx]
+    
+    if len(X_train) == 0 or len(X_val) == 0:
         print(f"EROARE: Nu s-au incarcat imagini!")
         exit(1)
     
-    # Split dataset: 80% antrenare, 20% validare
-    X_train, X_val, y_train, y_val = train_test_split(
-        images, masks, test_size=0.2, random_state=42
-    )
-    
     print(f"\n=== SPLIT DATASET ===")
     print(f"Antrenare: {X_train.shape[0]} imagini")
     print(f"Validare: {X_val.shape[0]} imagini")
     
+    # Hartile de contur se calculeaza o singura data per masca si raman in cache langa dataset
+    if LOSS == 'boundary':
+        weights_cache = os.path.join(script_dir, "training_480", BOUNDARY_WEIGHTS_NAME)
+        with stage_timer.stage("boundary_weights"):
+            y_train = pack_targets(y_train, load_weight_maps(train_pairs, y_train, weights_cache))
+            y_val = pack_targets(y_val, load_weight_maps(val_pairs, y_val, weights_cache))
+    
     # Creeaza model
     print(f"\n=== CREARE MODEL UNET ===")
     model = create_unet_model()
@@ -189,8 +237,8 @@ if __name__ == "__main__":
     # Compileaza model
     model.compile(
         optimizer=keras.optimizers.Adam(learning_rate=LEARNING_RATE),
-        loss=dice_loss,
-        metrics=[dice_coefficient, 'binary_accuracy']
+        loss=LOSSES[LOSS],
+        metrics=[dice_coefficient, iou_coefficient, pixel_accuracy]
     )
     
     print(f"Model creat:")
@@ -219,30 +267,84 @@ if __name__ == "__main__":
             verbose=1,
             min_lr=1e-7
         )
-    ]
+    ] + profiling_callbacks
     
     # Antrenare
     print(f"\n=== ANTRENARE MODEL ===")
     print(f"Epochs: {EPOCHS}")
     print(f"Batch size: {BATCH_SIZE}")
     print(f"Learning rate: {LEARNING_RATE}")
+    print(f"Loss: {LOSS}")
     print(f"\nINFO: Pe RTX 5070, antrenarea ar trebui sa dureze ~30-40 minute")
     print(f"Poti monitoriza progresul in timp real...\n")
     
-    history = model.fit(
-        X_train, y_train,
-        validation_data=(X_val, y_val),
-        batch_size=BATCH_SIZE,
-        epochs=EPOCHS,
-        callbacks=callbacks,
-        verbose=1
-    )
+    # Ponderi hard-example de la rularea anterioara (py hard_example_mining.py)
+    # Valabile doar pentru modelul cu care au fost scorate si pentru acelasi set de antrenare
+    weights_path = os.path.join(script_dir, "training_480", WEIGHTS_NAME)
+    tflite_path = os.path.join(script_dir, "card_segmentation_480.tflite")
+    sample_weights = None
+    if os.path.exists(weights_path):
+        sample_weights = load_weights(weights_path, train_pairs, tflite_path)
+    if sample_weights is not None:
+        print(f"Esantionare ponderata: {weights_path} (pondere maxima {sample_weights.max():.2f})\n")
+
+    if SYNTHETIC_PER_BATCH > 0:
+        # Crop-uri doar din setul de antrenare (validarea ramane pe poze reale nevazute)
+        crops = load_card_crops(train_pairs, os.path.join(script_dir, TEMPLATES_DIR))
+        stream = SyntheticStream(crops, [], IMG_SIZE, SYNTHETIC_PER_BATCH, SYNTHETIC_WORKERS)
+        target_fn = None
+        if LOSS == 'boundary':
+            target_fn = lambda m: pack_targets(
+                m, np.stack([boundary_weight_map(x[..., 0] * 255) for x in m]).astype(np.float32)
+            )
+        real_per_batch = BATCH_SIZE - SYNTHETIC_PER_BATCH
+        print(f"Date sintetice: {SYNTHETIC_PER_BATCH}/{BATCH_SIZE} per batch din {len(crops)} cartonase\n")
+        try:
+            # Exemplele reale vin tot din ponderile hard-example, daca exista
+            batches, _, _ = timed_input(callbacks, mixed_batches(
+                X_train, y_train, stream, SYNTHETIC_PER_BATCH, BATCH_SIZE,
+                target_fn=target_fn, weights=sample_weights
+            ))
+            history = model.fit(
+                batches,
+                steps_per_epoch=int(np.ceil(len(X_train) / real_per_batch)),
+                validation_data=(X_val, y_val),
+                epochs=EPOCHS,
+                callbacks=callbacks,
+                verbose=1
+            )
+        finally:
+            stream.close()
+        print(f"Asteptare dupa generatorul sintetic: {stream.wait_seconds:.1f}s "
+              f"(aproape 0 = antrenarea nu a fost limitata de generare)")
+    elif sample_weights is not None:
+        batches, _, _ = timed_input(callbacks, WeightedSampler(X_train, y_train, sample_weights, BATCH_SIZE))
+        history = model.fit(
+            batches,
+            validation_data=(X_val, y_val),
+            epochs=EPOCHS,
+            callbacks=callbacks,
+            verbose=1
+        )
+    else:
+        x, y, batch_size = timed_input(callbacks, X_train, y_train, BATCH_SIZE)
+        history = model.fit(
+            x, y,
+            validation_data=(X_val, y_val),
+            batch_size=batch_size,
+            epochs=EPOCHS,
+            callbacks=callbacks,
+            verbose=1
+        )
     
     # Evaluare finala
     print(f"\n=== EVALUARE FINALA ===")
-    val_loss, val_dice, val_acc = model.evaluate(X_val, y_val, verbose=0)
+    best_epoch = int(np.argmax(history.history['val_dice_coefficient'])) + 1
+    print(f"Cel mai bun Dice de validare la epoca {best_epoch}/{len(history.history['val_dice_coefficient'])}")
+    val_loss, val_dice, val_iou, val_acc = model.evaluate(X_val, y_val, verbose=0)
     print(f"Validation Loss: {val_loss:.4f}")
     print(f"Validation Dice Coefficient: {val_dice:.4f}")
+    print(f"Validation IoU: {val_iou:.4f}")
     print(f"Validation Accuracy: {val_acc:.4f}")
     
     # Conversie la TFLite
@@ -251,10 +353,7 @@ if __name__ == "__main__":
     # Incarca cel mai bun model salvat
     best_model = keras.models.load_model(
         'best_model_480.h5',
-        custom_objects={
-            'dice_loss': dice_loss,
-            'dice_coefficient': dice_coefficient
-        }
+        custom_objects=CUSTOM_OBJECTS
     )
     
     # Converter TFLite cu optimizari
@@ -262,10 +361,21 @@ if __name__ == "__main__":
     converter.optimizations = [tf.lite.Optimize.DEFAULT]
     converter.target_spec.supported_types = [tf.float32]
     
-    tflite_model = converter.convert()
+    with stage_timer.stage("tflite_convert"):
+        tflite_model = converter.convert()
+    
+    # Verifica ca TFLite produce aceleasi masti ca modelul Keras
+    parity_report = check_parity(
+        best_model, X_val[:PARITY_NUM_IMAGES],
+        tflite_content=tflite_model,
+        batch_size=BATCH_SIZE
+    )
+    print_parity_report(parity_report)
+    if not parity_report['passed']:
+        print(f"EROARE: Modelul TFLite difera prea mult de Keras, exportul a fost oprit!")
+        exit(1)
     
     # Salveaza modelul TFLite
-    tflite_path = os.path.join(script_dir, "card_segmentation_480.tflite")
     with open(tflite_path, 'wb') as f:
         f.write(tflite_model)
     
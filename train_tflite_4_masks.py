@@ -38,6 +38,10 @@ from tensorflow import keras
 from tensorflow.keras import layers
 from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping
 import glob
+from training_profiler import create_profiling, timed_input
+from tflite_inference import TFLiteSegmenter
+from evaluate_tflite import iou_dice_batch
+from image_loading import load_image_pil
 
 print("=" * 60)
 print("🚀 Antrenare TFLite pentru 4 măști")
@@ -57,6 +61,17 @@ IMAGES_DIR = os.path.join(CURRENT_DIR, "images")  # Pozele originale (0.jpg, 11.
 MASKS_DIR = os.path.join(CURRENT_DIR, "masks")    # Măștile (0.png, 11.png, 24.png, 33.png)
 OUTPUT_MODEL = "card_segmentation.tflite"
 
+# Profilare (dezactivată implicit, fără overhead)
+PROFILE_TRAINING = False
+PROFILE_TRACE_STEPS = None  # Ex: (2, 5) pentru trace tf.profiler pe pașii 2-4
+
+stage_timer, profiling_callbacks = create_profiling(
+    PROFILE_TRAINING,
+    os.path.join(CURRENT_DIR, "profiling_4"),
+    BATCH_SIZE,
+    trace_steps=PROFILE_TRACE_STEPS
+)
+
 # ============================================================================
 # VERIFICARE DATE
 # ============================================================================
@@ -103,12 +118,9 @@ print(f"\n✅ {len(matched_pairs)} perechi imagini-măști găsite")
 # ============================================================================
 print("\n📥 Încărcare date...")
 
-def load_image(path, target_size=(IMAGE_SIZE, IMAGE_SIZE)):
-    """Încarcă și redimensionează imaginea"""
-    img = Image.open(path).convert('RGB')
-    img = img.resize(target_size, Image.Resampling.LANCZOS)
-    img_array = np.array(img, dtype=np.float32) / 255.0  # Normalizează [0, 1]
-    return img_array
+def load_image(path, target_size=IMAGE_SIZE):
+    """Încarcă și redimensionează imaginea (draft JPEG la scara >= target_size)"""
+    return load_image_pil(path, target_size).astype(np.float32) / 255.0  # Normalizează [0, 1]
 
 def load_mask(path, target_size=(IMAGE_SIZE, IMAGE_SIZE)):
     """Încarcă și redimensionează masca (binară)"""
@@ -123,12 +135,13 @@ def load_mask(path, target_size=(IMAGE_SIZE, IMAGE_SIZE)):
 images = []
 masks = []
 
-for img_path, mask_path in matched_pairs:
-    img = load_image(img_path)
-    mask = load_mask(mask_path)
-    images.append(img)
-    masks.append(mask)
-    print(f"   ✅ {os.path.basename(img_path)} ({img.shape}) + {os.path.basename(mask_path)} ({mask.shape})")
+with stage_timer.stage("load_dataset"):
+    for img_path, mask_path in matched_pairs:
+        img = load_image(img_path)
+        mask = load_mask(mask_path)
+        images.append(img)
+        masks.append(mask)
+        print(f"   ✅ {os.path.basename(img_path)} ({img.shape}) + {os.path.basename(mask_path)} ({mask.shape})")
 
 images = np.array(images)
 masks = np.array(masks)
@@ -143,61 +156,34 @@ print(f"   Masks shape: {masks.shape}")
 # ============================================================================
 print("\n🔄 Data augmentation (crește dataset-ul de la 4 la ~16 imagini)...")
 
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
-
-# Augmentare pentru imagini
-img_datagen = ImageDataGenerator(
-    rotation_range=15,
-    width_shift_range=0.1,
-    height_shift_range=0.1,
-    zoom_range=0.1,
-    horizontal_flip=False,  # Nu flip-uim cartonașele
-    fill_mode='constant',
-    cval=0.0
-)
+from batch_augmentation import augment_batch, GEOMETRY_ONLY_CONFIG
 
-# Augmentare pentru măști (aceleași transformări)
-mask_datagen = ImageDataGenerator(
-    rotation_range=15,
-    width_shift_range=0.1,
-    height_shift_range=0.1,
-    zoom_range=0.1,
-    horizontal_flip=False,
-    fill_mode='constant',
-    cval=0.0
-)
+# Aceleași transformări ca vechiul ImageDataGenerator (rotație 15°, shift 0.1, zoom 0.1,
+# fără flip, fundal negru), aplicate vectorizat pe tot batch-ul.
+# Imaginea și masca primesc exact aceeași matrice afină.
+with stage_timer.stage("augmentation"):
+    augmented_images = [images]
+    augmented_masks = [masks]
+    for i in range(3):  # 3x augmentare = 4 * 4 = 16 imagini total
+        img_aug, mask_aug = augment_batch(images, masks, GEOMETRY_ONLY_CONFIG)
+        augmented_images.append(img_aug.numpy())
+        augmented_masks.append(mask_aug.numpy())
 
-# Aplică augmentarea
-augmented_images = [images]
-augmented_masks = [masks]
-
-for i in range(3):  # 3x augmentare = 4 * 4 = 16 imagini total
-    for img, mask in zip(images, masks):
-        # Generează transformări identice pentru imagine și mască
-        seed = np.random.randint(10000)
-        
-        img_aug = img_datagen.random_transform(img, seed=seed)
-        mask_aug = mask_datagen.random_transform(mask.squeeze(), seed=seed)
-        mask_aug = np.expand_dims(mask_aug, axis=-1)
-        
-        augmented_images.append(np.expand_dims(img_aug, axis=0))
-        augmented_masks.append(np.expand_dims(mask_aug, axis=0))
-
-augmented_images = np.vstack(augmented_images)
-augmented_masks = np.vstack(augmented_masks)
+    augmented_images = np.concatenate(augmented_images)
+    augmented_masks = np.concatenate(augmented_masks)
 
 print(f"   ✅ Dataset augmentat: {augmented_images.shape[0]} imagini")
 
 # ============================================================================
 # SPLIT TRAIN/VALIDATION
 # ============================================================================
-from sklearn.model_selection import train_test_split
+from image_hashing import group_train_val_split
 
-X_train, X_val, y_train, y_val = train_test_split(
-    augmented_images, augmented_masks,
-    test_size=0.2,
-    random_state=42
-)
+# Split pe imaginea sursă: augmentările unei poze rămân în aceeași parte (fără scurgeri în validare)
+source_groups = np.tile(np.arange(len(images)), len(augmented_images) // len(images))
+train_idx, val_idx = group_train_val_split(source_groups, test_size=0.2, random_state=42)
+X_train, X_val = augmented_images[train_idx], augmented_images[val_idx]
+y_train, y_val = augmented_masks[train_idx], augmented_masks[val_idx]
 
 print(f"\n📊 Split dataset:")
 print(f"   Train: {X_train.shape[0]} imagini")
@@ -272,11 +258,12 @@ print(f"   Batch size: {BATCH_SIZE}")
 callbacks = [
     EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True),
     ModelCheckpoint('best_model.h5', monitor='val_loss', save_best_only=True)
-]
+] + profiling_callbacks
 
+x, y, batch_size = timed_input(callbacks, X_train, y_train, BATCH_SIZE)
 history = model.fit(
-    X_train, y_train,
-    batch_size=BATCH_SIZE,
+    x, y,
+    batch_size=batch_size,
     epochs=EPOCHS,
     validation_data=(X_val, y_val),
     callbacks=callbacks,
@@ -300,7 +287,8 @@ converter = tf.lite.TFLiteConverter.from_keras_model(model)
 converter.optimizations = [tf.lite.Optimize.DEFAULT]
 
 # Convertește
-tflite_model = converter.convert()
+with stage_timer.stage("tflite_convert"):
+    tflite_model = converter.convert()
 
 # Salvează
 with open(OUTPUT_MODEL, 'wb') as f:
@@ -315,19 +303,14 @@ print(f"   Mărime: {file_size:.2f} MB")
 # ============================================================================
 print("\n🧪 Testare model...")
 
-# Testează pe o imagine de validare
-test_img = X_val[0:1]
-test_mask = y_val[0:1]
-
-prediction = model.predict(test_img, verbose=0)
-prediction_binary = (prediction > 0.5).astype(np.float32)
-
-# Calculează IoU (Intersection over Union)
-intersection = np.logical_and(test_mask, prediction_binary).sum()
-union = np.logical_or(test_mask, prediction_binary).sum()
-iou = intersection / union if union > 0 else 0
+# Testează pe tot setul de validare, atât modelul Keras cât și exportul TFLite
+val_gt = y_val[..., 0] > 0.5
+keras_pred = model.predict(X_val, verbose=0)[..., 0] > 0.5
+tflite_pred = TFLiteSegmenter(OUTPUT_MODEL, batch_size=BATCH_SIZE).predict(X_val) > 0.5
 
-print(f"   IoU (Intersection over Union): {iou:.3f}")
+for name, pred in (("Keras", keras_pred), ("TFLite", tflite_pred)):
+    iou, dice = iou_dice_batch(pred, val_gt)
+    print(f"   {name}: IoU mediu {iou.mean():.3f} (min {iou.min():.3f}), Dice mediu {dice.mean():.3f}")
 print(f"   (1.0 = perfect, >0.7 = bun, >0.5 = acceptabil)")
 
 # ============================================================================
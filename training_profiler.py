@@ -0,0 +1,333 @@
+"""
+Profilare antrenare TFLite (callback Keras + cronometrare etape)
+Masoara unde se duce timpul: decodare dataset, augmentare sau pasul UNet
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+import tensorflow as tf
+from tensorflow import keras
+
+try:
+    import resource  # Doar Linux/macOS
+except ImportError:
+    resource = None
+
+try:
+    import psutil  # Optional, necesar pe Windows
+except ImportError:
+    psutil = None
+
+
+def get_memory_high_water_mb():
+    """
+    Returneaza varful de memorie (MB): GPU daca exista, altfel RSS-ul procesului
+    """
+    gpus = tf.config.list_physical_devices('GPU')
+    if gpus:
+        try:
+            info = tf.config.experimental.get_memory_info('GPU:0')
+            return info['peak'] / (1024 * 1024)
+        except (ValueError, RuntimeError):
+            pass
+
+    if resource is not None:
+        # ru_maxrss este in KB pe Linux si in bytes pe macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            return max_rss / (1024 * 1024)
+        return max_rss / 1024
+
+    if psutil is not None:
+        mem = psutil.Process().memory_info()
+        return getattr(mem, 'peak_wset', mem.rss) / (1024 * 1024)
+
+    return 0.0
+
+
+class StageTimer:
+    """
+    Cronometreaza etapele din afara model.fit (load_dataset, augmentare, conversie)
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.on_stage_end = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages.append({
+                'stage': name,
+                'seconds': elapsed,
+                'memory_mb': get_memory_high_water_mb()
+            })
+            print(f"[PROFIL] {name}: {elapsed:.2f}s")
+            if self.on_stage_end is not None:
+                self.on_stage_end()
+
+
+class NullStageTimer:
+    """
+    Varianta fara cost pentru cand profilarea este dezactivata
+    """
+
+    stages = []
+
+    @contextmanager
+    def stage(self, name):
+        yield
+
+
+class InputTimer:
+    """
+    Timpul petrecut in producerea batch-urilor (__getitem__ / next), adunat din orice thread
+    """
+
+    def __init__(self):
+        self._seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._seconds += seconds
+
+    def take(self):
+        with self._lock:
+            seconds, self._seconds = self._seconds, 0.0
+        return seconds
+
+
+class TimedSequence(keras.utils.Sequence):
+    """
+    Sequence Keras cu timpul fiecarui __getitem__ masurat (delegare catre sequence-ul original)
+    """
+
+    def __init__(self, sequence, timer):
+        super().__init__()
+        self.sequence = sequence
+        self.timer = timer
+
+    def __len__(self):
+        return len(self.sequence)
+
+    def __getitem__(self, idx):
+        start = time.perf_counter()
+        batch = self.sequence[idx]
+        self.timer.add(time.perf_counter() - start)
+        return batch
+
+    def on_epoch_end(self):
+        self.sequence.on_epoch_end()
+
+
+class ArrayBatches(keras.utils.Sequence):
+    """
+    Batch-uri din array-uri in memorie, amestecate la fiecare epoca (ca model.fit(x, y, shuffle=True)),
+    ca extragerea batch-urilor sa poata fi cronometrata
+    """
+
+    def __init__(self, x, y, batch_size, seed=0):
+        super().__init__()
+        self.x = x
+        self.y = y
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        self.order = np.arange(len(x))
+        self.on_epoch_end()
+
+    def __len__(self):
+        return int(np.ceil(len(self.x) / self.batch_size))
+
+    def __getitem__(self, idx):
+        batch = self.order[idx * self.batch_size:(idx + 1) * self.batch_size]
+        return self.x[batch], self.y[batch]
+
+    def on_epoch_end(self):
+        self.rng.shuffle(self.order)
+
+
+def _timed_generator(generator, timer):
+    while True:
+        start = time.perf_counter()
+        try:
+            batch = next(generator)
+        except StopIteration:
+            return
+        timer.add(time.perf_counter() - start)
+        yield batch
+
+
+def timed_input(callbacks, x, y=None, batch_size=None):
+    """
+    Datele de antrenare pentru model.fit, cu timpul de citire masurat de ProfilingCallback.
+    Fara profilare (niciun ProfilingCallback in callbacks) se intorc neschimbate.
+
+    Args:
+        x: array, keras.utils.Sequence sau generator
+        y, batch_size: doar pentru array-uri
+
+    Returns:
+        (x, y, batch_size) de dat mai departe lui model.fit
+    """
+    profiler = next((c for c in callbacks if isinstance(c, ProfilingCallback)), None)
+    if profiler is None:
+        return x, y, batch_size
+    if isinstance(x, keras.utils.Sequence):
+        return TimedSequence(x, profiler.input_timer), None, None
+    if isinstance(x, np.ndarray):
+        return TimedSequence(ArrayBatches(x, y, batch_size), profiler.input_timer), None, None
+    return _timed_generator(iter(x), profiler.input_timer), None, None
+
+
+class ProfilingCallback(keras.callbacks.Callback):
+    """
+    Callback Keras care inregistreaza per pas:
+      - input_fetch: timpul de producere a batch-ului (citire / augmentare / generare),
+        masurat in __getitem__ / next al datelor date prin timed_input
+        (in TF2 batch-ul urmator se cere din interiorul pasului de antrenare, deci
+        distanta dintre callback-uri nu ar masura asteptarea dupa date)
+      - compute: restul pasului de antrenare (forward + backward)
+      - exemple/s si varful de memorie
+    Cu prefetch in paralel, input_fetch e o limita superioara a asteptarii efective.
+
+    La sfarsitul fiecarei epoci scrie un rezumat in CSV si toate datele in JSON.
+    Optional captureaza un trace tf.profiler pe intervalul de pasi [trace_start, trace_end).
+    """
+
+    def __init__(self, log_dir, batch_size, trace_steps=None, stage_timer=None):
+        super().__init__()
+        self.log_dir = log_dir
+        self.batch_size = batch_size
+        self.trace_steps = trace_steps
+        self.stage_timer = stage_timer
+        if stage_timer is not None:
+            # Etapele de dupa model.fit (ex: conversia TFLite) rescriu log-ul JSON
+            stage_timer.on_stage_end = self._write_logs
+
+        self.csv_path = os.path.join(log_dir, 'profile_epochs.csv')
+        self.json_path = os.path.join(log_dir, 'profile_steps.json')
+        self.trace_dir = os.path.join(log_dir, 'trace')
+
+        self.global_step = 0
+        self.trace_active = False
+        self.epoch_summaries = []
+        self.step_records = []
+
+        self.input_timer = InputTimer()
+        self._epoch_steps = []
+        self._epoch_start = None
+        self._step_start = None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_steps = []
+        self._epoch_start = time.perf_counter()
+        self._step_start = self._epoch_start
+        self.input_timer.take()
+
+    def on_train_batch_begin(self, batch, logs=None):
+        if self.trace_steps and self.global_step == self.trace_steps[0]:
+            tf.profiler.experimental.start(self.trace_dir)
+            self.trace_active = True
+            print(f"\n[PROFIL] Trace tf.profiler pornit la pasul {self.global_step}")
+
+    def on_train_batch_end(self, batch, logs=None):
+        # Pasul = de la sfarsitul pasului anterior (include cererea batch-ului)
+        now = time.perf_counter()
+        fetch = self.input_timer.take()
+        self._epoch_steps.append((fetch, max(now - self._step_start - fetch, 0.0)))
+        self._step_start = now
+        self.global_step += 1
+
+        if self.trace_active and self.global_step >= self.trace_steps[1]:
+            self._stop_trace()
+
+    def on_epoch_end(self, epoch, logs=None):
+        epoch_time = time.perf_counter() - self._epoch_start
+        steps = len(self._epoch_steps)
+        input_fetch = sum(s[0] for s in self._epoch_steps)
+        compute = sum(s[1] for s in self._epoch_steps)
+
+        summary = {
+            'epoch': epoch + 1,
+            'steps': steps,
+            'epoch_seconds': epoch_time,
+            'input_fetch_seconds': input_fetch,
+            'compute_seconds': compute,
+            'input_fetch_percent': (input_fetch / epoch_time * 100) if epoch_time > 0 else 0.0,
+            'examples_per_second': (steps * self.batch_size / compute) if compute > 0 else 0.0,
+            'memory_high_water_mb': get_memory_high_water_mb()
+        }
+        self.epoch_summaries.append(summary)
+
+        for step_idx, (fetch, comp) in enumerate(self._epoch_steps):
+            self.step_records.append({
+                'epoch': epoch + 1,
+                'step': step_idx,
+                'input_fetch_ms': fetch * 1000,
+                'compute_ms': comp * 1000
+            })
+
+        self._write_logs()
+
+    def on_train_end(self, logs=None):
+        if self.trace_active:
+            self._stop_trace()
+        self._write_logs()
+        print(f"[PROFIL] Log-uri salvate in: {self.log_dir}")
+
+    def _stop_trace(self):
+        tf.profiler.experimental.stop()
+        self.trace_active = False
+        print(f"\n[PROFIL] Trace tf.profiler salvat in: {self.trace_dir}")
+
+    def _write_logs(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+        if self.epoch_summaries:
+            with open(self.csv_path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=list(self.epoch_summaries[0].keys()))
+                writer.writeheader()
+                writer.writerows(self.epoch_summaries)
+
+        with open(self.json_path, 'w') as f:
+            json.dump({
+                'batch_size': self.batch_size,
+                'stages': self.stage_timer.stages if self.stage_timer else [],
+                'epochs': self.epoch_summaries,
+                'steps': self.step_records
+            }, f, indent=2)
+
+
+def create_profiling(enabled, log_dir, batch_size, trace_steps=None):
+    """
+    Returneaza (stage_timer, callbacks) pentru scripturile de antrenare.
+    Cand profilarea este dezactivata nu se adauga niciun callback (overhead zero in model.fit).
+    Datele de antrenare se trec prin timed_input(callbacks, ...) pentru timpul de citire.
+
+    Args:
+        enabled: Activeaza profilarea
+        log_dir: Director pentru CSV/JSON si trace
+        batch_size: Batch size-ul folosit la antrenare (pentru exemple/s)
+        trace_steps: (start, end) pentru trace tf.profiler sau None
+    """
+    if not enabled:
+        return NullStageTimer(), []
+
+    stage_timer = StageTimer()
+    callback = ProfilingCallback(log_dir, batch_size, trace_steps=trace_steps, stage_timer=stage_timer)
+    print(f"[PROFIL] Profilare activata -> {log_dir}")
+    if trace_steps:
+        print(f"[PROFIL] Trace tf.profiler pentru pasii {trace_steps[0]}-{trace_steps[1]}")
+    return stage_timer, [callback]